@@ -0,0 +1 @@
+"""Micro-benchmarks for cow_btree. Run a module with ``python -m``."""
@@ -0,0 +1,84 @@
+"""MMapPageBackend against FilePageBackend at a few buffer pool sizes.
+
+    python -m cow_btree.benchmarks.backends [--keys 100000] [--pool 256,4096]
+
+Each backend gets a fresh file and the same workload: batched inserts,
+durable single puts, random point gets and a full scan. The store's own
+node cache is kept small so reads actually reach the backend.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from cow_btree.page_backend import FilePageBackend, MMapPageBackend, PageBackend
+from cow_btree.store import Store
+
+
+def bench(
+    backend: PageBackend, keys: list[bytes], probes: list[bytes]
+) -> dict[str, float]:
+    """Operations per second of each workload on one backend."""
+    store = Store(backend, cache_size=64)
+    rates = {}
+    start = time.perf_counter()
+    for i in range(0, len(keys), 1000):
+        with store.write_batch() as batch:
+            for k in keys[i : i + 1000]:
+                batch.put(k, k * 4)
+    rates["batched puts"] = len(keys) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for k in probes[:500]:
+        store.put(k, b"updated")
+    rates["durable puts"] = 500 / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for k in probes:
+        store.get(k)
+    rates["gets"] = len(probes) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    count = sum(1 for _ in store.scan())
+    rates["scanned keys"] = count / (time.perf_counter() - start)
+    store.close()
+    return rates
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--probes", type=int, default=20_000)
+    parser.add_argument("--pool", default="256,4096", help="pool sizes in pages")
+    parser.add_argument("--page-size", type=int, default=4096)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(6)
+    keys = [f"key{rng.getrandbits(48):012x}".encode() for _ in range(args.keys)]
+    probes = rng.sample(keys, min(args.probes, len(keys)))
+    backends = [("mmap", lambda path: MMapPageBackend(path, args.page_size))]
+    for pool in map(int, args.pool.split(",")):
+        backends.append(
+            (
+                f"file/{pool}",
+                lambda path, pool=pool: FilePageBackend(path, args.page_size, pool),
+            )
+        )
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, make in backends:
+            path = os.path.join(tmp, name.replace("/", "-") + ".db")
+            results[name] = bench(make(path), keys, probes)
+    workloads = list(next(iter(results.values())))
+    print(f"{'backend':<12}" + "".join(f"{w:>15}" for w in workloads))
+    for name, rates in results.items():
+        print(f"{name:<12}" + "".join(f"{rates[w]:>15.0f}" for w in workloads))
+
+
+if __name__ == "__main__":
+    main()
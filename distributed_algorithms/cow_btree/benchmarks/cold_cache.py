@@ -0,0 +1,88 @@
+"""Cold-cache scans and lookups per MMapPageBackend access hint.
+
+    python -m cow_btree.benchmarks.cold_cache [--keys 200000] [--probes 5000]
+
+The file is built once from random-order batches, so logically adjacent
+leaves are scattered the way they are in an aged store. Before every run
+its pages are dropped from the OS page cache (posix_fadvise DONTNEED on
+the clean file, which needs no privileges), then a fresh store opened
+with that hint runs one workload: a full scan, random point gets, or the
+same keys as one sorted multi_get. Reported per run: seconds and major
+page faults, the reads that had to wait for the disk.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import resource
+import tempfile
+import time
+
+from cow_btree.page_backend import ACCESS_HINTS, MMapPageBackend
+from cow_btree.store import Store
+
+
+def drop_from_page_cache(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def build(path: str, keys: list[bytes], page_size: int) -> None:
+    shuffled = keys[:]
+    random.Random(3).shuffle(shuffled)
+    store = Store(MMapPageBackend(path, page_size))
+    for i in range(0, len(shuffled), 1000):
+        with store.write_batch() as batch:
+            for k in shuffled[i : i + 1000]:
+                batch.put(k, k * 4)
+    store.close()
+
+
+def run(path: str, page_size: int, hint: str, workload: str, probes: list[bytes]):
+    """(seconds, major faults) of one workload on a cold file."""
+    drop_from_page_cache(path)
+    store = Store(MMapPageBackend(path, page_size), access_hint=hint)
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_majflt
+    start = time.perf_counter()
+    if workload == "scan":
+        for _ in store.scan():
+            pass
+    elif workload == "gets":
+        for k in probes:
+            store.get(k)
+    else:
+        store.multi_get(sorted(probes))
+    elapsed = time.perf_counter() - start
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_majflt - faults
+    store.close()
+    return elapsed, faults
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=200_000)
+    parser.add_argument("--probes", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=4096)
+    args = parser.parse_args(argv)
+
+    keys = [f"key{i:010d}".encode() for i in range(args.keys)]
+    probes = random.Random(4).sample(keys, min(args.probes, len(keys)))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cold.db")
+        build(path, keys, args.page_size)
+        print(f"file: {os.path.getsize(path) / 2**20:.1f} MiB")
+        print(f"{'workload':<10}{'hint':<12}{'seconds':>9}{'major faults':>14}")
+        for workload in ("scan", "gets", "multi_get"):
+            for hint in ACCESS_HINTS:
+                elapsed, faults = run(path, args.page_size, hint, workload, probes)
+                print(f"{workload:<10}{hint:<12}{elapsed:>9.3f}{faults:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Put throughput against writer thread count, with and without group commit.
+
+    python -m cow_btree.benchmarks.group_commit [--writers 1,2,4,8] [--puts 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from cow_btree.page_backend import MMapPageBackend
+from cow_btree.store import Store
+
+
+def bench_writers(
+    path: str, writers: int, puts: int, group_commit: bool, durable: bool
+) -> float:
+    """Puts per second across writers threads doing puts puts each."""
+    store = Store(MMapPageBackend(path, 4096), group_commit=group_commit)
+
+    def writer(w: int) -> None:
+        for i in range(puts):
+            store.put(f"w{w}:{i:06d}".encode(), b"v" * 32, durable=durable)
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    store.close()
+    return writers * puts / elapsed
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", default="1,2,4,8")
+    parser.add_argument("--puts", type=int, default=200, help="puts per writer")
+    args = parser.parse_args(argv)
+
+    modes = [
+        ("serial", False, True),
+        ("group", True, True),
+        ("group-nodurable", True, False),
+    ]
+    print(f"{'writers':<9}" + "".join(f"{name:>18}" for name, _, _ in modes))
+    with tempfile.TemporaryDirectory() as tmp:
+        for writers in (int(w) for w in args.writers.split(",")):
+            row = []
+            for name, group_commit, durable in modes:
+                path = os.path.join(tmp, f"{name}-{writers}.db")
+                row.append(bench_writers(path, writers, args.puts, group_commit, durable))
+            print(f"{writers:<9}" + "".join(f"{ops:>14.0f} /s" for ops in row))
+
+
+if __name__ == "__main__":
+    main()
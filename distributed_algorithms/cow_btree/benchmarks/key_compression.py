@@ -0,0 +1,97 @@
+"""Tree size and lookup speed per node format on long, shared-prefix keys.
+
+    python -m cow_btree.benchmarks.key_compression [--keys 100000] [--page-size 4096]
+
+Three key shapes: "tenant" keys are tenant/region/table/id paths,
+"events" are time-ordered event ids under a few hosts, and "urls" are
+crawled URLs over a handful of sites. Each store is built twice, once
+by bulk_load and once by random-order batches (leaves about 2/3 full),
+and probed with random point reads.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from cow_btree.node import NODE_FORMATS
+from cow_btree.page_backend import InMemoryPageBackend
+from cow_btree.store import Store
+
+
+def _keys(shape: str, count: int, rng: random.Random) -> list[bytes]:
+    keys: set[bytes] = set()
+    while len(keys) < count:
+        if shape == "tenant":
+            key = (
+                f"tenant{rng.randrange(200):05d}/region-{rng.choice(['eu', 'us', 'ap'])}"
+                f"-{rng.randrange(3)}/orders/{rng.getrandbits(64):016x}"
+            )
+        elif shape == "events":
+            stamp = 1_700_000_000_000_000 + rng.randrange(86_400_000_000)
+            key = f"events/host-{rng.randrange(16):03d}.internal/{stamp:020d}"
+        else:
+            site = rng.choice(
+                ["docs.example.com", "shop.example.org", "news.example.net"]
+            )
+            words = "/".join(
+                rng.choice(["a", "guide", "item", "2024", "en"]) for _ in range(3)
+            )
+            key = f"https://{site}/{words}/{rng.getrandbits(40):010x}.html"
+        keys.add(key.encode())
+    return sorted(keys)
+
+
+def _tree_stats(store: Store) -> tuple[int, int]:
+    live = store._backend.page_count - len(store._free_ids) - len(store._pending)
+    return live, store._tree.height(store._root_id)
+
+
+def bench(shape: str, count: int, page_size: int) -> dict[str, tuple]:
+    """node format -> (bulk pages, bulk height, pages, height, gets/s)."""
+    rng = random.Random(5)
+    keys = _keys(shape, count, rng)
+    items = [(k, b"v" * 16) for k in keys]
+    shuffled = items[:]
+    rng.shuffle(shuffled)
+    probes = rng.sample(keys, min(len(keys), 20_000))
+    results = {}
+    for node_format in NODE_FORMATS:
+        bulk = Store(InMemoryPageBackend(page_size), node_format=node_format)
+        bulk.bulk_load(items)
+        store = Store(InMemoryPageBackend(page_size), node_format=node_format)
+        for i in range(0, len(shuffled), 1000):
+            with store.write_batch() as batch:
+                for k, v in shuffled[i : i + 1000]:
+                    batch.put(k, v)
+        start = time.perf_counter()
+        for k in probes:
+            store.get(k)
+        gets = len(probes) / (time.perf_counter() - start)
+        results[node_format] = (*_tree_stats(bulk), *_tree_stats(store), gets)
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=4096)
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'keys':<8}{'format':<9}{'bulk pages':>11}{'height':>7}"
+        f"{'pages':>8}{'height':>7}{'gets/s':>10}"
+    )
+    for shape in ("tenant", "events", "urls"):
+        for node_format, (bulk_pages, bulk_height, pages, height, gets) in bench(
+            shape, args.keys, args.page_size
+        ).items():
+            print(
+                f"{shape:<8}{node_format:<9}{bulk_pages:>11}{bulk_height:>7}"
+                f"{pages:>8}{height:>7}{gets:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
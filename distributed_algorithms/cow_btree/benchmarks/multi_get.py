@@ -0,0 +1,75 @@
+"""Batched lookups: Store.multi_get against a loop of Store.get.
+
+    python -m cow_btree.benchmarks.multi_get [--keys 200000] [--batch 1000]
+
+"uniform" batches are spread over the whole key space (about one key
+per leaf); "clustered" batches come from a narrow key range, as a
+service fetching related rows would.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from cow_btree.node import NODE_FORMATS
+from cow_btree.page_backend import InMemoryPageBackend
+from cow_btree.store import Store
+
+
+def _batches(keys: list[bytes], batch: int, rounds: int) -> dict[str, list[list[bytes]]]:
+    rng = random.Random(7)
+    uniform = [rng.sample(keys, batch) for _ in range(rounds)]
+    clustered = []
+    for _ in range(rounds):
+        start = rng.randrange(len(keys) - batch * 4)
+        window = keys[start : start + batch * 4]
+        clustered.append(rng.sample(window, batch))
+    return {"uniform": uniform, "clustered": clustered}
+
+
+def bench(
+    keys: int, batch: int, rounds: int
+) -> dict[tuple[str, str], tuple[float, float]]:
+    """(ms per batch with get in a loop, ms per batch with multi_get)."""
+    data = [(f"key{i:08d}".encode(), b"v" * 24) for i in range(keys)]
+    results = {}
+    for node_format in NODE_FORMATS:
+        store = Store(InMemoryPageBackend(4096), node_format=node_format)
+        store.bulk_load(data)
+        for shape, batches in _batches([k for k, _ in data], batch, rounds).items():
+            start = time.perf_counter()
+            for probe in batches:
+                [store.get(k) for k in probe]
+            looped = (time.perf_counter() - start) / rounds * 1e3
+            start = time.perf_counter()
+            for probe in batches:
+                store.multi_get(probe)
+            batched = (time.perf_counter() - start) / rounds * 1e3
+            results[node_format, shape] = (looped, batched)
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'format':<10}{'batch':<11}{'get loop ms':>13}"
+        f"{'multi_get ms':>14}{'speedup':>9}"
+    )
+    for (node_format, shape), (looped, batched) in bench(
+        args.keys, args.batch, args.rounds
+    ).items():
+        print(
+            f"{node_format:<10}{shape:<11}{looped:>13.2f}{batched:>14.2f}"
+            f"{looped / batched:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Decode cost and point-lookup latency: classic vs slotted node layout.
+
+    python -m cow_btree.benchmarks.node_format [--page-size 4096] [--keys 100000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from cow_btree.node import (
+    CLASSIC,
+    NODE_FORMATS,
+    LeafNode,
+    deserialize_node,
+    leaf_view,
+)
+from cow_btree.page_backend import MMapPageBackend
+from cow_btree.store import Store
+
+
+def _full_leaf(page_size: int) -> LeafNode:
+    leaf = LeafNode()
+    while True:
+        i = len(leaf.keys)
+        leaf.put(f"user:{i:08d}".encode(), b"v" * 24)
+        if leaf.encoded_size > page_size:
+            leaf.remove(leaf.keys[-1])
+            return leaf
+
+
+def _per_call_us(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def bench_decode(page_size: int, repeat: int) -> dict[str, dict[str, float]]:
+    leaf = _full_leaf(page_size)
+    probe = leaf.keys[len(leaf.keys) * 2 // 3]
+    results = {}
+    for node_format in NODE_FORMATS:
+        raw = leaf.serialize(0, page_size, node_format)
+        view = memoryview(raw)
+        results[node_format] = {
+            "entries": len(leaf.keys),
+            "full_decode_us": _per_call_us(lambda: deserialize_node(raw, 0), repeat),
+            "lazy_lookup_us": _per_call_us(
+                lambda: leaf_view(view, 0).get(probe), repeat
+            ),
+        }
+    return results
+
+
+def bench_lookups(page_size: int, keys: int, lookups: int) -> dict[str, float]:
+    data = [(f"user:{i:08d}".encode(), b"v" * 24) for i in range(keys)]
+    probes = [k for k, _ in random.Random(1).sample(data, min(lookups, keys))]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for node_format in NODE_FORMATS:
+            path = os.path.join(tmp, f"{node_format}.db")
+            store = Store(MMapPageBackend(path, page_size), node_format=node_format)
+            store.bulk_load(data)
+            start = time.perf_counter()
+            for k in probes:
+                store.get(k)
+            elapsed = time.perf_counter() - start
+            results[node_format] = elapsed / len(probes) * 1e6
+            store.close()
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=4096)
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=2_000)
+    args = parser.parse_args(argv)
+
+    decode = bench_decode(args.page_size, args.repeat)
+    lookups = bench_lookups(args.page_size, args.keys, args.lookups)
+    print(f"page_size={args.page_size}, {decode[CLASSIC]['entries']} entries per leaf")
+    print(f"{'format':<10}{'decode us':>12}{'leaf get us':>14}{'store get us':>15}")
+    for node_format in NODE_FORMATS:
+        row = decode[node_format]
+        print(
+            f"{node_format:<10}{row['full_decode_us']:>12.2f}"
+            f"{row['lazy_lookup_us']:>14.2f}{lookups[node_format]:>15.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Store.get throughput against reader thread count, per reader registry.
+
+    python -m cow_btree.benchmarks.reader_scaling [--threads 1,2,4,8,16,32]
+
+"global-lock" reproduces the previous registry (one dict behind one lock,
+min() over every pin); "per-thread" is cow_btree.reader_registry. A
+writer thread commits continuously so that reclamation keeps asking for
+the minimum pinned epoch.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import threading
+import time
+
+from cow_btree.node import SLOTTED
+from cow_btree.page_backend import InMemoryPageBackend
+from cow_btree.reader_registry import ReaderRegistry
+from cow_btree.store import Store
+
+
+class GlobalLockRegistry:
+    """The pre-sharding registry: token -> epoch under a single lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pins: dict[int, int] = {}
+        self._next = 0
+
+    def pin(self, epoch: int) -> int:
+        with self._lock:
+            token = self._next
+            self._next += 1
+            self._pins[token] = epoch
+            return token
+
+    def unpin(self, token: int) -> None:
+        with self._lock:
+            del self._pins[token]
+
+    def min_epoch(self) -> int | None:
+        with self._lock:
+            return min(self._pins.values()) if self._pins else None
+
+    def pins(self) -> dict[int, int]:
+        with self._lock:
+            return dict(self._pins)
+
+
+REGISTRIES = {"global-lock": GlobalLockRegistry, "per-thread": ReaderRegistry}
+
+
+def bench_readers(
+    registry: str, threads: int, keys: int, seconds: float
+) -> tuple[float, float]:
+    """(gets per second summed over threads readers, writer commits per second)."""
+    # Slotted leaves keep the lookup itself cheap, so registry costs show.
+    store = Store(InMemoryPageBackend(4096), node_format=SLOTTED)
+    data = [(f"key{i:08d}".encode(), b"v" * 16) for i in range(keys)]
+    store.bulk_load(data)
+    store._readers = REGISTRIES[registry]()
+    probes = [k for k, _ in data]
+    stop = threading.Event()
+    counts = [0] * threads
+    commits = 0
+
+    def reader(n: int) -> None:
+        local = random.Random(n).sample(probes, min(len(probes), 4096))
+        done = 0
+        while not stop.is_set():
+            for i in range(0, len(local), 64):
+                for k in local[i : i + 64]:
+                    store.get(k)
+                done += 64
+                if stop.is_set():
+                    break
+        counts[n] = done
+
+    def writer() -> None:
+        nonlocal commits
+        while not stop.is_set():
+            store.put(probes[commits % len(probes)], b"w" * 16)
+            commits += 1
+            time.sleep(0.001)
+
+    workers = [threading.Thread(target=reader, args=(n,)) for n in range(threads)]
+    workers.append(threading.Thread(target=writer))
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in workers:
+        t.join()
+    # Readers may need a while to notice stop under the GIL; count it.
+    elapsed = time.perf_counter() - start
+    return sum(counts) / elapsed, commits / elapsed
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", default="1,2,4,8,16,32")
+    parser.add_argument("--keys", type=int, default=50_000)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    header = "".join(f"{name + ' gets':>22}{'commits':>10}" for name in REGISTRIES)
+    print(f"{'threads':<9}{header}")
+    for threads in (int(t) for t in args.threads.split(",")):
+        row = "".join(
+            f"{gets:>20.0f}/s{commits:>8.0f}/s"
+            for gets, commits in (
+                bench_readers(name, threads, args.keys, args.seconds)
+                for name in REGISTRIES
+            )
+        )
+        print(f"{threads:<9}{row}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Store.get throughput against reader process count, next to threads.
+
+    python -m cow_btree.benchmarks.shared_readers [--workers 1,2,4,8]
+
+Each row runs N readers for --seconds against one MMapPageBackend file,
+while a writer in the parent process commits continuously: once as N
+threads sharing one read_only Store in a single process, and once as N
+processes with a read_only Store each, pinning epochs through the
+shared ReaderTable. Threads are bound by the GIL; processes should scale
+with the cores available.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+
+from cow_btree.node import SLOTTED
+from cow_btree.page_backend import MMapPageBackend
+from cow_btree.store import Store
+
+PAGE_SIZE = 4096
+
+
+def _key(i: int) -> bytes:
+    return f"key{i:08d}".encode()
+
+
+def _reader(path, table, threads, keys, seed, ready, start, seconds, results) -> None:
+    """One process: threads readers doing gets on a read_only store."""
+    store = Store(
+        MMapPageBackend(path, PAGE_SIZE),
+        read_only=True,
+        reader_table=table,
+        node_format=SLOTTED,
+    )
+    counts = [0] * threads
+
+    def run(n: int) -> None:
+        rng = random.Random(seed * 100 + n)
+        probes = [_key(i) for i in rng.sample(range(keys), 4096)]
+        for k in probes[:256]:  # warm the page cache and mapping
+            store.get(k)
+        start.wait()
+        done = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            for k in probes[:64]:
+                store.get(k)
+            done += 64
+            probes = probes[64:] + probes[:64]
+        counts[n] = done
+
+    workers = [threading.Thread(target=run, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    ready.put(None)
+    for t in workers:
+        t.join()
+    store.close()
+    results.put(sum(counts))
+
+
+def bench(
+    path: str,
+    table: str,
+    writer: Store,
+    processes: int,
+    threads: int,
+    keys: int,
+    seconds: float,
+) -> tuple[float, float]:
+    """(gets per second over every reader, writer commits per second)."""
+    ctx = multiprocessing.get_context("spawn")
+    ready, results = ctx.Queue(), ctx.Queue()
+    start = ctx.Event()
+    children = [
+        ctx.Process(
+            target=_reader,
+            args=(path, table, threads, keys, n, ready, start, seconds, results),
+        )
+        for n in range(processes)
+    ]
+    for child in children:
+        child.start()
+    for _ in children:
+        ready.get()
+    stop = threading.Event()
+    commits = 0
+
+    def write() -> None:
+        nonlocal commits
+        rng = random.Random(0)
+        while not stop.is_set():
+            writer.put(_key(rng.randrange(keys)), b"w" * 16)
+            commits += 1
+            time.sleep(0.001)
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    start.set()
+    total = sum(results.get() for _ in children)
+    stop.set()
+    thread.join()
+    for child in children:
+        child.join()
+    return total / seconds, commits / seconds
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "shared.db")
+        table = os.path.join(tmp, "shared.readers")
+        writer = Store(
+            MMapPageBackend(path, PAGE_SIZE), node_format=SLOTTED, reader_table=table
+        )
+        writer.bulk_load((_key(i), b"v" * 16) for i in range(args.keys))
+        print(f"{os.cpu_count()} CPUs")
+        print(f"{'workers':<9}{'threads gets':>16}{'processes gets':>18}{'speedup':>9}")
+        base = None
+        for n in (int(w) for w in args.workers.split(",")):
+            threaded, _ = bench(path, table, writer, 1, n, args.keys, args.seconds)
+            parallel, _ = bench(path, table, writer, n, 1, args.keys, args.seconds)
+            base = base or parallel
+            print(f"{n:<9}{threaded:>14.0f}/s{parallel:>16.0f}/s{parallel / base:>8.1f}x")
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""Reproducible Store workloads with machine-readable results.
+
+    python -m cow_btree.benchmarks.suite [--quick] [--filter zipf] [--output out.json]
+    python -m cow_btree.benchmarks.suite --compare baseline.json out.json
+
+Each case is a Workload: a backend, a page size, key and value sizes, a
+key distribution and a put/get mix, driven by one thread, optionally
+alongside reader threads doing gets or with Store's flush_interval.
+Keys, values and the operation sequence come from a random.Random seeded
+per case, so two runs do identical work and only the timings differ.
+
+- "sequential" puts append keys past the preloaded range in order and
+  gets walk the preloaded keys in order.
+- "random" picks preloaded keys uniformly.
+- "zipfian" picks them with probability proportional to 1/rank**0.99,
+  with ranks shuffled over the key space so hot keys do not share a leaf.
+
+Per case the JSON holds ops/sec overall, ops/sec and p50/p99 latency
+per operation kind, the file size and page count after the run, and the
+write amplification of the measured phase alone
+(Store.write_amplification, preload excluded). --compare matches cases
+by name and exits 1 if any throughput fell by more than --tolerance, for
+CI.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+from cow_btree.page_backend import InMemoryPageBackend, MMapPageBackend
+from cow_btree.store import Store
+
+DISTRIBUTIONS = ("sequential", "random", "zipfian")
+BACKENDS = ("memory", "mmap")
+SCHEMA = 1
+_ZIPF_THETA = 0.99
+
+
+@dataclass(frozen=True)
+class Workload:
+    backend: str = "memory"
+    page_size: int = 4096
+    key_size: int = 16
+    value_size: int = 100
+    distribution: str = "random"
+    get_fraction: float = 0.5
+    readers: int = 0
+    flush_interval: float | None = None
+    preload: int = 20_000
+    ops: int = 20_000
+    seed: int = 1
+
+    @property
+    def name(self) -> str:
+        name = (
+            f"{self.backend}/p{self.page_size}/k{self.key_size}v{self.value_size}"
+            f"/{self.distribution}/get{round(self.get_fraction * 100)}/r{self.readers}"
+        )
+        if self.flush_interval is not None:
+            name += f"/flush{self.flush_interval * 1000:g}ms"
+        return name
+
+
+def default_workloads(quick: bool = False) -> list[Workload]:
+    """The standard matrix; quick runs it at a tenth of the size for CI."""
+    size = {"preload": 2000, "ops": 2000} if quick else {}
+    cases = [
+        # Every distribution and mix, on both backends.
+        Workload(backend=b, distribution=d, get_fraction=g, **size)
+        for b, d, g in itertools.product(BACKENDS, DISTRIBUTIONS, (0.0, 0.5, 0.95))
+    ]
+    cases += [
+        Workload(page_size=p, value_size=32, **size)
+        for p in (256, 1024, 4096, 16384, 65536)
+    ]
+    cases += [
+        Workload(key_size=k, value_size=v, **size)
+        for k, v in ((8, 8), (64, 16), (16, 2000))
+    ]
+    cases += [
+        Workload(distribution="zipfian", get_fraction=0.0, readers=r, **size)
+        for r in (1, 4)
+    ]
+    cases += [
+        Workload(backend="mmap", get_fraction=0.0, flush_interval=0.01, **size)
+    ]
+    return cases
+
+
+class _KeyChooser:
+    """Indexes into the preloaded keys, per the workload's distribution."""
+
+    def __init__(self, workload: Workload, rng: random.Random):
+        self._rng = rng
+        self._count = workload.preload
+        self._distribution = workload.distribution
+        self._next = 0
+        if self._distribution == "zipfian":
+            total = 0.0
+            self._cumulative = []
+            for rank in range(1, self._count + 1):
+                total += 1.0 / rank**_ZIPF_THETA
+                self._cumulative.append(total)
+            self._ranks = list(range(self._count))
+            rng.shuffle(self._ranks)
+
+    def __call__(self) -> int:
+        if self._distribution == "sequential":
+            index = self._next % self._count
+            self._next += 1
+            return index
+        if self._distribution == "random":
+            return self._rng.randrange(self._count)
+        point = self._rng.random() * self._cumulative[-1]
+        return self._ranks[bisect.bisect(self._cumulative, point)]
+
+
+def _key(workload: Workload, index: int) -> bytes:
+    return b"%0*d" % (workload.key_size, index)
+
+
+def _percentiles(latencies_ns: list[int], seconds: float) -> dict[str, float]:
+    if not latencies_ns:
+        return {"count": 0, "ops_per_sec": 0.0, "p50_us": 0.0, "p99_us": 0.0}
+    ordered = sorted(latencies_ns)
+    last = len(ordered) - 1
+    return {
+        "count": len(ordered),
+        "ops_per_sec": len(ordered) / seconds,
+        "p50_us": ordered[last // 2] / 1000,
+        "p99_us": ordered[last * 99 // 100] / 1000,
+    }
+
+
+def run_workload(workload: Workload, directory: str) -> dict:
+    """Run one case against a fresh store under directory; its result entry."""
+    if workload.backend not in BACKENDS:
+        raise ValueError(f"unknown backend {workload.backend!r}")
+    if workload.distribution not in DISTRIBUTIONS:
+        raise ValueError(f"unknown distribution {workload.distribution!r}")
+    path = os.path.join(directory, "suite.db")
+    if workload.backend == "mmap":
+        if os.path.exists(path):
+            os.remove(path)
+        backend = MMapPageBackend(path, workload.page_size)
+    else:
+        backend = InMemoryPageBackend(workload.page_size)
+    # Values too big for a small page go to overflow chains.
+    store = Store(
+        backend,
+        overflow_threshold=workload.page_size // 4,
+        flush_interval=workload.flush_interval,
+    )
+    rng = random.Random(workload.seed)
+    value = rng.randbytes(workload.value_size)
+    for start in range(0, workload.preload, 1000):
+        with store.write_batch() as batch:
+            for i in range(start, min(start + 1000, workload.preload)):
+                batch.put(_key(workload, i), value)
+    before = store.write_amplification()
+
+    choose = _KeyChooser(workload, rng)
+    kinds = [
+        "get" if rng.random() < workload.get_fraction else "put"
+        for _ in range(workload.ops)
+    ]
+    appended = itertools.count(workload.preload)
+    latencies: dict[str, list[int]] = {"put": [], "get": [], "reader get": []}
+    stop = threading.Event()
+
+    def reader(n: int, out: list[int]) -> None:
+        local = _KeyChooser(workload, random.Random(workload.seed * 1000 + n))
+        clock = time.perf_counter_ns
+        while not stop.is_set():
+            key = _key(workload, local())
+            start = clock()
+            store.get(key)
+            out.append(clock() - start)
+
+    reader_latencies: list[list[int]] = [[] for _ in range(workload.readers)]
+    threads = [
+        threading.Thread(target=reader, args=(n, out))
+        for n, out in enumerate(reader_latencies)
+    ]
+    clock = time.perf_counter_ns
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for kind in kinds:
+        if kind == "get":
+            key = _key(workload, choose())
+            start = clock()
+            store.get(key)
+        else:
+            if workload.distribution == "sequential":
+                key = _key(workload, next(appended))
+            else:
+                key = _key(workload, choose())
+            start = clock()
+            store.put(key, value)
+        latencies[kind].append(clock() - start)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    latencies["reader get"] = [ns for out in reader_latencies for ns in out]
+
+    after = store.write_amplification()
+    user = after["user_bytes"] - before["user_bytes"]
+    written = (after["page_bytes"] - before["page_bytes"]) + (
+        after["wal_bytes"] - before["wal_bytes"]
+    )
+    page_count = backend.page_count
+    store.close()
+    if workload.backend == "mmap":
+        file_size = os.path.getsize(path)
+    else:
+        file_size = page_count * workload.page_size
+    total = sum(len(v) for v in latencies.values())
+    return {
+        "name": workload.name,
+        "workload": asdict(workload),
+        "seconds": elapsed,
+        "ops_per_sec": total / elapsed,
+        "operations": {
+            kind: _percentiles(values, elapsed)
+            for kind, values in latencies.items()
+            if values
+        },
+        "file_size": file_size,
+        "page_count": page_count,
+        "write_amplification": written / user if user else 0.0,
+    }
+
+
+def run_suite(workloads: list[Workload]) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [run_workload(w, tmp) for w in workloads]
+    return {
+        "schema": SCHEMA,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> tuple[list[str], bool]:
+    """Report lines for cases in both runs, and whether none regressed."""
+    before = {r["name"]: r for r in baseline["results"]}
+    lines = [f"{'case':<52}{'ops/sec':>12}{'ratio':>8}{'write amp':>11}"]
+    ok = True
+    for result in current["results"]:
+        old = before.get(result["name"])
+        if old is None:
+            continue
+        ratio = result["ops_per_sec"] / old["ops_per_sec"]
+        flag = ""
+        if ratio < 1 - tolerance:
+            ok = False
+            flag = "  slower"
+        lines.append(
+            f"{result['name']:<52}{result['ops_per_sec']:>12.0f}{ratio:>8.2f}"
+            f"{result['write_amplification']:>11.1f}{flag}"
+        )
+    return lines, ok
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="small sizes, for CI")
+    parser.add_argument(
+        "--filter", default="", help="only cases whose name contains this"
+    )
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"))
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        runs = []
+        for name in args.compare:
+            with open(name) as f:
+                runs.append(json.load(f))
+        lines, ok = compare(*runs, args.tolerance)
+        print("\n".join(lines))
+        return 0 if ok else 1
+
+    workloads = [w for w in default_workloads(args.quick) if args.filter in w.name]
+    report = run_suite(workloads)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,28 @@
 from __future__ import annotations
 
-from typing import Protocol
+import bisect
+import time
+from typing import TYPE_CHECKING, Iterable, Iterator, Protocol
 
 from .node import (
+    CLASSIC,
+    INTERNAL_BASE_SIZE,
+    NODE_HEADER_SIZE,
     InternalNode,
     LeafNode,
     NodeTooLargeError,
+    OverflowRef,
     fits_in_page,
     internal_entry_size,
     leaf_entry_size,
+    node_size,
+    packed_size,
+    shortest_separator,
 )
 
+if TYPE_CHECKING:
+    from .stats import StoreStats
+
 _PROBE_PAGE_ID = 0
 
 
@@ -34,54 +46,169 @@ class PageAllocator(Protocol):
 
     def read_node(self, page_id: int): ...
 
+    def read_node_view(self, page_id: int): ...
+
     def retire(self, page_id: int) -> None: ...
 
+    def retire_overflow(self, ref: OverflowRef) -> None: ...
+
+    def relocate_overflow(
+        self, ref: OverflowRef, cutoff: int, budget: int
+    ) -> tuple[OverflowRef, int] | None: ...
+
+    def prefetch(self, page_ids: list[int]) -> None: ...
+
 
 class BTree:
-    """Stateless COW B+-tree operations parameterized by a root id."""
+    """Stateless COW B+-tree operations parameterized by a root id.
+
+    node_format is the layout the allocator writes nodes in; fit checks
+    and splits size nodes for it. With stats, splits are counted and
+    timed there.
+    """
 
-    def __init__(self, allocator: PageAllocator):
+    def __init__(
+        self,
+        allocator: PageAllocator,
+        node_format: str = CLASSIC,
+        stats: StoreStats | None = None,
+    ):
         self._alloc = allocator
+        self._node_format = node_format
+        self._stats = stats
 
     # reads
 
     def get(self, root_id: int, key: bytes) -> bytes | None:
-        node = self._alloc.read_node(root_id)
+        node = self._alloc.read_node_view(root_id)
         while isinstance(node, InternalNode):
             idx = node.child_for(key)
-            node = self._alloc.read_node(node.children[idx])
-        assert isinstance(node, LeafNode)
+            node = self._alloc.read_node_view(node.children[idx])
         return node.get(key)
 
+    def multi_get(self, root_id: int, keys: list[bytes]) -> list[bytes | None]:
+        """Values of sorted, distinct keys, one descent for the whole batch.
+
+        Keys are partitioned among children by bisecting the sorted batch
+        at every internal node, so each page on the union of their paths
+        is read once, however many keys route through it.
+        """
+        values: list[bytes | None] = [None] * len(keys)
+        stack = [(root_id, 0, len(keys))] if keys else []
+        while stack:
+            page_id, lo, hi = stack.pop()
+            node = self._alloc.read_node_view(page_id)
+            if not isinstance(node, InternalNode):
+                values[lo:hi] = node.get_many(keys[lo:hi])
+                continue
+            branches = []
+            while lo < hi:
+                idx = node.child_for(keys[lo])
+                if idx < len(node.keys):
+                    split = bisect.bisect_left(keys, node.keys[idx], lo, hi)
+                else:
+                    split = hi
+                branches.append((node.children[idx], lo, split))
+                lo = split
+            if len(branches) > 1:
+                self._alloc.prefetch([page_id for page_id, _, _ in branches[1:]])
+            stack.extend(reversed(branches))
+        return values
+
+    def scan(
+        self,
+        root_id: int,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        reverse: bool = False,
+    ) -> Iterator[tuple[bytes, bytes]]:
+        """Yield (key, value) for start <= key < end, in key order.
+
+        Descent is iterative: the stack holds one (internal node, child
+        index) frame per level, so memory stays O(height) however many
+        leaves are visited. The unvisited siblings of every frame are
+        handed to the allocator as a prefetch hint.
+        """
+        stack: list[tuple[InternalNode, int]] = []
+        node = self._alloc.read_node(root_id)
+        bounded = True  # still on the boundary path picked by start/end
+        while True:
+            while isinstance(node, InternalNode):
+                if not bounded:
+                    idx = len(node.children) - 1 if reverse else 0
+                elif reverse:
+                    idx = (
+                        len(node.children) - 1
+                        if end is None
+                        else bisect.bisect_left(node.keys, end)
+                    )
+                else:
+                    idx = 0 if start is None else node.child_for(start)
+                stack.append((node, idx))
+                siblings = node.children[:idx] if reverse else node.children[idx + 1 :]
+                if siblings:
+                    self._alloc.prefetch(siblings[::-1] if reverse else siblings)
+                node = self._alloc.read_node(node.children[idx])
+
+            assert isinstance(node, LeafNode)
+            keys = node.keys
+            if reverse:
+                i = len(keys) - 1
+                if bounded and end is not None:
+                    i = bisect.bisect_left(keys, end) - 1
+                while i >= 0:
+                    if start is not None and keys[i] < start:
+                        return
+                    yield keys[i], node.values[i]
+                    i -= 1
+            else:
+                i = 0
+                if bounded and start is not None:
+                    i = bisect.bisect_left(keys, start)
+                while i < len(keys):
+                    if end is not None and keys[i] >= end:
+                        return
+                    yield keys[i], node.values[i]
+                    i += 1
+
+            bounded = False
+            while stack:
+                parent, idx = stack.pop()
+                idx += -1 if reverse else 1
+                if 0 <= idx < len(parent.children):
+                    stack.append((parent, idx))
+                    node = self._alloc.read_node(parent.children[idx])
+                    break
+            else:
+                return
+
     # writes
 
     def put(self, root_id: int, key: bytes, value: bytes) -> int:
-        path = self._find_path(root_id, key)  # list of (page_id, node)
-        leaf_id, leaf = path[-1]
-
-        new_leaf = LeafNode(keys=list(leaf.keys), values=list(leaf.values))
-        new_leaf.put(key, value)
-
-        leaf_pieces = self._split_leaf_to_fit(new_leaf)
-
-        leaf_seps = [piece.keys[0] for piece in leaf_pieces[1:]]
-        child_update = self._write_pieces(leaf_pieces, leaf_seps)
-        self._alloc.retire(leaf_id)
-
-        for i in range(len(path) - 2, -1, -1):
-            parent_id, parent = path[i]
-            child_idx = parent.child_for(key)
-            new_children = list(parent.children)
-            new_keys = list(parent.keys)
-            new_children[child_idx] = child_update[0][0]
-            for offset, (piece_id, sep_key) in enumerate(child_update[1:]):
-                new_children.insert(child_idx + 1 + offset, piece_id)
-                new_keys.insert(child_idx + offset, sep_key)
+        return self.apply(root_id, [(key, value)])
 
-            candidate = InternalNode(keys=new_keys, children=new_children)
-            pieces, seps = self._split_internal_to_fit(candidate)
-            child_update = self._write_pieces(pieces, seps)
-            self._alloc.retire(parent_id)
+    def delete(self, root_id: int, key: bytes) -> int:
+        return self.apply(root_id, [(key, None)])
+
+    def apply(self, root_id: int, ops: list[tuple[bytes, bytes | None]]) -> int:
+        """Apply sorted, de-duplicated (key, value) ops and return the new root.
+
+        A value of None deletes the key. Every node on the union of the
+        touched paths is copied once, however many ops route through it.
+        If nothing changes, root_id itself is returned.
+        """
+        pieces = self._apply_node(root_id, ops)
+        if pieces is None:
+            return root_id
+        if not pieces:
+            # Everything under the root was deleted.
+            pieces = [(LeafNode(), None)]
+        root, _ = pieces[0]
+        if len(pieces) == 1 and isinstance(root, InternalNode) and not root.keys:
+            return self._collapse_root(root.children[0])
+        child_update = self._write_pieces(
+            [piece for piece, _ in pieces], [sep_key for _, sep_key in pieces[1:]]
+        )
 
         # Grow the tree height until a single node covers everything
         while len(child_update) > 1:
@@ -100,8 +227,211 @@ class BTree:
         new_root_id, _ = child_update[0]
         return new_root_id
 
+    def build(
+        self, items: Iterable[tuple[bytes, bytes]], fill_factor: float = 1.0
+    ) -> int:
+        """Write a new tree bottom-up from strictly increasing (key, value) pairs.
+
+        Every level is packed left to right in one pass: a node is closed
+        once the next entry would take it past fill_factor * page_size,
+        and closing a node hands (first key, page id) to the level above.
+        Only the open node of each level is held in memory. Raises
+        ValueError if keys are not strictly increasing.
+        """
+        if not 0 < fill_factor <= 1:
+            raise ValueError("fill_factor must be in (0, 1]")
+        page_size = self._alloc.page_size
+        budget = int(page_size * fill_factor)
+        levels: list[_LevelBuilder] = []
+
+        def add_child(level: int, first_key: bytes, page_id: int) -> None:
+            if level == len(levels):
+                levels.append(_LevelBuilder())
+            builder = levels[level]
+            if builder.children:
+                first = builder.keys[0] if builder.keys else first_key
+                size = self._packed_size(
+                    builder.size + internal_entry_size(first_key),
+                    len(builder.keys) + 1,
+                    first,
+                    first_key,
+                )
+                if size > budget and len(builder.children) > 1:
+                    close_internal(level)
+                elif size > page_size:
+                    raise NodeTooLargeError(
+                        "cannot build an internal node over these separator "
+                        f"keys: they do not fit in page_size={page_size}"
+                    )
+            builder.add(first_key, page_id)
+
+        def close_internal(level: int) -> None:
+            builder = levels[level]
+            node = InternalNode(builder.keys, builder.children, builder.size)
+            [(page_id, _)] = self._write_pieces([node], [])
+            add_child(level + 1, builder.first_key, page_id)
+            builder.emitted += 1
+            builder.reset()
+
+        leaf = LeafNode()
+        leaf_sep = b""  # separator in front of the open leaf
+        previous: bytes | None = None
+        for key, value in items:
+            if previous is not None and key <= previous:
+                raise ValueError(
+                    f"bulk load input is not strictly increasing: {key!r} "
+                    f"follows {previous!r}"
+                )
+            entry = leaf_entry_size(key, value)
+            if leaf.keys and self._packed_size(
+                leaf.encoded_size + entry, len(leaf.keys) + 1, leaf.keys[0], key
+            ) > budget:
+                [(page_id, _)] = self._write_pieces([leaf], [])
+                add_child(0, leaf_sep, page_id)
+                leaf = LeafNode()
+                leaf_sep = shortest_separator(previous, key)
+            first = leaf.keys[0] if leaf.keys else key
+            if self._packed_size(
+                leaf.encoded_size + entry, len(leaf.keys) + 1, first, key
+            ) > page_size:
+                raise NodeTooLargeError(
+                    f"key/value pair of {entry} bytes does not fit in a page "
+                    f"of {page_size} bytes (R1.3)"
+                )
+            leaf.append(key, value)
+            previous = key
+
+        [(page_id, _)] = self._write_pieces([leaf], [])
+        if not levels:
+            return page_id
+        add_child(0, leaf_sep, page_id)
+
+        level = 0
+        while True:
+            builder = levels[level]
+            if level == len(levels) - 1 and not builder.emitted:
+                if len(builder.children) == 1:
+                    return builder.children[0]
+            close_internal(level)
+            level += 1
+
+    def height(self, root_id: int) -> int:
+        """Number of levels in the tree, 1 for a lone leaf."""
+        height = 1
+        node = self._alloc.read_node(root_id)
+        while isinstance(node, InternalNode):
+            height += 1
+            node = self._alloc.read_node(node.children[0])
+        return height
+
+    def relocate(self, root_id: int, cutoff: int, budget: int) -> int:
+        """Copy every page with id >= cutoff, and the paths above them.
+
+        Used by compaction: the allocator is expected to hand out low ids,
+        so the copies move toward the front of the file. At most budget
+        pages are written, counting the ancestors a moved page forces to
+        be rewritten; returns the new root, or root_id itself if nothing
+        was moved.
+        """
+        height = self.height(root_id)
+        left = [budget]
+        new_root = self._relocate(root_id, height, height, cutoff, left)
+        return root_id if new_root is None else new_root
+
+    def relocate_overflow(self, root_id: int, cutoff: int, budget: int) -> int:
+        """Move the overflow chains with pages at or past cutoff.
+
+        Each such chain is copied forward as far as its last page past the
+        cutoff, and its leaf and the path above it are rewritten to refer
+        to the copy. Reads every leaf, so compaction only calls it when
+        the tail holds overflow pages. Budgeted like relocate.
+        """
+        height = self.height(root_id)
+        left = [budget]
+        new_root = self._relocate_overflow(root_id, height, height, cutoff, left)
+        return root_id if new_root is None else new_root
+
     # helpers
 
+    def _relocate_overflow(
+        self, page_id: int, level: int, height: int, cutoff: int, left: list[int]
+    ) -> int | None:
+        """Id of page_id's copy, or None if no chain below it moved."""
+        node = self._alloc.read_node(page_id)
+        if isinstance(node, LeafNode):
+            values = None
+            for i, value in enumerate(node.values):
+                if type(value) is not OverflowRef:
+                    continue
+                # Keep back a copy of the leaf and everything above it.
+                moved = self._alloc.relocate_overflow(value, cutoff, left[0] - height)
+                if moved is None:
+                    continue
+                if values is None:
+                    values = list(node.values)
+                values[i], pages = moved
+                left[0] -= pages
+            if values is None:
+                return None
+            leaf = LeafNode(node.keys, values, node.encoded_size)
+            return self._copy_page(page_id, leaf, left)
+        children = None
+        for i, child in enumerate(node.children):
+            if left[0] <= height:
+                break
+            new_child = self._relocate_overflow(child, level - 1, height, cutoff, left)
+            if new_child is None:
+                continue
+            if children is None:
+                children = list(node.children)
+            children[i] = new_child
+        if children is None:
+            return None
+        node = InternalNode(node.keys, children, node.encoded_size)
+        return self._copy_page(page_id, node, left)
+
+    def _relocate(
+        self, page_id: int, level: int, height: int, cutoff: int, left: list[int]
+    ) -> int | None:
+        """Id of page_id's copy, or None if its subtree was left in place.
+
+        level is the height of this subtree (1 for a leaf). A page is only
+        moved while the budget also covers rewriting every page above it,
+        so a move never leaves the path to the root half copied.
+        """
+        node = self._alloc.read_node(page_id)
+        if isinstance(node, LeafNode):
+            if page_id < cutoff or left[0] < height:
+                return None
+            return self._copy_page(page_id, node, left)
+        children = None
+        for i, child in enumerate(node.children):
+            if left[0] < height - level + 2:
+                break
+            if level == 2:
+                if child < cutoff:
+                    continue
+                new_child = self._copy_page(child, self._alloc.read_node(child), left)
+            else:
+                new_child = self._relocate(child, level - 1, height, cutoff, left)
+                if new_child is None:
+                    continue
+            if children is None:
+                children = list(node.children)
+            children[i] = new_child
+        if children is not None:
+            node = InternalNode(node.keys, children, node.encoded_size)
+        elif page_id < cutoff or left[0] < height - level + 1:
+            return None
+        return self._copy_page(page_id, node, left)
+
+    def _copy_page(self, page_id: int, node, left: list[int]) -> int:
+        new_id = self._alloc.allocate()
+        self._alloc.write_node(new_id, node)
+        self._alloc.retire(page_id)
+        left[0] -= 1
+        return new_id
+
     def _write_pieces(
         self, nodes: list[LeafNode] | list[InternalNode], seps: list[bytes]
     ) -> list[tuple[int, bytes | None]]:
@@ -114,58 +444,273 @@ class BTree:
             update.append((page_id, None if i == 0 else seps[i - 1]))
         return update
 
-    def _find_path(self, root_id: int, key: bytes):
-        """Return [(page_id, node), ...] from root down to the target leaf."""
-        path = []
-        page_id = root_id
+    def _apply_node(
+        self, page_id: int, ops: list[tuple[bytes, bytes | None]]
+    ) -> list[tuple[LeafNode | InternalNode, bytes | None]] | None:
+        """Rebuild the subtree at page_id with ops applied.
+
+        Returns None when the subtree is unchanged, [] when it became
+        empty, and otherwise its replacement nodes paired with the
+        separator in front of each (None for the first). The replacements
+        are not written yet, so the parent can still merge an underfull
+        one with a sibling; their own children are already on disk.
+        """
         node = self._alloc.read_node(page_id)
-        path.append((page_id, node))
-        while isinstance(node, InternalNode):
-            idx = node.child_for(key)
-            page_id = node.children[idx]
+        if isinstance(node, LeafNode):
+            new_leaf = node.copy()
+            changed = False
+            for key, value in ops:
+                old = new_leaf.get(key)
+                if type(old) is OverflowRef:
+                    # Replaced or deleted: its chain goes with the old leaf.
+                    self._alloc.retire_overflow(old)
+                if value is None:
+                    changed = new_leaf.remove(key) or changed
+                else:
+                    new_leaf.put(key, value)
+                    changed = True
+            if not changed:
+                return None
+            self._alloc.retire(page_id)
+            if not new_leaf.keys:
+                return []
+            return self._leaf_pieces(new_leaf)
+
+        groups: list[tuple[int, list[tuple[bytes, bytes | None]]]] = []
+        for op in ops:
+            child_idx = node.child_for(op[0])
+            if groups and groups[-1][0] == child_idx:
+                groups[-1][1].append(op)
+            else:
+                groups.append((child_idx, [op]))
+
+        # Untouched children stay page ids; rebuilt ones are unwritten nodes.
+        entries: list[int | LeafNode | InternalNode] = list(node.children)
+        new_keys = list(node.keys)
+        new_size = node.encoded_size
+        changed = False
+        # Right to left, so splicing a child never shifts a pending index.
+        for child_idx, group in reversed(groups):
+            child_pieces = self._apply_node(node.children[child_idx], group)
+            if child_pieces is None:
+                continue
+            changed = True
+            if not child_pieces:
+                del entries[child_idx]
+                if new_keys:
+                    new_size -= internal_entry_size(new_keys.pop(max(child_idx - 1, 0)))
+                continue
+            entries[child_idx : child_idx + 1] = [piece for piece, _ in child_pieces]
+            for offset, (_, sep_key) in enumerate(child_pieces[1:]):
+                new_keys.insert(child_idx + offset, sep_key)
+                new_size += internal_entry_size(sep_key)
+
+        if not changed:
+            return None
+        self._alloc.retire(page_id)
+        if not entries:
+            return []
+        new_size = self._merge_underfull(entries, new_keys, new_size)
+        new_children = []
+        for entry in entries:
+            if not isinstance(entry, int):
+                child_id = self._alloc.allocate()
+                self._alloc.write_node(child_id, entry)
+                entry = child_id
+            new_children.append(entry)
+        candidate = InternalNode(new_keys, new_children, new_size)
+        pieces, seps = self._split_internal_to_fit(candidate)
+        return list(zip(pieces, [None] + seps))
+
+    def _merge_underfull(
+        self,
+        entries: list[int | LeafNode | InternalNode],
+        keys: list[bytes],
+        size: int,
+    ) -> int:
+        """Merge rebuilt children under a quarter page into a sibling.
+
+        entries and keys describe one internal node being rebuilt and are
+        updated in place; the node's new encoded size is returned. The
+        sibling is read, retired, and re-split together with the underfull
+        child, so the pair becomes one node when it fits and two balanced
+        nodes otherwise. Untouched children are never merged on their own.
+        """
+        threshold = self._alloc.page_size // 4
+        i = 0
+        while i < len(entries) and len(entries) > 1:
+            entry = entries[i]
+            if isinstance(entry, int) or node_size(entry, self._node_format) >= threshold:
+                i += 1
+                continue
+            lo = i if i + 1 < len(entries) else i - 1
+            left, right = (self._load_sibling(e) for e in entries[lo : lo + 2])
+            sep_key = keys.pop(lo)
+            size -= internal_entry_size(sep_key)
+            merged = self._merge_pair(left, sep_key, right)
+            entries[lo : lo + 2] = [piece for piece, _ in merged]
+            for offset, (_, piece_sep) in enumerate(merged[1:]):
+                keys.insert(lo + offset, piece_sep)
+                size += internal_entry_size(piece_sep)
+            # A single merged node may still be underfull: look at it again.
+            i = lo if len(merged) == 1 else lo + len(merged)
+        return size
+
+    def _load_sibling(
+        self, entry: int | LeafNode | InternalNode
+    ) -> LeafNode | InternalNode:
+        """The node behind entry, retiring its page if it is on disk."""
+        if not isinstance(entry, int):
+            return entry
+        node = self._alloc.read_node(entry)
+        self._alloc.retire(entry)
+        return node
+
+    def _merge_pair(
+        self,
+        left: LeafNode | InternalNode,
+        sep_key: bytes,
+        right: LeafNode | InternalNode,
+    ) -> list[tuple[LeafNode | InternalNode, bytes | None]]:
+        """Concatenate adjacent siblings and split the result to fit."""
+        if isinstance(left, LeafNode):
+            combined = LeafNode(
+                left.keys + right.keys,
+                left.values + right.values,
+                left.encoded_size + right.encoded_size - NODE_HEADER_SIZE,
+            )
+            return self._leaf_pieces(combined)
+        combined = InternalNode(
+            left.keys + [sep_key] + right.keys,
+            left.children + right.children,
+            left.encoded_size
+            + right.encoded_size
+            - INTERNAL_BASE_SIZE
+            + internal_entry_size(sep_key),
+        )
+        pieces, seps = self._split_internal_to_fit(combined)
+        return list(zip(pieces, [None] + seps))
+
+    def _leaf_pieces(self, leaf: LeafNode) -> list[tuple[LeafNode, bytes | None]]:
+        """Split leaf to fit, with the shortest separator between pieces."""
+        pieces = self._split_leaf_to_fit(leaf)
+        return [(pieces[0], None)] + [
+            (right, shortest_separator(left.keys[-1], right.keys[0]))
+            for left, right in zip(pieces, pieces[1:])
+        ]
+
+    def _collapse_root(self, page_id: int) -> int:
+        """Descend past internal nodes that have a single child."""
+        node = self._alloc.read_node(page_id)
+        while isinstance(node, InternalNode) and not node.keys:
+            self._alloc.retire(page_id)
+            page_id = node.children[0]
             node = self._alloc.read_node(page_id)
-            path.append((page_id, node))
-        return path
+        return page_id
+
+    def _packed_size(self, size: int, count: int, first: bytes, last: bytes) -> int:
+        return packed_size(size, count, first, last, self._node_format)
+
+    def _range_size(self, size: int, keys: list[bytes], lo: int, hi: int) -> int:
+        """Page bytes of a node holding keys[lo:hi], encoded_size size."""
+        if hi == lo:
+            return self._packed_size(size, 0, b"", b"")
+        return self._packed_size(size, hi - lo, keys[lo], keys[hi - 1])
 
     def _split_leaf_to_fit(self, leaf: LeafNode) -> list[LeafNode]:
         """Split leaf until every piece serializes within a page"""
-        page_size = self._alloc.page_size
-        if fits_in_page(leaf, _PROBE_PAGE_ID, page_size):
+        if fits_in_page(leaf, _PROBE_PAGE_ID, self._alloc.page_size, self._node_format):
             return [leaf]
-        if len(leaf.keys) <= 1:
+        start = time.perf_counter()
+        sizes = [leaf_entry_size(k, v) for k, v in zip(leaf.keys, leaf.values)]
+        pieces = self._split_leaf_range(leaf, sizes, 0, len(sizes), leaf.encoded_size)
+        self._split_done(start, len(pieces))
+        return pieces
+
+    def _split_leaf_range(
+        self, leaf: LeafNode, sizes: list[int], lo: int, hi: int, size: int
+    ) -> list[LeafNode]:
+        """Pieces for entries [lo, hi) of leaf, whose encoded size is size."""
+        page_size = self._alloc.page_size
+        if self._range_size(size, leaf.keys, lo, hi) <= page_size:
+            return [LeafNode(leaf.keys[lo:hi], leaf.values[lo:hi], size)]
+        if hi - lo <= 1:
             detail = (
-                f"key/value pair of {leaf_entry_size(leaf.keys[0], leaf.values[0])} bytes"
-                if leaf.keys
-                else "empty leaf"
+                f"key/value pair of {sizes[lo]} bytes" if hi > lo else "empty leaf"
             )
             raise NodeTooLargeError(
                 f"{detail} does not fit in a page of {page_size} bytes (R1.3)"
             )
-        sizes = [leaf_entry_size(k, v) for k, v in zip(leaf.keys, leaf.values)]
-        mid = _half_point(sizes)
-        left = LeafNode(keys=leaf.keys[:mid], values=leaf.values[:mid])
-        right = LeafNode(keys=leaf.keys[mid:], values=leaf.values[mid:])
-        return self._split_leaf_to_fit(left) + self._split_leaf_to_fit(right)
+        mid = lo + _half_point(sizes[lo:hi])
+        left_size = NODE_HEADER_SIZE + sum(sizes[lo:mid])
+        right_size = size - left_size + NODE_HEADER_SIZE
+        return self._split_leaf_range(
+            leaf, sizes, lo, mid, left_size
+        ) + self._split_leaf_range(leaf, sizes, mid, hi, right_size)
 
     def _split_internal_to_fit(
         self, node: InternalNode
     ) -> tuple[list[InternalNode], list[bytes]]:
         """Split node until every piece fits, promoting separators."""
-        page_size = self._alloc.page_size
-        if fits_in_page(node, _PROBE_PAGE_ID, page_size):
+        if fits_in_page(node, _PROBE_PAGE_ID, self._alloc.page_size, self._node_format):
             return [node], []
-        if not node.keys:
+        start = time.perf_counter()
+        sizes = [internal_entry_size(k) for k in node.keys]
+        pieces, seps = self._split_internal_range(
+            node, sizes, 0, len(sizes), node.encoded_size
+        )
+        self._split_done(start, len(pieces))
+        return pieces, seps
+
+    def _split_done(self, start: float, pieces: int) -> None:
+        if self._stats is not None:
+            self._stats.add_time("split", time.perf_counter() - start)
+            self._stats.count("splits", pieces - 1)
+
+    def _split_internal_range(
+        self, node: InternalNode, sizes: list[int], lo: int, hi: int, size: int
+    ) -> tuple[list[InternalNode], list[bytes]]:
+        """Pieces for keys [lo, hi) and children [lo, hi] of node."""
+        page_size = self._alloc.page_size
+        if self._range_size(size, node.keys, lo, hi) <= page_size:
+            piece = InternalNode(node.keys[lo:hi], node.children[lo : hi + 1], size)
+            return [piece], []
+        if hi == lo:
             raise NodeTooLargeError(
                 f"internal node with one child does not fit in page_size={page_size}"
             )
-        sizes = [internal_entry_size(k) for k in node.keys]
-        mid = _half_point(sizes)
-        sep_key = node.keys[mid]
-        left = InternalNode(keys=node.keys[:mid], children=node.children[: mid + 1])
-        right = InternalNode(keys=node.keys[mid + 1 :], children=node.children[mid + 1 :])
-        left_pieces, left_seps = self._split_internal_to_fit(left)
-        right_pieces, right_seps = self._split_internal_to_fit(right)
+        mid = lo + _half_point(sizes[lo:hi])
+        left_size = INTERNAL_BASE_SIZE + sum(sizes[lo:mid])
+        right_size = size - left_size - sizes[mid] + INTERNAL_BASE_SIZE
+        left_pieces, left_seps = self._split_internal_range(
+            node, sizes, lo, mid, left_size
+        )
+        right_pieces, right_seps = self._split_internal_range(
+            node, sizes, mid + 1, hi, right_size
+        )
         return (
             left_pieces + right_pieces,
-            left_seps + [sep_key] + right_seps,
+            left_seps + [node.keys[mid]] + right_seps,
         )
+
+
+class _LevelBuilder:
+    """The open (not yet written) internal node of one level in BTree.build."""
+
+    def __init__(self):
+        self.emitted = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self.first_key = b""
+        self.keys: list[bytes] = []
+        self.children: list[int] = []
+        self.size = INTERNAL_BASE_SIZE
+
+    def add(self, first_key: bytes, page_id: int) -> None:
+        if self.children:
+            self.keys.append(first_key)
+            self.size += internal_entry_size(first_key)
+        else:
+            self.first_key = first_key
+        self.children.append(page_id)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import heapq
+import struct
+import tempfile
+from operator import itemgetter
+from typing import IO, Iterable, Iterator
+
+_PAIR_HEADER = struct.Struct("<II")  # key length, value length
+
+
+def sort_items(
+    items: Iterable[tuple[bytes, bytes]],
+    buffer_bytes: int = 64 * 1024 * 1024,
+    tmp_dir: str | None = None,
+) -> Iterator[tuple[bytes, bytes]]:
+    """Yield (key, value) pairs ordered by key, spilling to disk as needed.
+
+    Pairs are buffered until their payload reaches buffer_bytes, sorted,
+    and written out as a run to an anonymous temporary file; the runs are
+    then streamed through a k-way merge. Input that fits in one buffer is
+    sorted in memory without touching disk. Pairs with equal keys keep
+    their input order.
+    """
+    if buffer_bytes <= 0:
+        raise ValueError("buffer_bytes must be positive")
+    runs: list[IO[bytes]] = []
+    try:
+        buffer: list[tuple[bytes, bytes]] = []
+        buffered = 0
+        for key, value in items:
+            buffer.append((key, value))
+            buffered += len(key) + len(value)
+            if buffered >= buffer_bytes:
+                runs.append(_spill(buffer, tmp_dir))
+                buffer = []
+                buffered = 0
+        buffer.sort(key=itemgetter(0))
+        if not runs:
+            yield from buffer
+            return
+        if buffer:
+            runs.append(_spill(buffer, tmp_dir))
+        yield from heapq.merge(*(_read_run(run) for run in runs), key=itemgetter(0))
+    finally:
+        for run in runs:
+            run.close()
+
+
+def _spill(buffer: list[tuple[bytes, bytes]], tmp_dir: str | None) -> IO[bytes]:
+    """Sort buffer and write it to a rewound temporary file."""
+    buffer.sort(key=itemgetter(0))
+    run = tempfile.TemporaryFile(dir=tmp_dir)
+    for key, value in buffer:
+        run.write(_PAIR_HEADER.pack(len(key), len(value)))
+        run.write(key)
+        run.write(value)
+    run.seek(0)
+    return run
+
+
+def _read_run(run: IO[bytes]) -> Iterator[tuple[bytes, bytes]]:
+    while True:
+        header = run.read(_PAIR_HEADER.size)
+        if not header:
+            return
+        key_len, value_len = _PAIR_HEADER.unpack(header)
+        yield run.read(key_len), run.read(value_len)
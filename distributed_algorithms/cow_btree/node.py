@@ -6,8 +6,25 @@ from dataclasses import dataclass, field
 
 LEAF = 1
 INTERNAL = 2
+# Slotted layouts of the same nodes (see DESIGN.md). 3 is FREE_LIST.
+LEAF_SLOTTED = 4
+INTERNAL_SLOTTED = 5
+# Slotted layouts with the keys' common prefix stored once.
+LEAF_PREFIX = 6
+INTERNAL_PREFIX = 7
+
+CLASSIC = "classic"
+SLOTTED = "slotted"
+PREFIX = "prefix"
+NODE_FORMATS = (CLASSIC, SLOTTED, PREFIX)
 
 _U32 = struct.Struct("<I")
+_NODE_HEADER = struct.Struct("<BII")  # marker, page id, entry/key count
+_OVERFLOW_REF = struct.Struct("<IQ")  # first overflow page id, value length
+# Set on a leaf value's length (classic) or end offset (slotted, prefix)
+# when the value is an OverflowRef.
+_OVERFLOW_FLAG = 0x80000000
+_OFFSET_MASK = _OVERFLOW_FLAG - 1
 
 NODE_HEADER_SIZE = 1 + 4 + 4
 INTERNAL_BASE_SIZE = NODE_HEADER_SIZE + 4
@@ -23,30 +40,123 @@ def internal_entry_size(key: bytes) -> int:
     return 4 + len(key) + 4
 
 
-def _pack_bytes(buf: bytearray, data: bytes) -> None:
-    buf += _U32.pack(len(data))
-    buf += data
+def common_prefix_length(a: bytes, b: bytes) -> int:
+    # Bisect on slice equality: a few C-level compares, not a byte loop.
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def shortest_separator(left: bytes, right: bytes) -> bytes:
+    """Shortest key s with left < s <= right, for left < right.
+
+    It is the prefix of right one byte past where the two keys differ,
+    so it still routes every key up to left into the left node.
+    """
+    return right[: common_prefix_length(left, right) + 1]
+
+
+def packed_size(
+    size: int, count: int, first: bytes, last: bytes, node_format: str
+) -> int:
+    """Serialized size in node_format of a node whose encoded_size is size.
+
+    count is the number of keys and first/last the smallest and largest.
+    Classic and slotted pages take exactly encoded_size bytes; a prefix
+    page adds a length field and stores the keys' common prefix once
+    instead of count times. Since keys are sorted, that prefix is the
+    one first and last share.
+    """
+    if node_format != PREFIX:
+        return size
+    if not count:
+        return size + 4
+    shared = common_prefix_length(first, last)
+    return size + 4 + shared - count * shared
+
+
+def node_size(node, node_format: str = CLASSIC) -> int:
+    """Serialized size of a LeafNode or InternalNode in node_format."""
+    keys = node.keys
+    if not keys:
+        return packed_size(node.encoded_size, 0, b"", b"", node_format)
+    return packed_size(node.encoded_size, len(keys), keys[0], keys[-1], node_format)
+
+
+def _pack_bytes_into(buf: bytearray, offset: int, data: bytes) -> int:
+    _U32.pack_into(buf, offset, len(data))
+    offset += 4
+    buf[offset : offset + len(data)] = data
+    return offset + len(data)
 
 
 def _unpack_bytes(data: bytes, offset: int) -> tuple[bytes, int]:
     (length,) = _U32.unpack_from(data, offset)
     offset += 4
-    value = data[offset : offset + length]
+    value = bytes(data[offset : offset + length])
     offset += length
     return value, offset
 
 
+class OverflowRef(bytes):
+    """Leaf value standing in for a value stored in overflow pages.
+
+    Its bytes are what the leaf holds instead of the value (first page of
+    the chain and total length), so sizing and splitting treat it like
+    any 12-byte value; on the page it is told apart by _OVERFLOW_FLAG.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def to(cls, page_id: int, length: int) -> "OverflowRef":
+        return cls(_OVERFLOW_REF.pack(page_id, length))
+
+    @property
+    def page_id(self) -> int:
+        return _OVERFLOW_REF.unpack(self)[0]
+
+    @property
+    def length(self) -> int:
+        return _OVERFLOW_REF.unpack(self)[1]
+
+
+def _unflag(slots: tuple[int, ...]) -> tuple[tuple[int, ...], frozenset[int]]:
+    """Strip _OVERFLOW_FLAG from a slotted leaf's offsets.
+
+    Returns the plain offsets and the indices of entries whose value is
+    an OverflowRef.
+    """
+    if not slots or max(slots) < _OVERFLOW_FLAG:
+        return slots, frozenset()
+    refs = frozenset(i // 2 for i in range(1, len(slots), 2) if slots[i] & _OVERFLOW_FLAG)
+    return tuple(offset & _OFFSET_MASK for offset in slots), refs
+
+
 class NodeTooLargeError(Exception):
     """Raised when a node cannot be serialized within a single page."""
 
 
-def _check_node_header(data: bytes, expected_type: int, page_id: int | None) -> None:
-    """Validate a node page's type marker and embedded page id (R3.3)."""
-    node_type = data[0]
-    if node_type != expected_type:
+def check_node_format(node_format: str) -> None:
+    if node_format not in NODE_FORMATS:
         raise ValueError(
-            f"expected node type marker {expected_type}, found {node_type}"
+            f"unknown node format {node_format!r}, expected one of {NODE_FORMATS}"
         )
+
+
+def _check_node_header(
+    data: bytes, expected_types: tuple[int, ...], page_id: int | None
+) -> None:
+    """Validate a node page's type marker and embedded page id (R3.3)."""
+    node_type = data[0]
+    if node_type not in expected_types:
+        expected = " or ".join(str(t) for t in expected_types)
+        raise ValueError(f"expected node type marker {expected}, found {node_type}")
     if page_id is not None:
         (stored_page_id,) = _U32.unpack_from(data, 1)
         if stored_page_id != page_id:
@@ -58,10 +168,26 @@ def _check_node_header(data: bytes, expected_type: int, page_id: int | None) ->
 
 @dataclass
 class LeafNode:
-    """In-memory representation of a leaf node."""
+    """In-memory representation of a leaf node.
+
+    encoded_size is the node's serialized size in bytes. It is computed
+    once on construction (unless the caller already knows it) and kept up
+    to date by put/remove/append, so fit checks never serialize. Code
+    that edits keys/values directly must construct a new node instead.
+    """
 
     keys: list[bytes] = field(default_factory=list)
     values: list[bytes] = field(default_factory=list)
+    encoded_size: int = field(default=-1, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.encoded_size < 0:
+            self.encoded_size = NODE_HEADER_SIZE + sum(
+                leaf_entry_size(k, v) for k, v in zip(self.keys, self.values)
+            )
+
+    def copy(self) -> "LeafNode":
+        return LeafNode(list(self.keys), list(self.values), self.encoded_size)
 
     def find(self, key: bytes) -> int:
         """Return the index of key via binary search, or its insertion point."""
@@ -73,50 +199,164 @@ class LeafNode:
             return self.values[i]
         return None
 
+    def get_many(self, keys: list[bytes]) -> list[bytes | None]:
+        """get for each of keys, which must be sorted and distinct."""
+        return [self.get(key) for key in keys]
+
     def put(self, key: bytes, value: bytes) -> None:
         i = self.find(key)
         if i < len(self.keys) and self.keys[i] == key:
+            self.encoded_size += len(value) - len(self.values[i])
             self.values[i] = value
         else:
             self.keys.insert(i, key)
             self.values.insert(i, value)
+            self.encoded_size += leaf_entry_size(key, value)
 
-    def serialize(self, page_id: int, page_size: int) -> bytes:
-        buf = bytearray()
-        buf.append(LEAF)
-        buf += _U32.pack(page_id)
-        buf += _U32.pack(len(self.keys))
-        for k, v in zip(self.keys, self.values):
-            _pack_bytes(buf, k)
-            _pack_bytes(buf, v)
-        if len(buf) > page_size:
+    def append(self, key: bytes, value: bytes) -> None:
+        """Add an entry the caller knows sorts after every existing key."""
+        self.keys.append(key)
+        self.values.append(value)
+        self.encoded_size += leaf_entry_size(key, value)
+
+    def remove(self, key: bytes) -> bool:
+        """Drop key if present; return whether anything was removed."""
+        i = self.find(key)
+        if i < len(self.keys) and self.keys[i] == key:
+            self.encoded_size -= leaf_entry_size(key, self.values[i])
+            del self.keys[i]
+            del self.values[i]
+            return True
+        return False
+
+    def serialize(
+        self, page_id: int, page_size: int, node_format: str = CLASSIC
+    ) -> bytes:
+        buf = bytearray(page_size)
+        self.serialize_into(buf, page_id, node_format)
+        return bytes(buf)
+
+    def serialize_into(
+        self, buf: bytearray, page_id: int, node_format: str = CLASSIC
+    ) -> None:
+        """Write the node into buf, a zero-filled page-sized buffer."""
+        size = node_size(self, node_format)
+        if size > len(buf):
             raise NodeTooLargeError(
-                f"serialized leaf is {len(buf)} bytes, exceeds page_size={page_size}"
+                f"serialized leaf is {size} bytes, exceeds page_size={len(buf)}"
             )
-        buf += bytes(page_size - len(buf))
-        return bytes(buf)
+        count = len(self.keys)
+        if node_format == PREFIX:
+            shared = common_prefix_length(self.keys[0], self.keys[-1]) if count else 0
+            base = NODE_HEADER_SIZE + 4 + shared
+            slots = []
+            end = base + 8 * count
+            for k, v in zip(self.keys, self.values):
+                end += len(k) - shared
+                slots.append(end)
+                end += len(v)
+                slots.append(end | _OVERFLOW_FLAG if type(v) is OverflowRef else end)
+            _NODE_HEADER.pack_into(buf, 0, LEAF_PREFIX, page_id, count)
+            _U32.pack_into(buf, NODE_HEADER_SIZE, shared)
+            if count:
+                buf[NODE_HEADER_SIZE + 4 : base] = self.keys[0][:shared]
+            struct.pack_into(f"<{2 * count}I", buf, base, *slots)
+            buf[base + 8 * count : end] = b"".join(
+                part for k, v in zip(self.keys, self.values) for part in (k[shared:], v)
+            )
+            return
+        if node_format == SLOTTED:
+            slots: list[int] = []
+            end = NODE_HEADER_SIZE + 8 * count
+            for k, v in zip(self.keys, self.values):
+                end += len(k)
+                slots.append(end)
+                end += len(v)
+                slots.append(end | _OVERFLOW_FLAG if type(v) is OverflowRef else end)
+            _NODE_HEADER.pack_into(buf, 0, LEAF_SLOTTED, page_id, count)
+            struct.pack_into(f"<{2 * count}I", buf, NODE_HEADER_SIZE, *slots)
+            buf[NODE_HEADER_SIZE + 8 * count : end] = b"".join(
+                part for pair in zip(self.keys, self.values) for part in pair
+            )
+            return
+        _NODE_HEADER.pack_into(buf, 0, LEAF, page_id, count)
+        offset = NODE_HEADER_SIZE
+        for k, v in zip(self.keys, self.values):
+            offset = _pack_bytes_into(buf, offset, k)
+            if type(v) is OverflowRef:
+                _U32.pack_into(buf, offset, len(v) | _OVERFLOW_FLAG)
+                buf[offset + 4 : offset + 4 + len(v)] = v
+                offset += 4 + len(v)
+            else:
+                offset = _pack_bytes_into(buf, offset, v)
 
     @classmethod
     def deserialize(cls, data: bytes, page_id: int | None = None) -> "LeafNode":
-        _check_node_header(data, LEAF, page_id)
+        _check_node_header(data, (LEAF, LEAF_SLOTTED, LEAF_PREFIX), page_id)
         (count,) = _U32.unpack_from(data, 5)
+        if data[0] == LEAF_PREFIX:
+            (shared,) = _U32.unpack_from(data, NODE_HEADER_SIZE)
+            base = NODE_HEADER_SIZE + 4 + shared
+            prefix = bytes(data[NODE_HEADER_SIZE + 4 : base])
+            ends, refs = _unflag(struct.unpack_from(f"<{2 * count}I", data, base))
+            starts = (base + 8 * count,) + ends[:-1]
+            return cls(
+                keys=[prefix + data[starts[i] : ends[i]] for i in range(0, 2 * count, 2)],
+                values=_slotted_values(data, starts, ends, refs),
+                encoded_size=(ends[-1] if count else base) - 4 - shared + count * shared,
+            )
+        if data[0] == LEAF_SLOTTED:
+            ends, refs = _unflag(
+                struct.unpack_from(f"<{2 * count}I", data, NODE_HEADER_SIZE)
+            )
+            starts = (NODE_HEADER_SIZE + 8 * count,) + ends[:-1]
+            return cls(
+                keys=[bytes(data[starts[i] : ends[i]]) for i in range(0, 2 * count, 2)],
+                values=_slotted_values(data, starts, ends, refs),
+                encoded_size=ends[-1] if count else NODE_HEADER_SIZE,
+            )
         offset = 9
         keys = []
         values = []
         for _ in range(count):
             k, offset = _unpack_bytes(data, offset)
-            v, offset = _unpack_bytes(data, offset)
+            (length,) = _U32.unpack_from(data, offset)
+            if length & _OVERFLOW_FLAG:
+                length &= _OFFSET_MASK
+                v = OverflowRef(data[offset + 4 : offset + 4 + length])
+                offset += 4 + length
+            else:
+                v, offset = _unpack_bytes(data, offset)
             keys.append(k)
             values.append(v)
-        return cls(keys=keys, values=values)
+        return cls(keys=keys, values=values, encoded_size=offset)
+
+
+def _slotted_values(
+    data, starts: tuple[int, ...], ends: tuple[int, ...], refs: frozenset[int]
+) -> list[bytes]:
+    values = [bytes(data[starts[i] : ends[i]]) for i in range(1, len(ends), 2)]
+    for i in refs:
+        values[i] = OverflowRef(values[i])
+    return values
 
 
 @dataclass
 class InternalNode:
-    """In-memory representation of an internal node."""
+    """In-memory representation of an internal node.
+
+    encoded_size follows the same rules as on LeafNode.
+    """
 
     keys: list[bytes] = field(default_factory=list)
     children: list[int] = field(default_factory=list)
+    encoded_size: int = field(default=-1, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.encoded_size < 0:
+            self.encoded_size = INTERNAL_BASE_SIZE + sum(
+                internal_entry_size(k) for k in self.keys
+            )
 
     def child_for(self, key: bytes) -> int:
         """Return the index into children to descend into for key.
@@ -124,53 +364,283 @@ class InternalNode:
         i = bisect.bisect_right(self.keys, key)
         return i
 
-    def serialize(self, page_id: int, page_size: int) -> bytes:
-        buf = bytearray()
-        buf.append(INTERNAL)
-        buf += _U32.pack(page_id)
-        buf += _U32.pack(len(self.keys))
-        for k in self.keys:
-            _pack_bytes(buf, k)
-        for child in self.children:
-            buf += _U32.pack(child)
-        if len(buf) > page_size:
+    def serialize(
+        self, page_id: int, page_size: int, node_format: str = CLASSIC
+    ) -> bytes:
+        buf = bytearray(page_size)
+        self.serialize_into(buf, page_id, node_format)
+        return bytes(buf)
+
+    def serialize_into(
+        self, buf: bytearray, page_id: int, node_format: str = CLASSIC
+    ) -> None:
+        """Write the node into buf, a zero-filled page-sized buffer."""
+        size = node_size(self, node_format)
+        if size > len(buf):
             raise NodeTooLargeError(
-                f"serialized internal node is {len(buf)} bytes, exceeds page_size={page_size}"
+                f"serialized internal node is {size} bytes, "
+                f"exceeds page_size={len(buf)}"
             )
-        buf += bytes(page_size - len(buf))
-        return bytes(buf)
+        count = len(self.keys)
+        if node_format == PREFIX:
+            shared = common_prefix_length(self.keys[0], self.keys[-1]) if count else 0
+            base = NODE_HEADER_SIZE + 4 + shared
+            data_start = base + 4 * (count + 1) + 4 * count
+            ends = []
+            end = data_start
+            for k in self.keys:
+                end += len(k) - shared
+                ends.append(end)
+            _NODE_HEADER.pack_into(buf, 0, INTERNAL_PREFIX, page_id, count)
+            _U32.pack_into(buf, NODE_HEADER_SIZE, shared)
+            if count:
+                buf[NODE_HEADER_SIZE + 4 : base] = self.keys[0][:shared]
+            struct.pack_into(f"<{2 * count + 1}I", buf, base, *self.children, *ends)
+            buf[data_start:end] = b"".join(k[shared:] for k in self.keys)
+            return
+        if node_format == SLOTTED:
+            data_start = NODE_HEADER_SIZE + 4 * (count + 1) + 4 * count
+            ends: list[int] = []
+            end = data_start
+            for k in self.keys:
+                end += len(k)
+                ends.append(end)
+            _NODE_HEADER.pack_into(buf, 0, INTERNAL_SLOTTED, page_id, count)
+            struct.pack_into(
+                f"<{2 * count + 1}I", buf, NODE_HEADER_SIZE, *self.children, *ends
+            )
+            buf[data_start:end] = b"".join(self.keys)
+            return
+        _NODE_HEADER.pack_into(buf, 0, INTERNAL, page_id, count)
+        offset = NODE_HEADER_SIZE
+        for k in self.keys:
+            offset = _pack_bytes_into(buf, offset, k)
+        struct.pack_into(f"<{count + 1}I", buf, offset, *self.children)
 
     @classmethod
     def deserialize(cls, data: bytes, page_id: int | None = None) -> "InternalNode":
-        _check_node_header(data, INTERNAL, page_id)
+        _check_node_header(data, (INTERNAL, INTERNAL_SLOTTED, INTERNAL_PREFIX), page_id)
         (key_count,) = _U32.unpack_from(data, 5)
+        if data[0] == INTERNAL_PREFIX:
+            (shared,) = _U32.unpack_from(data, NODE_HEADER_SIZE)
+            base = NODE_HEADER_SIZE + 4 + shared
+            prefix = bytes(data[NODE_HEADER_SIZE + 4 : base])
+            words = struct.unpack_from(f"<{2 * key_count + 1}I", data, base)
+            ends = words[key_count + 1 :]
+            starts = (base + 4 * len(words),) + ends[:-1]
+            end = ends[-1] if key_count else starts[0]
+            return cls(
+                keys=[prefix + data[a:b] for a, b in zip(starts, ends)],
+                children=list(words[: key_count + 1]),
+                encoded_size=end - 4 - shared + key_count * shared,
+            )
+        if data[0] == INTERNAL_SLOTTED:
+            words = struct.unpack_from(f"<{2 * key_count + 1}I", data, NODE_HEADER_SIZE)
+            ends = words[key_count + 1 :]
+            starts = (NODE_HEADER_SIZE + 4 * len(words),) + ends[:-1]
+            return cls(
+                keys=[bytes(data[a:b]) for a, b in zip(starts, ends)],
+                children=list(words[: key_count + 1]),
+                encoded_size=ends[-1] if key_count else starts[0],
+            )
         offset = 9
         keys = []
         for _ in range(key_count):
             k, offset = _unpack_bytes(data, offset)
             keys.append(k)
-        children = []
-        for _ in range(key_count + 1):
-            (child,) = _U32.unpack_from(data, offset)
-            children.append(child)
+        children = list(struct.unpack_from(f"<{key_count + 1}I", data, offset))
+        offset += 4 * (key_count + 1)
+        return cls(keys=keys, children=children, encoded_size=offset)
+
+
+class LeafView:
+    """Read-only leaf that decodes entries from its page buffer on demand.
+
+    Built over a memoryview from PageBackend.read_page_view for point
+    lookups: keys are compared in place and only the value that is
+    returned gets copied out of the page.
+    """
+
+    __slots__ = ("_data", "count")
+
+    def __init__(self, data, page_id: int | None = None):
+        _check_node_header(data, (LEAF,), page_id)
+        (self.count,) = _U32.unpack_from(data, 5)
+        self._data = data
+
+    def get(self, key: bytes) -> bytes | None:
+        data = self._data
+        wanted = len(key)
+        offset = 9
+        for _ in range(self.count):
+            (length,) = _U32.unpack_from(data, offset)
             offset += 4
-        return cls(keys=keys, children=children)
+            if length == wanted and data[offset : offset + length] == key:
+                offset += length
+                (length,) = _U32.unpack_from(data, offset)
+                offset += 4
+                if length & _OVERFLOW_FLAG:
+                    length &= _OFFSET_MASK
+                    return OverflowRef(data[offset : offset + length])
+                return bytes(data[offset : offset + length])
+            offset += length
+            (length,) = _U32.unpack_from(data, offset)
+            offset += 4 + (length & _OFFSET_MASK)
+        return None
+
+    def get_many(self, keys: list[bytes]) -> list[bytes | None]:
+        """get for each of keys (sorted, distinct) in one pass over the page.
+
+        The pass has to copy every entry key out to order-compare it,
+        while get compares in place, so a few keys are looked up singly.
+        """
+        if len(keys) <= 4:
+            return [self.get(key) for key in keys]
+        data = self._data
+        found: list[bytes | None] = [None] * len(keys)
+        j = 0
+        offset = 9
+        for _ in range(self.count):
+            (length,) = _U32.unpack_from(data, offset)
+            offset += 4
+            entry_key = bytes(data[offset : offset + length])
+            offset += length
+            (length,) = _U32.unpack_from(data, offset)
+            offset += 4
+            flagged = length & _OVERFLOW_FLAG
+            length &= _OFFSET_MASK
+            while j < len(keys) and keys[j] < entry_key:
+                j += 1
+            if j == len(keys):
+                break
+            if keys[j] == entry_key:
+                value = data[offset : offset + length]
+                found[j] = OverflowRef(value) if flagged else bytes(value)
+                j += 1
+            offset += length
+        return found
+
+    def key_range(self) -> tuple[bytes, bytes] | None:
+        """(first key, last key), or None for an empty leaf."""
+        if not self.count:
+            return None
+        data = self._data
+        offset = 9
+        for _ in range(self.count):
+            (length,) = _U32.unpack_from(data, offset)
+            last = offset + 4
+            offset = last + length
+            (value_length,) = _U32.unpack_from(data, offset)
+            offset += 4 + (value_length & _OFFSET_MASK)
+        (first_length,) = _U32.unpack_from(data, 9)
+        return bytes(data[13 : 13 + first_length]), bytes(data[last : last + length])
+
+
+class SlottedLeafView:
+    """LeafView for the slotted layout: binary search over the slot array."""
+
+    __slots__ = ("_data", "_slots", "_refs", "_first", "count")
+
+    def __init__(self, data, page_id: int | None = None):
+        _check_node_header(data, (LEAF_SLOTTED,), page_id)
+        self._load(data, NODE_HEADER_SIZE)
+
+    def _load(self, data, slots_at: int) -> None:
+        (self.count,) = _U32.unpack_from(data, 5)
+        self._data = data
+        self._slots, self._refs = _unflag(
+            struct.unpack_from(f"<{2 * self.count}I", data, slots_at)
+        )
+        self._first = slots_at + 8 * self.count
+
+    def _key_bounds(self, i: int) -> tuple[int, int]:
+        start = self._slots[2 * i - 1] if i else self._first
+        return start, self._slots[2 * i]
+
+    def get(self, key: bytes) -> bytes | None:
+        data = self._data
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start, end = self._key_bounds(mid)
+            if bytes(data[start:end]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.count:
+            return None
+        start, end = self._key_bounds(lo)
+        if data[start:end] != key:
+            return None
+        value = bytes(data[end : self._slots[2 * lo + 1]])
+        return OverflowRef(value) if lo in self._refs else value
+
+    def get_many(self, keys: list[bytes]) -> list[bytes | None]:
+        """get for each of keys, which must be sorted and distinct."""
+        return [self.get(key) for key in keys]
+
+    def key_range(self) -> tuple[bytes, bytes] | None:
+        """(first key, last key), or None for an empty leaf."""
+        if not self.count:
+            return None
+        first, last = self._key_bounds(0), self._key_bounds(self.count - 1)
+        return bytes(self._data[slice(*first)]), bytes(self._data[slice(*last)])
+
+
+class PrefixLeafView(SlottedLeafView):
+    """SlottedLeafView for the prefix layout: suffixes are searched once a
+    key is known to start with the page's shared prefix."""
+
+    __slots__ = ("_prefix",)
+
+    def __init__(self, data, page_id: int | None = None):
+        _check_node_header(data, (LEAF_PREFIX,), page_id)
+        (shared,) = _U32.unpack_from(data, NODE_HEADER_SIZE)
+        self._prefix = bytes(data[NODE_HEADER_SIZE + 4 : NODE_HEADER_SIZE + 4 + shared])
+        self._load(data, NODE_HEADER_SIZE + 4 + shared)
+
+    def get(self, key: bytes) -> bytes | None:
+        if not key.startswith(self._prefix):
+            return None
+        return super().get(key[len(self._prefix) :])
+
+    def key_range(self) -> tuple[bytes, bytes] | None:
+        span = super().key_range()
+        if span is None:
+            return None
+        return self._prefix + span[0], self._prefix + span[1]
+
+
+def leaf_view(data, page_id: int | None = None):
+    """Lazy read-only view of a leaf page in any layout."""
+    if data[0] == LEAF_SLOTTED:
+        return SlottedLeafView(data, page_id)
+    if data[0] == LEAF_PREFIX:
+        return PrefixLeafView(data, page_id)
+    return LeafView(data, page_id)
+
+
+def is_leaf_page(data) -> bool:
+    return data[0] in (LEAF, LEAF_SLOTTED, LEAF_PREFIX)
 
 
 def deserialize_node(data: bytes, page_id: int | None = None):
     """Dispatch on the type marker byte and return a Leaf/InternalNode."""
     node_type = data[0]
-    if node_type == LEAF:
+    if node_type in (LEAF, LEAF_SLOTTED, LEAF_PREFIX):
         return LeafNode.deserialize(data, page_id)
-    if node_type == INTERNAL:
+    if node_type in (INTERNAL, INTERNAL_SLOTTED, INTERNAL_PREFIX):
         return InternalNode.deserialize(data, page_id)
     raise ValueError(f"unknown node type marker: {node_type}")
 
 
-def fits_in_page(node, page_id: int, page_size: int) -> bool:
-    """Check whether node currently serializes within page_size. """
-    try:
-        node.serialize(page_id, page_size)
-        return True
-    except NodeTooLargeError:
-        return False
+def fits_in_page(
+    node, page_id: int, page_size: int, node_format: str = CLASSIC
+) -> bool:
+    """Check whether node currently serializes within page_size, in O(1).
+
+    For the prefix layout this costs one comparison of the first and last
+    key. page_id does not affect the size; it is kept for callers'
+    convenience.
+    """
+    return node_size(node, node_format) <= page_size
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+
+LRU = "lru"
+FIFO = "fifo"
+_POLICIES = (LRU, FIFO)
+
+
+class NodeCache:
+    """Bounded page id -> decoded node map shared by readers and the writer.
+
+    COW pages are never rewritten while anything can reach them, so a
+    decoded node stays valid until its page id is reclaimed; the store
+    calls ``invalidate`` at that point. Cached nodes are shared, so
+    callers must copy before modifying them (``BTree.put`` already does).
+    """
+
+    def __init__(self, capacity: int, policy: str = LRU):
+        if capacity < 0:
+            raise ValueError("cache capacity must be non-negative")
+        if policy not in _POLICIES:
+            raise ValueError(
+                f"unknown eviction policy {policy!r}, expected one of {_POLICIES}"
+            )
+        self.capacity = capacity
+        self.policy = policy
+        self._entries: OrderedDict[int, object] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, page_id: int):
+        """Return the cached node for page_id, or None on a miss.
+
+        Lookups do not take the lock: single OrderedDict operations are
+        atomic under the GIL, and a hot read path must not convoy on a
+        mutex. The counters are therefore best-effort under concurrency.
+        """
+        node = self._entries.get(page_id)
+        if node is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.policy == LRU:
+            try:
+                self._entries.move_to_end(page_id)
+            except KeyError:  # evicted or invalidated since the lookup
+                pass
+        return node
+
+    def put(self, page_id: int, node) -> None:
+        if self.capacity == 0:
+            return
+        with self._lock:
+            self._entries[page_id] = node
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, page_id: int) -> None:
+        """Drop page_id, whose page is about to hold something else."""
+        with self._lock:
+            self._entries.pop(page_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "capacity": self.capacity,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import struct
+from typing import Callable, Iterator
+
+from .node import OverflowRef
+from .page_backend import PageBackend
+
+# 1, 2, 4-7 are node markers, 3 is FREE_LIST and 9 FREE_LOG.
+OVERFLOW = 8
+_OVERFLOW_HEADER = struct.Struct("<BIII")  # marker, own page id, next page id, byte count
+
+
+def overflow_capacity(page_size: int) -> int:
+    """Value bytes one overflow page holds."""
+    return page_size - _OVERFLOW_HEADER.size
+
+
+def write_chain(
+    backend: PageBackend, allocate: Callable[[], int], value: bytes
+) -> tuple[OverflowRef, int]:
+    """Store value in a chain of newly allocated pages.
+
+    Returns the reference a leaf keeps in its place and the number of
+    bytes written to the backend.
+    """
+    page_size = backend.page_size
+    capacity = overflow_capacity(page_size)
+    page_ids = [allocate() for _ in range(max(1, -(-len(value) // capacity)))]
+    for i, page_id in enumerate(page_ids):
+        chunk = value[i * capacity : (i + 1) * capacity]
+        next_page = page_ids[i + 1] if i + 1 < len(page_ids) else 0
+        raw = bytearray(page_size)
+        _OVERFLOW_HEADER.pack_into(raw, 0, OVERFLOW, page_id, next_page, len(chunk))
+        raw[_OVERFLOW_HEADER.size : _OVERFLOW_HEADER.size + len(chunk)] = chunk
+        backend.write_page(page_id, raw)
+    return OverflowRef.to(page_ids[0], len(value)), len(page_ids) * page_size
+
+
+def _read_header(backend: PageBackend, page_id: int) -> tuple[memoryview, int, int]:
+    view = backend.read_page_view(page_id)
+    marker, stored_page_id, next_page, count = _OVERFLOW_HEADER.unpack_from(view, 0)
+    if marker != OVERFLOW:
+        raise ValueError(
+            f"page {page_id} is not an overflow page "
+            f"(expected marker {OVERFLOW}, found {marker})"
+        )
+    if stored_page_id != page_id:
+        raise ValueError(
+            f"overflow page {page_id} describes itself as page "
+            f"{stored_page_id} (broken chain)"
+        )
+    return view, next_page, count
+
+
+def chain_page_ids(backend: PageBackend, ref: OverflowRef) -> list[int]:
+    """Every page of the chain ref points at, in order."""
+    page_ids = []
+    page_id = ref.page_id
+    while page_id:
+        page_ids.append(page_id)
+        _, page_id, _ = _read_header(backend, page_id)
+    return page_ids
+
+
+def iter_chunks(backend: PageBackend, ref: OverflowRef) -> Iterator[bytes]:
+    """The value behind ref, one page's worth of bytes at a time."""
+    page_id = ref.page_id
+    while page_id:
+        view, next_page, count = _read_header(backend, page_id)
+        yield bytes(view[_OVERFLOW_HEADER.size : _OVERFLOW_HEADER.size + count])
+        page_id = next_page
+
+
+def read_value(backend: PageBackend, ref: OverflowRef) -> bytes:
+    return b"".join(iter_chunks(backend, ref))
+
+
+def relocate_chain(
+    backend: PageBackend,
+    allocate: Callable[[], int],
+    ref: OverflowRef,
+    cutoff: int,
+    budget: int,
+) -> tuple[OverflowRef, list[int]] | None:
+    """Copy ref's chain up to its last page at or past cutoff, for compaction.
+
+    Pages only link forward, so moving one means rewriting every page in
+    front of it; the copies take ids from allocate and link on to the
+    rest of the chain, which stays in place. Returns the new reference
+    and the ids of the pages copied, for the caller to retire, or None if
+    no page is at or past cutoff or more than budget would be copied.
+    """
+    page_ids = chain_page_ids(backend, ref)
+    past = [i for i, page_id in enumerate(page_ids) if page_id >= cutoff]
+    if not past or past[-1] >= budget:
+        return None
+    old_ids = page_ids[: past[-1] + 1]
+    new_ids = [allocate() for _ in old_ids]
+    rest = page_ids[len(old_ids)] if len(old_ids) < len(page_ids) else 0
+    for i, page_id in enumerate(old_ids):
+        raw = bytearray(backend.read_page(page_id))
+        count = _OVERFLOW_HEADER.unpack_from(raw, 0)[3]
+        next_page = new_ids[i + 1] if i + 1 < len(new_ids) else rest
+        _OVERFLOW_HEADER.pack_into(raw, 0, OVERFLOW, new_ids[i], next_page, count)
+        backend.write_page(new_ids[i], raw)
+    return OverflowRef.to(new_ids[0], ref.length), old_ids
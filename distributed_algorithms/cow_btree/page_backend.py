@@ -3,6 +3,65 @@ from __future__ import annotations
 import abc
 import mmap
 import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Iterable
+
+_CRC = struct.Struct("<I")
+
+NORMAL = "normal"
+RANDOM = "random"
+SEQUENTIAL = "sequential"
+ACCESS_HINTS = (NORMAL, RANDOM, SEQUENTIAL)
+
+# None where the platform has no madvise (or lacks that advice).
+_MADVICE = {
+    NORMAL: getattr(mmap, "MADV_NORMAL", None),
+    RANDOM: getattr(mmap, "MADV_RANDOM", None),
+    SEQUENTIAL: getattr(mmap, "MADV_SEQUENTIAL", None),
+}
+_MADV_WILLNEED = getattr(mmap, "MADV_WILLNEED", None)
+_FADVICE = {
+    NORMAL: getattr(os, "POSIX_FADV_NORMAL", None),
+    RANDOM: getattr(os, "POSIX_FADV_RANDOM", None),
+    SEQUENTIAL: getattr(os, "POSIX_FADV_SEQUENTIAL", None),
+}
+_FADV_WILLNEED = getattr(os, "POSIX_FADV_WILLNEED", None)
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = 16
+
+
+def check_access_hint(hint: str) -> None:
+    if hint not in ACCESS_HINTS:
+        raise ValueError(
+            f"unknown access hint {hint!r}, expected one of {', '.join(ACCESS_HINTS)}"
+        )
+
+
+def _advice_ranges(
+    page_ids: Iterable[int], page_size: int, page_count: int
+) -> list[tuple[int, int]]:
+    """Byte ranges covering page_ids, aligned to OS pages and merged.
+
+    madvise wants offsets that are multiples of mmap.PAGESIZE, which may
+    be larger than page_size; ids past page_count are dropped.
+    """
+    os_page = mmap.PAGESIZE
+    ranges: list[tuple[int, int]] = []
+    for page_id in sorted(page_ids):
+        if not 0 <= page_id < page_count:
+            continue
+        start = page_id * page_size // os_page * os_page
+        stop = -(-(page_id + 1) * page_size // os_page) * os_page
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1] = (ranges[-1][0], max(stop, ranges[-1][1]))
+        else:
+            ranges.append((start, stop))
+    return ranges
 
 
 class PageBackend(abc.ABC):
@@ -14,6 +73,14 @@ class PageBackend(abc.ABC):
     def read_page(self, page_id: int) -> bytes:
         """Return the raw bytes stored at page_id."""
 
+    def read_page_view(self, page_id: int) -> memoryview:
+        """Return a read-only view of page_id, without copying if possible.
+
+        The view must stay valid (and unchanged) for as long as the page
+        is not rewritten, even if the backend grows in the meantime.
+        """
+        return memoryview(self.read_page(page_id))
+
     @abc.abstractmethod
     def write_page(self, page_id: int, data: bytes) -> None:
         """Persist data (must be exactly page_size bytes) at page_id."""
@@ -31,6 +98,31 @@ class PageBackend(abc.ABC):
     def page_count(self) -> int:
         """Total number of pages currently allocated (including page 0)."""
 
+    def prefetch(self, page_ids: list[int]) -> None:
+        """Hint that page_ids will be read soon, in that order. Default is a no-op."""
+
+    def advise(self, hint: str) -> None:
+        """Hint the expected access pattern, one of ACCESS_HINTS.
+
+        "random" suits point lookups, "sequential" whole-file scans.
+        Default is a no-op.
+        """
+        check_access_hint(hint)
+
+    def truncate(self, page_count: int) -> None:
+        """Drop every page from page_count on, shrinking the storage.
+
+        Views of the remaining pages must stay valid. The default raises
+        NotImplementedError for backends that cannot shrink.
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot be truncated")
+
+    def refresh(self) -> None:
+        """Pick up pages another process added to (or cut from) the storage.
+
+        Default is a no-op.
+        """
+
     def close(self) -> None:  # pragma: no cover - trivial default
         """Release any resources. Default is a no-op."""
 
@@ -48,6 +140,11 @@ class InMemoryPageBackend(PageBackend):
         self._check_id(page_id)
         return bytes(self._pages[page_id])
 
+    def read_page_view(self, page_id: int) -> memoryview:
+        # write_page swaps in a new bytearray, so the view keeps the old one.
+        self._check_id(page_id)
+        return memoryview(self._pages[page_id]).toreadonly()
+
     def write_page(self, page_id: int, data: bytes) -> None:
         self._check_id(page_id)
         self._check_data(data)
@@ -64,6 +161,11 @@ class InMemoryPageBackend(PageBackend):
     def page_count(self) -> int:
         return len(self._pages)
 
+    def truncate(self, page_count: int) -> None:
+        if not (0 <= page_count <= len(self._pages)):
+            raise IndexError(f"cannot truncate {len(self._pages)} pages to {page_count}")
+        del self._pages[page_count:]
+
     def _check_id(self, page_id: int) -> None:
         if not (0 <= page_id < len(self._pages)):
             raise IndexError(f"page id {page_id} out of range")
@@ -75,31 +177,46 @@ class InMemoryPageBackend(PageBackend):
             )
 
 
+def _open_page_file(path: str, page_size: int) -> tuple[int, int]:
+    """Open (creating if necessary) path for read/write; return (fd, size)."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    size = os.fstat(fd).st_size
+    if 0 < size < page_size:
+        os.close(fd)
+        raise ValueError(
+            f"{path!r} is {size} bytes, less than one page of "
+            f"{page_size} bytes: it is not an empty file and cannot "
+            "be read at this page size (it was most likely written "
+            "with a smaller one)"
+        )
+    return fd, size
+
+
 class MMapPageBackend(PageBackend):
-    """Stores pages in a real file, cached via mmap"""
+    """Stores pages in a real file, cached via mmap
+
+    access_hint is passed to madvise for the whole mapping, and again
+    after every remap; prefetch asks the kernel to read the given pages
+    in ahead of use (MADV_WILLNEED). Both are no-ops where madvise is
+    unavailable.
+    """
 
-    def __init__(self, path: str, page_size: int):
+    def __init__(self, path: str, page_size: int, access_hint: str = NORMAL):
         if page_size <= 0:
             raise ValueError("page_size must be positive")
+        check_access_hint(access_hint)
         self.page_size = page_size
         self._path = path
+        self._access_hint = access_hint
 
-        # Open for read/write, creating if necessary.
-        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._fd, size = _open_page_file(path, page_size)
         try:
-            size = os.fstat(self._fd).st_size
-            if 0 < size < page_size:
-                raise ValueError(
-                    f"{path!r} is {size} bytes, less than one page of "
-                    f"{page_size} bytes: it is not an empty file and cannot "
-                    "be read at this page size (it was most likely written "
-                    "with a smaller one)"
-                )
             self._mapped_size = size
             self._page_count = size // page_size
             self._mmap: mmap.mmap | None = None
             if size > 0:
                 self._mmap = mmap.mmap(self._fd, size)
+                self._apply_hint(self._mmap)
             self._retired_maps: list[mmap.mmap] = []
         except Exception:
             os.close(self._fd)
@@ -114,12 +231,13 @@ class MMapPageBackend(PageBackend):
         return pages * self.page_size
 
     def _remap(self, new_size: int) -> None:
-        """Grow the file to new_size and publish a larger mapping."""
+        """Resize the file to new_size and publish a mapping of that size."""
         old = self._mmap
         if old is not None:
             old.flush()
         os.ftruncate(self._fd, new_size)
         new_map = mmap.mmap(self._fd, new_size)
+        self._apply_hint(new_map)
         self._mmap = new_map
         self._mapped_size = new_size
         if old is not None:
@@ -129,6 +247,11 @@ class MMapPageBackend(PageBackend):
         if page_id < 0 or page_id >= self._page_count:
             raise IndexError(f"page id {page_id} out of range")
 
+    def _apply_hint(self, mapping: mmap.mmap) -> None:
+        advice = _MADVICE[self._access_hint]
+        if advice is not None and len(mapping):
+            mapping.madvise(advice)
+
     # page_backend interface
 
     def read_page(self, page_id: int) -> bytes:
@@ -138,6 +261,18 @@ class MMapPageBackend(PageBackend):
         assert current is not None
         return bytes(current[offset : offset + self.page_size])
 
+    def read_page_view(self, page_id: int) -> memoryview:
+        """View straight into the live mapping.
+
+        A later _remap publishes a new mapping but keeps the old one open in
+        _retired_maps, so a view taken before the growth stays readable.
+        """
+        self._check_id(page_id)
+        offset = page_id * self.page_size
+        current = self._mmap
+        assert current is not None
+        return memoryview(current)[offset : offset + self.page_size].toreadonly()
+
     def write_page(self, page_id: int, data: bytes) -> None:
         self._check_id(page_id)
         if len(data) != self.page_size:
@@ -167,6 +302,51 @@ class MMapPageBackend(PageBackend):
     def page_count(self) -> int:
         return self._page_count
 
+    def prefetch(self, page_ids: list[int]) -> None:
+        current = self._mmap
+        if current is None or _MADV_WILLNEED is None:
+            return
+        # A remap may have published a larger page count than current covers.
+        page_count = min(self._page_count, len(current) // self.page_size)
+        ranges = _advice_ranges(page_ids, self.page_size, page_count)
+        for start, stop in ranges:
+            current.madvise(_MADV_WILLNEED, start, min(stop, len(current)) - start)
+
+    def advise(self, hint: str) -> None:
+        check_access_hint(hint)
+        self._access_hint = hint
+        if self._mmap is not None:
+            self._apply_hint(self._mmap)
+
+    def truncate(self, page_count: int) -> None:
+        """Shrink the file to page_count pages.
+
+        The old mapping is retired rather than closed, as on growth, so
+        views of the remaining pages stay readable; its tail now lies past
+        the end of the file and must not be touched.
+        """
+        if not (0 < page_count <= self._page_count):
+            raise IndexError(f"cannot truncate {self._page_count} pages to {page_count}")
+        self._remap(page_count * self.page_size)
+        self._page_count = page_count
+
+    def refresh(self) -> None:
+        """Map the file at its current size, as another process left it.
+
+        Unlike _remap this never resizes the file. The old mapping is
+        retired, as on growth; past a shrink, its tail must not be touched.
+        """
+        size = os.fstat(self._fd).st_size
+        if size != self._mapped_size:
+            new_map = mmap.mmap(self._fd, size)
+            self._apply_hint(new_map)
+            old = self._mmap
+            self._mmap = new_map
+            self._mapped_size = size
+            if old is not None:
+                self._retired_maps.append(old)
+        self._page_count = size // self.page_size
+
     def close(self) -> None:
         if self._mmap is not None:
             self._mmap.flush()
@@ -181,3 +361,232 @@ class MMapPageBackend(PageBackend):
             self._mapped_size = logical_size
             os.fsync(self._fd)
         os.close(self._fd)
+
+
+class FilePageBackend(PageBackend):
+    """Stores pages in a real file through pread/pwrite and a buffer pool.
+
+    Up to pool_pages pages are kept in process memory, evicted in LRU
+    order. Writes only land in the pool; dirty pages go to the file on
+    flush, or all together when a dirty page is evicted, with runs of
+    adjacent page ids written by a single pwritev. Pages are held as
+    immutable bytes, so a view of a page outlives any later rewrite or
+    eviction and nothing is ever unmapped.
+    """
+
+    def __init__(
+        self, path: str, page_size: int, pool_pages: int = 1024, access_hint: str = NORMAL
+    ):
+        if page_size <= 0:
+            raise ValueError("page_size must be positive")
+        if pool_pages < 1:
+            raise ValueError("pool_pages must be positive")
+        check_access_hint(access_hint)
+        self.page_size = page_size
+        self._path = path
+        self._pool_pages = pool_pages
+        self._fd, size = _open_page_file(path, page_size)
+        self._page_count = size // page_size
+        self._file_pages = self._page_count  # pages the file is long enough to hold
+        self._pool: OrderedDict[int, bytes] = OrderedDict()
+        self._dirty: set[int] = set()
+        # Guards the pool and dirty set; preads of missing pages run outside it.
+        self._lock = threading.Lock()
+        self.advise(access_hint)
+
+    def _check_id(self, page_id: int) -> None:
+        if page_id < 0 or page_id >= self._page_count:
+            raise IndexError(f"page id {page_id} out of range")
+
+    def _write_back(self) -> None:
+        """Write every dirty page, one pwritev per run of adjacent ids."""
+        page_ids = sorted(self._dirty)
+        run: list[bytes] = []
+        run_start = 0
+        for page_id in page_ids:
+            if run and (page_id != run_start + len(run) or len(run) == _IOV_MAX):
+                self._pwritev(run_start, run)
+                run = []
+            if not run:
+                run_start = page_id
+            run.append(self._pool[page_id])
+        if run:
+            self._pwritev(run_start, run)
+        self._dirty.clear()
+
+    def _pwritev(self, page_id: int, pages: list[bytes]) -> None:
+        offset = page_id * self.page_size
+        expected = len(pages) * self.page_size
+        written = os.pwritev(self._fd, pages, offset)
+        if written != expected:  # rare short write: finish page by page
+            data = b"".join(pages)
+            while written < expected:
+                written += os.pwrite(self._fd, data[written:], offset + written)
+        self._file_pages = max(self._file_pages, page_id + len(pages))
+
+    def _insert(self, page_id: int, data: bytes) -> None:
+        """Add or refresh page_id in the pool and evict past pool_pages."""
+        pool = self._pool
+        pool[page_id] = data
+        pool.move_to_end(page_id)
+        while len(pool) > self._pool_pages:
+            victim = next(iter(pool))
+            if victim in self._dirty:
+                self._write_back()
+            del pool[victim]
+
+    # page_backend interface
+
+    def read_page(self, page_id: int) -> bytes:
+        self._check_id(page_id)
+        with self._lock:
+            data = self._pool.get(page_id)
+            if data is not None:
+                self._pool.move_to_end(page_id)
+                return data
+        data = os.pread(self._fd, self.page_size, page_id * self.page_size)
+        if len(data) < self.page_size:  # allocated, never written back
+            data += bytes(self.page_size - len(data))
+        with self._lock:
+            # COW pages are not rewritten while readable, so a racing
+            # insert of the same page holds the same bytes.
+            if page_id not in self._pool:
+                self._insert(page_id, data)
+        return data
+
+    def read_page_view(self, page_id: int) -> memoryview:
+        return memoryview(self.read_page(page_id))
+
+    def write_page(self, page_id: int, data: bytes) -> None:
+        self._check_id(page_id)
+        if len(data) != self.page_size:
+            raise ValueError(
+                f"page data must be exactly {self.page_size} bytes, got {len(data)}"
+            )
+        with self._lock:
+            self._dirty.add(page_id)
+            self._insert(page_id, bytes(data))
+
+    def allocate_page(self) -> int:
+        with self._lock:
+            page_id = self._page_count
+            self._page_count = page_id + 1
+        return page_id
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write_back()
+            if self._file_pages < self._page_count:
+                os.ftruncate(self._fd, self._page_count * self.page_size)
+                self._file_pages = self._page_count
+        os.fsync(self._fd)
+
+    @property
+    def page_count(self) -> int:
+        return self._page_count
+
+    def prefetch(self, page_ids: list[int]) -> None:
+        if _FADV_WILLNEED is None:
+            return
+        with self._lock:
+            missing = [p for p in page_ids if p not in self._pool]
+        for start, stop in _advice_ranges(missing, self.page_size, self._file_pages):
+            os.posix_fadvise(self._fd, start, stop - start, _FADV_WILLNEED)
+
+    def advise(self, hint: str) -> None:
+        check_access_hint(hint)
+        advice = _FADVICE[hint]
+        if advice is not None:
+            os.posix_fadvise(self._fd, 0, 0, advice)
+
+    def truncate(self, page_count: int) -> None:
+        with self._lock:
+            if not (0 < page_count <= self._page_count):
+                raise IndexError(
+                    f"cannot truncate {self._page_count} pages to {page_count}"
+                )
+            for page_id in [p for p in self._pool if p >= page_count]:
+                del self._pool[page_id]
+            self._dirty = {p for p in self._dirty if p < page_count}
+            os.ftruncate(self._fd, page_count * self.page_size)
+            self._page_count = page_count
+            self._file_pages = page_count
+
+    def close(self) -> None:
+        self.flush()
+        self._pool.clear()
+        os.close(self._fd)
+
+
+class PageChecksumError(ValueError):
+    """Raised when a page's contents do not match its stored checksum."""
+
+
+class ChecksumPageBackend(PageBackend):
+    """Wraps a backend and keeps a CRC32 of every page in its last 4 bytes.
+
+    page_size is the wrapped page size minus that trailer. read_page
+    always verifies; read_page_view, which serves in-place point lookups,
+    only does when verify_views is set.
+    """
+
+    TRAILER_SIZE = _CRC.size
+
+    def __init__(self, inner: PageBackend, verify_views: bool = True):
+        self.inner = inner
+        self.page_size = inner.page_size - self.TRAILER_SIZE
+        self.verify_views = verify_views
+        if self.page_size <= 0:
+            raise ValueError("page_size is too small for a checksum trailer")
+
+    def _verify(self, page_id: int, data) -> None:
+        (stored,) = _CRC.unpack_from(data, self.page_size)
+        actual = zlib.crc32(data[: self.page_size])
+        if actual != stored:
+            raise PageChecksumError(
+                f"page {page_id} fails its checksum "
+                f"(stored {stored:#010x}, computed {actual:#010x})"
+            )
+
+    def read_page(self, page_id: int) -> bytes:
+        raw = memoryview(self.inner.read_page(page_id))
+        self._verify(page_id, raw)
+        return bytes(raw[: self.page_size])
+
+    def read_page_view(self, page_id: int) -> memoryview:
+        view = self.inner.read_page_view(page_id)
+        if self.verify_views:
+            self._verify(page_id, view)
+        return view[: self.page_size]
+
+    def write_page(self, page_id: int, data: bytes) -> None:
+        if len(data) != self.page_size:
+            raise ValueError(
+                f"page data must be exactly {self.page_size} bytes, got {len(data)}"
+            )
+        self.inner.write_page(page_id, bytes(data) + _CRC.pack(zlib.crc32(data)))
+
+    def allocate_page(self) -> int:
+        return self.inner.allocate_page()
+
+    def flush(self) -> None:
+        self.inner.flush()
+
+    @property
+    def page_count(self) -> int:
+        return self.inner.page_count
+
+    def prefetch(self, page_ids: list[int]) -> None:
+        self.inner.prefetch(page_ids)
+
+    def advise(self, hint: str) -> None:
+        self.inner.advise(hint)
+
+    def truncate(self, page_count: int) -> None:
+        self.inner.truncate(page_count)
+
+    def refresh(self) -> None:
+        self.inner.refresh()
+
+    def close(self) -> None:
+        self.inner.close()
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import weakref
+
+
+class _Slot:
+    """The epochs pinned by one thread."""
+
+    __slots__ = ("lock", "pins", "min_epoch", "thread")
+
+    def __init__(self, thread: threading.Thread):
+        # Only contended when another thread unpins one of these pins
+        # (e.g. a cursor closed elsewhere); the owner never waits on it.
+        self.lock = threading.Lock()
+        self.pins: dict[int, int] = {}  # sequence number -> epoch
+        self.min_epoch: int | None = None
+        self.thread = weakref.ref(thread)
+
+
+ReaderToken = tuple[_Slot, int]
+
+
+class ReaderRegistry:
+    """Reader epoch pins kept in one slot per thread.
+
+    Pinning and unpinning only touch the calling thread's slot, so
+    readers on different threads never serialize on a shared mutex.
+    Every slot keeps the minimum epoch it pins up to date, and the writer
+    computes the global minimum from one number per thread instead of
+    scanning every pin. Tokens are (slot, sequence) pairs, so a pin can
+    be released from any thread.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._slots: list[_Slot] = []
+        self._slots_lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    def pin(self, epoch: int) -> ReaderToken:
+        slot = getattr(self._local, "slot", None)
+        if slot is None:
+            slot = _Slot(threading.current_thread())
+            with self._slots_lock:
+                self._slots.append(slot)
+            self._local.slot = slot
+        seq = next(self._sequence)
+        with slot.lock:
+            slot.pins[seq] = epoch
+            if slot.min_epoch is None or epoch < slot.min_epoch:
+                slot.min_epoch = epoch
+        return slot, seq
+
+    def unpin(self, token: ReaderToken) -> int:
+        """Release a pin, returning the epoch it held."""
+        slot, seq = token
+        with slot.lock:
+            epoch = slot.pins.pop(seq)
+            if epoch == slot.min_epoch:
+                slot.min_epoch = min(slot.pins.values(), default=None)
+        return epoch
+
+    def min_epoch(self) -> int | None:
+        """Oldest pinned epoch across all threads, or None if none is pinned.
+
+        A pin that is concurrently being added may or may not be seen;
+        callers publish new state before asking and readers re-check the
+        published epoch after pinning, which closes that window.
+        """
+        oldest = None
+        dead = False
+        for slot in self._slots:
+            epoch = slot.min_epoch
+            if epoch is None:
+                dead = dead or slot.thread() is None
+            elif oldest is None or epoch < oldest:
+                oldest = epoch
+        if dead:
+            self._prune()
+        return oldest
+
+    def pins(self) -> dict[ReaderToken, int]:
+        """Every live pin as token -> epoch (for introspection and tests)."""
+        result = {}
+        for slot in list(self._slots):
+            with slot.lock:
+                result.update(((slot, seq), epoch) for seq, epoch in slot.pins.items())
+        return result
+
+    def _prune(self) -> None:
+        """Forget the empty slots of threads that have exited."""
+        with self._slots_lock:
+            self._slots = [
+                slot
+                for slot in self._slots
+                if slot.pins or slot.thread() is not None
+            ]
@@ -0,0 +1,150 @@
+"""Epochs pinned by read_only Stores in other processes, kept in a shared file."""
+
+from __future__ import annotations
+
+import mmap
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # not POSIX
+    fcntl = None
+
+DEFAULT_SLOTS = 128
+_SLOT_SIZE = 8
+
+# Slots held in this process, per table file (st_dev, st_ino): fcntl
+# locks never conflict within a process, so they cannot tell its own
+# readers apart from dead ones.
+_held: dict[tuple[int, int], set[int]] = {}
+_held_lock = threading.Lock()
+_fence_lock = threading.Lock()
+
+
+def _fence() -> None:
+    """Order an earlier store before a later load, as a full barrier would.
+
+    Taking a lock is an atomic read-modify-write, which is one on every
+    platform CPython supports.
+    """
+    with _fence_lock:
+        pass
+
+
+class ReaderTable:
+    """One 8-byte slot per reader process, holding the oldest epoch it pins.
+
+    A read_only Store claims a slot for its process by taking an fcntl
+    lock on the slot's bytes, and keeps epoch + 1 there (0 means nothing
+    pinned) while any of its readers pins that epoch. The writer's
+    min_epoch is the minimum over all slots. A slot whose lock the writer
+    can take belongs to a process that died without clearing it, and is
+    cleared. Slots are read and written as aligned native words, so a
+    value is never seen half-written. fcntl drops every lock a process
+    holds on a file once it closes any descriptor of it, so a process
+    should not close other tables on the same file while it reads.
+    """
+
+    def __init__(self, path: str, slots: int = DEFAULT_SLOTS):
+        if fcntl is None:
+            raise OSError("reader tables need fcntl locks, which this platform lacks")
+        if slots < 1:
+            raise ValueError("slots must be positive")
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            stat = os.fstat(self._fd)
+            if stat.st_size == 0:
+                os.ftruncate(self._fd, slots * _SLOT_SIZE)
+            size = os.fstat(self._fd).st_size
+            if size % _SLOT_SIZE:
+                raise ValueError(f"{path!r} is not a reader table ({size} bytes)")
+            self._mmap = mmap.mmap(self._fd, size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        self._slots = memoryview(self._mmap).cast("Q")
+        self._file = (stat.st_dev, stat.st_ino)
+        self._lock = threading.Lock()
+        self._slot: int | None = None
+        self._pins: dict[int, int] = {}  # epoch -> pins in this process
+        self._oldest: int | None = None
+
+    # reader side
+
+    def claim(self) -> None:
+        """Take a free slot for this process; RuntimeError if there is none."""
+        with _held_lock:
+            held = _held.setdefault(self._file, set())
+            for index in range(len(self._slots)):
+                if index not in held and self._try_lock(index):
+                    held.add(index)
+                    self._slots[index] = 0
+                    self._slot = index
+                    return
+        raise RuntimeError(f"all {len(self._slots)} reader table slots are taken")
+
+    def pin(self, epoch: int) -> None:
+        """Count a reader at epoch; the slot is visible to the writer on return."""
+        with self._lock:
+            count = self._pins.get(epoch, 0)
+            self._pins[epoch] = count + 1
+            if self._oldest is None or epoch < self._oldest:
+                self._set(epoch)
+        _fence()
+
+    def unpin(self, epoch: int) -> None:
+        with self._lock:
+            count = self._pins.pop(epoch) - 1
+            if count:
+                self._pins[epoch] = count
+            elif epoch == self._oldest:
+                self._set(min(self._pins, default=None))
+
+    def _set(self, epoch: int | None) -> None:
+        self._oldest = epoch
+        assert self._slot is not None, "claim a slot before pinning"
+        self._slots[self._slot] = 0 if epoch is None else epoch + 1
+
+    # writer side
+
+    def min_epoch(self) -> int | None:
+        """Oldest epoch any live reader process pins, or None.
+
+        Call it after publishing the header that readers check their pins
+        against; see Store._pin_shared.
+        """
+        _fence()
+        held = _held.get(self._file, ())
+        oldest = None
+        for index, value in enumerate(self._slots.tolist()):
+            if not value:
+                continue
+            if index not in held and self._try_lock(index):
+                # Its process exited without clearing the slot.
+                self._slots[index] = 0
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, _SLOT_SIZE, index * _SLOT_SIZE)
+                continue
+            if oldest is None or value - 1 < oldest:
+                oldest = value - 1
+        return oldest
+
+    def _try_lock(self, index: int) -> bool:
+        try:
+            fcntl.lockf(
+                self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB, _SLOT_SIZE, index * _SLOT_SIZE
+            )
+        except OSError:
+            return False
+        return True
+
+    def close(self) -> None:
+        """Clear and release this process's slot, if it has one."""
+        if self._slot is not None:
+            self._slots[self._slot] = 0
+            with _held_lock:
+                _held[self._file].discard(self._slot)
+            self._slot = None
+        self._slots.release()
+        self._mmap.close()
+        os.close(self._fd)
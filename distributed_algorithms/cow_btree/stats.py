@@ -0,0 +1,151 @@
+"""Opt-in per-commit instrumentation for Store (``Store(stats=True)``)."""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from typing import Callable, TextIO
+
+logger = logging.getLogger(__name__)
+
+# Sequential steps of a commit, timed back to back by StoreStats.lap.
+COMMIT_PHASES = (
+    "lock_wait",
+    "build",
+    "free_list",
+    "flush_pages",
+    "header",
+    "flush_header",
+    "reclaim",
+)
+# Parts of "build", timed where they happen.
+BUILD_PHASES = ("read", "split", "serialize")
+COUNTERS = (
+    "commits",
+    "pages_read",
+    "pages_written",
+    "pages_retired",
+    "splits",
+    "free_list_pages_written",
+    "free_list_checkpoints",
+)
+
+
+class StoreStats:
+    """Cumulative counters and phase timings, and those of the running commit.
+
+    A disabled instance ignores every call, so the store can make them
+    unconditionally on its per-commit path; per-page hooks are only
+    installed when enabled. Work done by the committing thread counts
+    towards its commit record as well as the totals; reader threads only
+    count towards the totals. Like NodeCache's, the totals are
+    best-effort while readers run concurrently.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        on_commit: Callable[[dict], None] | None = None,
+    ):
+        self.enabled = enabled or on_commit is not None
+        self.on_commit = on_commit
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.seconds = dict.fromkeys(COMMIT_PHASES + BUILD_PHASES, 0.0)
+        self._writer: int | None = None
+        self._commit_counters: dict[str, int] = {}
+        self._commit_seconds: dict[str, float] = {}
+        self._lap_start = 0.0
+
+    def begin_commit(self) -> None:
+        """Start a commit record; called before the write lock is taken."""
+        if not self.enabled:
+            return
+        self._lap_start = time.perf_counter()
+
+    def locked(self) -> None:
+        """The write lock is held: the calling thread is now the writer."""
+        if not self.enabled:
+            return
+        self._writer = threading.get_ident()
+        self._commit_counters = dict.fromkeys(COUNTERS, 0)
+        self._commit_seconds = dict.fromkeys(COMMIT_PHASES + BUILD_PHASES, 0.0)
+        self.lap("lock_wait")
+
+    def lap(self, phase: str) -> None:
+        """Charge the time since the previous lap to phase."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.add_time(phase, now - self._lap_start)
+        self._lap_start = now
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        self.seconds[phase] += seconds
+        if self._writer == threading.get_ident():
+            self._commit_seconds[phase] += seconds
+
+    def count(self, counter: str, n: int = 1) -> None:
+        if not self.enabled:
+            return
+        self.counters[counter] += n
+        if self._writer == threading.get_ident():
+            self._commit_counters[counter] += n
+
+    def end_commit(self, epoch: int, gauges: dict[str, int]) -> dict | None:
+        """Close the running record and return it, or None when disabled.
+
+        Still called under the write lock; pass the record to emit once
+        the lock is released.
+        """
+        if not self.enabled:
+            return None
+        self.count("commits")
+        self._writer = None
+        return {
+            "epoch": epoch,
+            "seconds": self._commit_seconds,
+            "counters": self._commit_counters,
+            **gauges,
+        }
+
+    def abort_commit(self) -> None:
+        """Forget the running record; what it did stays in the totals."""
+        self._writer = None
+
+    def emit(self, record: dict | None) -> None:
+        """Pass record to on_commit; an error there is logged, not raised.
+
+        The commit is already durable and published by then, so the write
+        that made it must not fail because an exporter did.
+        """
+        if record is not None and self.on_commit is not None:
+            try:
+                self.on_commit(record)
+            except Exception:
+                logger.exception(
+                    "on_commit callback failed for epoch %s", record["epoch"]
+                )
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "counters": dict(self.counters),
+            "seconds": dict(self.seconds),
+        }
+
+
+class JsonLinesExporter:
+    """An on_commit callback that writes each commit record as a JSON line."""
+
+    def __init__(self, stream: TextIO):
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    def __call__(self, record: dict) -> None:
+        line = json.dumps(record, separators=(",", ":"))
+        with self._lock:
+            self._stream.write(line + "\n")
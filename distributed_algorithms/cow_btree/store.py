@@ -1,18 +1,54 @@
 from __future__ import annotations
 
+import bisect
+import heapq
 import struct
 import threading
+import time
+from typing import Callable, Iterable, Iterator
 
 from .btree import BTree
-from .node import LeafNode, deserialize_node
-from .page_backend import PageBackend
+from .external_sort import sort_items
+from .node import (
+    CLASSIC,
+    LeafNode,
+    OverflowRef,
+    check_node_format,
+    deserialize_node,
+    is_leaf_page,
+    leaf_view,
+)
+from .node_cache import LRU, NodeCache
+from .overflow import (
+    OVERFLOW,
+    chain_page_ids,
+    iter_chunks,
+    read_value,
+    relocate_chain,
+    write_chain,
+)
+from .page_backend import (
+    ChecksumPageBackend,
+    MMapPageBackend,
+    PageBackend,
+    check_access_hint,
+)
+from .reader_registry import ReaderRegistry, ReaderToken
+from .reader_table import ReaderTable
+from .stats import StoreStats
+from .wal import WriteAheadLog
 
 _HEADER_MARKER = 0x2A
-_HEADER_FMT = struct.Struct("<BIII")
+# marker, root, free-list head, page size, flags, free-log head, free-log
+# entries, catalog root, epoch
+_HEADER_FMT = struct.Struct("<BIIIBIIIQ")
+_HEADER_CHECKSUMS = 0x01
 FREE_LIST = 3
+FREE_LOG = 9
+_FREE_LOG_ALLOCATED = 0x80000000  # log entry flag: the id left the free set
 
 _FL_HEADER = struct.Struct("<BIII")  # marker, page id, next page id, count
-_U32 = struct.Struct("<I")
+_CATALOG_ROOT = struct.Struct("<I")  # a catalog value: the named tree's root
 
 
 def _as_bytes(value: object, what: str) -> bytes:
@@ -24,31 +60,193 @@ def _as_bytes(value: object, what: str) -> bytes:
     raise TypeError(f"{what} must be bytes-like, got {type(value).__name__}")
 
 
+def _tree_name(name: object) -> bytes:
+    """A named tree's catalog key: its name, UTF-8 encoded."""
+    if not isinstance(name, str) or not name:
+        raise ValueError("tree name must be a non-empty str")
+    return name.encode()
+
+
 class Store:
-    """Persistent, thread-safe, copy-on-write B+-tree key-value store."""
+    """Persistent, thread-safe, copy-on-write B+-tree key-value store.
+
+    cache_size bounds how many decoded nodes are kept between reads
+    (0 disables the cache); cache_policy picks the eviction order, "lru"
+    or "fifo". node_format selects the layout new node pages are written
+    in, "classic", "slotted" or "prefix" (slotted with each node's common
+    key prefix stored once); pages of any layout are always readable.
+    With group_commit, concurrent writers queue their operations and one
+    of them commits everything queued so far under a single header write.
+    With wal_path, commits are appended to a write-ahead log instead of
+    rewriting tree pages, and a background thread checkpoints them into
+    the tree once checkpoint_bytes of log have accumulated. With
+    overflow_threshold, values longer than that many bytes are stored in
+    chains of overflow pages and the leaf keeps only a reference, so a
+    value may be larger than a page; open_value streams such values.
+    With checksums, every page of a new file ends in a CRC32 of its
+    contents that is checked when the page is read; the choice is
+    recorded in the header, so later opens follow the file.
+    verify_lookups=False skips the check for leaves searched in place by
+    point reads, the hot path, and keeps it for everything decoded.
+    access_hint ("normal", "random" or "sequential") tells the backend
+    what access pattern to expect; for MMapPageBackend it becomes the
+    madvise advice for the mapping, and scans and batched lookups ask it
+    to read the child pages they are about to visit ahead of time.
+    With stats (or an on_commit callback), every tree commit records
+    per-phase timings and page counters; stats() returns the totals and
+    on_commit receives each commit's record once the write lock is
+    released; an exception it raises is logged, not propagated.
+    Disabled, the only cost is a few no-op calls per commit.
+    With flush_interval (seconds), commits are published in memory
+    without touching the header or flushing; a background thread makes
+    everything published so far durable once per interval, and sync()
+    does so on demand. A crash loses at most the commits since the last
+    of those, and reopens on the root that was durable then.
+    open_tree gives further named trees in the same file, sharing its
+    free space, commits and reclamation; see Tree.
+    With read_only, the store serves reads of an MMapPageBackend file
+    that a writer in another process commits to: each read follows the
+    root the header names and pins its epoch in the shared reader_table
+    file, which the writer, opened with the same reader_table, checks
+    before reusing a page. Writes to a read_only store raise
+    RuntimeError.
+    """
 
-    def __init__(self, backend: PageBackend):
+    def __init__(
+        self,
+        backend: PageBackend,
+        cache_size: int = 1024,
+        cache_policy: str = LRU,
+        node_format: str = CLASSIC,
+        group_commit: bool = False,
+        wal_path: str | None = None,
+        checkpoint_bytes: int = 4 * 1024 * 1024,
+        overflow_threshold: int | None = None,
+        checksums: bool = False,
+        verify_lookups: bool = True,
+        access_hint: str | None = None,
+        stats: bool = False,
+        on_commit: Callable[[dict], None] | None = None,
+        flush_interval: float | None = None,
+        read_only: bool = False,
+        reader_table: str | None = None,
+    ):
+        check_node_format(node_format)
+        if group_commit and wal_path is not None:
+            raise ValueError("group_commit and wal_path cannot be combined")
+        if flush_interval is not None:
+            if group_commit or wal_path is not None:
+                raise ValueError(
+                    "flush_interval cannot be combined with group_commit or wal_path"
+                )
+            if flush_interval <= 0:
+                raise ValueError("flush_interval must be positive")
+        if reader_table is not None and wal_path is not None:
+            raise ValueError("reader_table and wal_path cannot be combined")
+        if read_only:
+            if reader_table is None:
+                raise ValueError("read_only needs a reader_table")
+            if group_commit or flush_interval is not None:
+                raise ValueError(
+                    "read_only cannot be combined with group_commit or flush_interval"
+                )
+            if not isinstance(backend, MMapPageBackend):
+                raise ValueError("read_only needs an MMapPageBackend")
+            if backend.page_count == 0:
+                raise ValueError("read_only needs an existing file")
+        if overflow_threshold is not None and overflow_threshold < 1:
+            raise ValueError("overflow_threshold must be positive")
+        if access_hint is not None:
+            check_access_hint(access_hint)
         self._backend = backend
+        self._disk_page_size = backend.page_size
+        self._stats = StoreStats(stats, on_commit)
+        self._verify_lookups = verify_lookups
+        self._node_format = node_format
+        self._overflow_threshold = overflow_threshold
+        self._node_cache = NodeCache(cache_size, cache_policy)
         self._write_lock = threading.Lock()
+        # Serializes publishers of _state; readers never take it.
         self._reader_lock = threading.Lock()
-        self._active_readers: dict[int, int] = {}  # token -> epoch
-        self._next_reader_token = 0
+        self._readers = ReaderRegistry()
+        self._snapshot_epochs: dict[ReaderToken, int] = {}
         self._pending: list[tuple[int, int]] = []  # (retire_epoch, page_id)
         self._pending_this_commit: list[int] = []
         self._allocated_this_attempt: list[int] = []
+        # A min-heap, so allocation hands out the lowest free id.
         self._free_ids: list[int] = []
         self._free_list_containers: list[int] = []
-        self._free_clean = 0
-        self._free_dirty_containers = 0
-        self._epoch = 0
+        # Free-set changes since the last checkpoint, as log entries: those
+        # already on the log pages, and those the next commit appends.
+        self._free_log: list[int] = []
+        self._free_log_pages: list[int] = []
+        self._free_changes: dict[int, int] = {}  # page id -> pending log entry
+        self._free_checkpoint_wanted = False
+        # (epoch, root id, WAL overlay, named tree roots), replaced as a
+        # whole on publish so readers pick up a consistent state without
+        # locking.
+        self._state: tuple[
+            int, int, tuple[_Layer, ...], dict[bytes, int]
+        ] = (0, 0, (), {})
+        # Root of the catalog tree (name -> root id), 0 until a named tree
+        # exists, and the (catalog root, roots) a write attempt stages.
+        self._catalog_root = 0
+        self._staged_trees: tuple[int, dict[bytes, int]] | None = None
         self._closed = False
+        self._group_commit = group_commit
+        self._group_cond = threading.Condition()
+        self._group_queue: list[_CommitRequest] = []
+        self._group_leader = False
+        self._wal: WriteAheadLog | None = None
+        self._user_bytes = 0
+        self._page_bytes_written = 0
+        # Epoch of the root the header names. Pages retired after it may
+        # still be part of the tree recovery would open, so _reclaim holds
+        # them back as if a reader were pinned there.
+        self._durable_epoch = 0
+        self._flush_interval = flush_interval
+        self._read_only = read_only
 
         if backend.page_count == 0:
+            if checksums:
+                self._backend = ChecksumPageBackend(backend, verify_lookups)
             self._init_fresh()
         else:
             self._recover()
+        if access_hint is not None:
+            self._backend.advise(access_hint)
 
-        self._tree = BTree(_Allocator(self))
+        if self._stats.enabled:
+            self._allocator = _InstrumentedAllocator(self)
+            self._tree = BTree(self._allocator, node_format, self._stats)
+        else:
+            self._allocator = _Allocator(self)
+            self._tree = BTree(self._allocator, node_format)
+        if read_only:
+            # The header is followed from here on; _pin_shared adopts it.
+            self._state = (-1, 0, (), {})
+            self._shared_catalog: tuple[int, dict[bytes, int]] = (0, {})
+            self._header_view = backend.read_page_view(0)
+        elif self._catalog_root:
+            roots = {
+                name: _CATALOG_ROOT.unpack(value)[0]
+                for name, value in self._tree.scan(self._catalog_root)
+            }
+            self._state = self._state[:3] + (roots,)
+        self._reader_table: ReaderTable | None = None
+        if reader_table is not None:
+            self._reader_table = ReaderTable(reader_table)
+            if read_only:
+                self._reader_table.claim()
+        if wal_path is not None:
+            self._open_wal(wal_path, checkpoint_bytes)
+        self._flusher: threading.Thread | None = None
+        if flush_interval is not None:
+            self._flusher_stop = threading.Event()
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="cow_btree-flush", daemon=True
+            )
+            self._flusher.start()
 
     # initialization / recovery
 
@@ -58,77 +256,113 @@ class Store:
         root_id = self._backend.allocate_page()
         empty_leaf = LeafNode()
         self._backend.write_page(
-            root_id, empty_leaf.serialize(root_id, self._backend.page_size)
+            root_id,
+            empty_leaf.serialize(root_id, self._backend.page_size, self._node_format),
         )
-        self._root_id = root_id
+        self._state = (0, root_id, (), {})
         self._free_list_head = 0
         self._backend.flush()
-        self._write_header(root_id)
+        self._write_header(root_id, 0)
         self._backend.flush()
 
     def _recover(self) -> None:
         raw = self._backend.read_page(0)
-        marker, root_id, free_list_head, page_size = _HEADER_FMT.unpack_from(raw, 0)
+        (
+            marker,
+            root_id,
+            free_list_head,
+            page_size,
+            flags,
+            free_log_head,
+            free_log_entries,
+            self._catalog_root,
+            epoch,
+        ) = _HEADER_FMT.unpack_from(raw, 0)
         if marker != _HEADER_MARKER:
             raise ValueError("not a cow_btree file (bad header marker)")
-        if page_size and page_size != self._backend.page_size:
+        if page_size and page_size != self._disk_page_size:
             raise ValueError(
                 f"file was written with page_size={page_size}, "
-                f"but the backend was opened with page_size={self._backend.page_size}"
+                f"but the backend was opened with page_size={self._disk_page_size}"
             )
-        self._root_id = root_id
+        if flags & _HEADER_CHECKSUMS:
+            self._backend = ChecksumPageBackend(self._backend, self._verify_lookups)
+            self._backend.read_page(0)
+        self._state = (epoch, root_id, (), {})
+        self._durable_epoch = epoch
+        if self._read_only:
+            return  # the free set is the writer's
         self._free_list_head = free_list_head
         chunks, self._free_list_containers = self._read_free_list(free_list_head)
-        self._free_ids = [pid for chunk in chunks for pid in chunk]
-        self._free_clean = self._clean_prefix(chunks)
-        self._free_dirty_containers = len(self._free_list_containers)
+        free = {pid for chunk in chunks for pid in chunk}
+        log_chunks, self._free_log_pages = self._read_free_list(free_log_head, FREE_LOG)
+        self._free_log = [entry for chunk in log_chunks for entry in chunk]
+        del self._free_log[free_log_entries:]
+        for entry in self._free_log:
+            if entry & _FREE_LOG_ALLOCATED:
+                free.discard(entry & ~_FREE_LOG_ALLOCATED)
+            else:
+                free.add(entry)
+        self._free_ids = sorted(free)  # sorted is a valid heap
 
-    def _clean_prefix(self, chunks: list[list[int]]) -> int:
-        """How many recovered ids are in the slot _persist_free_list expects."""
-        max_per_page = self._ids_per_container
-        clean = 0
-        for index, chunk in enumerate(chunks):
-            if len(chunk) == max_per_page:
-                clean += len(chunk)
-                continue
-            if all(not rest for rest in chunks[index + 1 :]):
-                clean += len(chunk)
-            break
-        return clean
+    def _open_wal(self, path: str, checkpoint_bytes: int) -> None:
+        """Replay the log into the memtable and start the checkpointer."""
+        self._wal = WriteAheadLog(path)
+        self._checkpoint_bytes = checkpoint_bytes
+        self._wal_lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+        # Layers of logged writes, newest first, each never mutated once
+        # published, and the ops merged into each; see _commit_to_wal.
+        self._memtable: tuple[_Layer, ...] = ()
+        self._memtable_ops: tuple[int, ...] = ()
+        self._memtable_bytes = 0
+        self._frozen = _Layer()
+        self._checkpoint_error: Exception | None = None
+        replayed: dict[bytes, bytes | None] = {}
+        for ops in self._wal.replay():
+            replayed.update(ops)
+            self._memtable_bytes += _ops_bytes(ops)
+        if replayed:
+            self._memtable = (_Layer(replayed),)
+            self._memtable_ops = (len(replayed),)
+        self._publish_overlay((*self._memtable, self._frozen))
+        self._checkpoint_wanted = threading.Event()
+        self._checkpointer: threading.Thread | None = threading.Thread(
+            target=self._checkpoint_loop, name="cow_btree-checkpoint", daemon=True
+        )
+        self._checkpointer.start()
+        if self._memtable_bytes >= checkpoint_bytes:
+            self._checkpoint_wanted.set()
 
-    def _read_free_list(self, head: int) -> tuple[list[list[int]], list[int]]:
-        """Return (per-container id chunks, container page ids) from the chain."""
+    def _read_free_list(
+        self, head: int, expected: int = FREE_LIST
+    ) -> tuple[list[list[int]], list[int]]:
+        """Return (per-page id chunks, page ids) from a container or log chain."""
         chunks: list[list[int]] = []
         containers: list[int] = []
         page_id = head
         while page_id != 0:
             raw = self._backend.read_page(page_id)
             marker, stored_page_id, next_page, count = _FL_HEADER.unpack_from(raw, 0)
-            if marker != FREE_LIST:
+            if marker != expected:
                 raise ValueError(
                     f"page {page_id} is not a free-list page "
-                    f"(expected marker {FREE_LIST}, found {marker})"
+                    f"(expected marker {expected}, found {marker})"
                 )
             if stored_page_id != page_id:
                 raise ValueError(
                     f"free-list page {page_id} describes itself as page "
                     f"{stored_page_id} (broken chain)"
                 )
-            offset = _FL_HEADER.size
-            chunk: list[int] = []
-            for _ in range(count):
-                (pid,) = _U32.unpack_from(raw, offset)
-                chunk.append(pid)
-                offset += 4
-            chunks.append(chunk)
+            chunks.append(list(struct.unpack_from(f"<{count}I", raw, _FL_HEADER.size)))
             containers.append(page_id)
             page_id = next_page
         containers.reverse()
         chunks.reverse()
         return chunks, containers
 
-    def _write_header(self, root_id: int) -> None:
-        """Write page 0 naming root_id as the published root."""
+    def _write_header(self, root_id: int, epoch: int) -> None:
+        """Write page 0 naming root_id, the root of epoch, as the published root."""
         raw = bytearray(self._backend.page_size)
         _HEADER_FMT.pack_into(
             raw,
@@ -136,128 +370,1180 @@ class Store:
             _HEADER_MARKER,
             root_id,
             self._free_list_head,
-            self._backend.page_size,
+            self._disk_page_size,
+            _HEADER_CHECKSUMS if isinstance(self._backend, ChecksumPageBackend) else 0,
+            self._free_log_pages[-1] if self._free_log_pages else 0,
+            len(self._free_log),
+            self._catalog_root,
+            epoch,
         )
         self._backend.write_page(0, bytes(raw))
+        self._page_bytes_written += len(raw)
+        self._stats.count("pages_written")
 
     @property
     def _ids_per_container(self) -> int:
         """How many uint32 page ids fit in one free-list container page."""
         return (self._backend.page_size - _FL_HEADER.size) // 4
 
-    def _write_container(self, index: int) -> None:
-        """Write container index with the slice of the free set it owns. """
+    def _write_chain_page(
+        self, marker: int, pages: list[int], index: int, ids: list[int]
+    ) -> None:
+        """Write pages[index] with its slice of ids, linked to pages[index - 1]."""
         max_per_page = self._ids_per_container
-        container_id = self._free_list_containers[index]
-        chunk = self._free_ids[index * max_per_page : (index + 1) * max_per_page]
-        next_page = self._free_list_containers[index - 1] if index else 0
+        page_id = pages[index]
+        chunk = ids[index * max_per_page : (index + 1) * max_per_page]
+        next_page = pages[index - 1] if index else 0
         raw = bytearray(self._backend.page_size)
-        _FL_HEADER.pack_into(raw, 0, FREE_LIST, container_id, next_page, len(chunk))
-        offset = _FL_HEADER.size
-        for pid in chunk:
-            _U32.pack_into(raw, offset, pid)
-            offset += 4
-        self._backend.write_page(container_id, bytes(raw))
+        _FL_HEADER.pack_into(raw, 0, marker, page_id, next_page, len(chunk))
+        struct.pack_into(f"<{len(chunk)}I", raw, _FL_HEADER.size, *chunk)
+        self._backend.write_page(page_id, bytes(raw))
+        self._page_bytes_written += len(raw)
+        self._stats.count("pages_written")
+        self._stats.count("free_list_pages_written")
 
     def _persist_free_list(self) -> None:
-        """Mirror self._free_ids onto the container chain.bite"""
+        """Make the free set durable for the next header write.
+
+        The container chain holds the whole set as of the last checkpoint
+        and the free log every change since, so a commit only writes the
+        log pages its own changes land on. Once the log outgrows the set
+        it describes, or one commit's changes would cost about as much as
+        rewriting the set (a parked reader letting go), the set is
+        checkpointed instead.
+        """
         max_per_page = self._ids_per_container
-        count = len(self._free_ids)
-        needed = max(1, -(-count // max_per_page))
-        while len(self._free_list_containers) < needed:
-            self._free_list_containers.append(self._backend.allocate_page())
+        limit = max(len(self._free_ids), 4 * max_per_page)
+        if (
+            self._free_checkpoint_wanted
+            or not self._free_list_containers
+            or len(self._free_log) + len(self._free_changes) > limit
+            or 2 * len(self._free_changes) > limit
+        ):
+            self._checkpoint_free_list()
+            return
+        if not self._free_changes:
+            return
+        start = len(self._free_log)
+        pages = self._free_log_pages
+        while start + len(self._free_changes) > len(pages) * max_per_page:
+            # Taking a free id for the log is itself a change to log.
+            if self._free_ids:
+                pages.append(self._pop_free())
+            else:
+                pages.append(self._backend.allocate_page())
+        self._free_log.extend(self._free_changes.values())
+        self._free_changes = {}
+        # Pages link to the one before, so a new page never touches its
+        # predecessor: only pages holding new entries are written.
+        for index in range(start // max_per_page, len(pages)):
+            self._write_chain_page(FREE_LOG, pages, index, self._free_log)
 
-        start = self._free_clean // max_per_page
-        end = max(needed, self._free_dirty_containers)
-        self._free_dirty_containers = end
-        for index in range(start, end):
-            self._write_container(index)
+    def _checkpoint_free_list(self) -> None:
+        """Rewrite the whole free set onto the container chain and empty the log.
 
+        The log pages are retired, not freed: the durable header still
+        names them, and recovery from it replays them over this
+        checkpoint, so they must be neither listed free in it nor reused
+        before the header naming it is. Containers are kept even when the
+        set shrinks, written with a count of 0.
+        """
+        self._stats.count("free_list_checkpoints")
+        for page_id in self._free_log_pages:
+            self._retire_page_id(page_id)
+        self._free_log_pages = []
+        self._free_log = []
+        self._free_changes = {}
+        self._free_checkpoint_wanted = False
+        max_per_page = self._ids_per_container
+        needed = max(1, -(-len(self._free_ids) // max_per_page))
+        while len(self._free_list_containers) < needed:
+            self._free_list_containers.append(self._backend.allocate_page())
+        for index in range(len(self._free_list_containers)):
+            self._write_chain_page(
+                FREE_LIST, self._free_list_containers, index, self._free_ids
+            )
         self._free_list_head = self._free_list_containers[-1]
-        self._free_clean = count
-        self._free_dirty_containers = needed
 
     # public API
 
-    def put(self, key: bytes, value: bytes) -> None:
-        """Insert or overwrite key with value."""
+    def put(self, key: bytes, value: bytes, durable: bool = True) -> None:
+        """Insert or overwrite key with value.
+
+        durable=False only matters in group-commit mode: the call returns
+        once the write is visible to readers, before its header is flushed.
+        With flush_interval no write waits for durability; see sync().
+        """
         key = _as_bytes(key, "key")
         value = _as_bytes(value, "value")
+        self._commit([(key, value)], durable)
+
+    def delete(self, key: bytes, durable: bool = True) -> bool:
+        """Remove key, returning whether it was present."""
+        key = _as_bytes(key, "key")
+        return self._commit([(key, None)], durable)
+
+    def write_batch(self) -> "WriteBatch":
+        """Start a batch of puts and deletes that commits as one unit."""
+        return WriteBatch(self)
+
+    def bulk_load(
+        self,
+        items: Iterable[tuple[bytes, bytes]],
+        fill_factor: float = 1.0,
+        presorted: bool = True,
+        sort_buffer_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        """Build the tree of an empty store from (key, value) pairs in one commit.
+
+        Leaves and internal levels are written bottom-up in a single
+        sequential pass, each node packed to fill_factor of a page. Keys
+        must be strictly increasing unless presorted is False, in which
+        case the input is first put through an external merge sort that
+        buffers sort_buffer_bytes in memory. Duplicate or out-of-order
+        keys raise ValueError and leave the store unchanged.
+        """
+        pairs = (
+            (_as_bytes(key, "key"), _as_bytes(value, "value")) for key, value in items
+        )
+        if not presorted:
+            pairs = sort_items(pairs, sort_buffer_bytes)
+
+        def counted(
+            pairs: Iterable[tuple[bytes, bytes]],
+        ) -> Iterator[tuple[bytes, bytes]]:
+            for key, value in pairs:
+                self._user_bytes += len(key) + len(value)
+                yield key, self._spill(value)
+
+        def build(root_id: int) -> int:
+            root = self._allocator.read_node(root_id)
+            if not isinstance(root, LeafNode) or root.keys or any(self._overlay):
+                raise ValueError("bulk_load requires an empty store")
+            new_root_id = self._tree.build(counted(pairs), fill_factor)
+            self._retire_page_id(root_id)
+            return new_root_id
+
+        self._commit_with(build)
+
+    def _commit(
+        self, ops: list[tuple[bytes, bytes | None]], durable: bool = True
+    ) -> bool:
+        """Apply sorted, de-duplicated ops and publish them as one commit."""
+        if self._wal is not None:
+            changed = self._commit_to_wal(ops, durable)
+        elif self._group_commit:
+            changed = self._commit_grouped(_CommitRequest(ops, durable))
+        else:
+            changed = self._commit_with(lambda root_id: self._apply(root_id, ops))
+        if changed:
+            self._user_bytes += _ops_bytes(ops)
+        return changed
+
+    def _commit_with(
+        self,
+        build: Callable[[int], int],
+        on_publish: Callable[[], None] | None = None,
+    ) -> bool:
+        """Publish the root build(current root) returns, as one commit.
+
+        build runs under the write lock inside a write attempt, so any
+        exception it raises rolls back every page it allocated. Returning
+        the current root unchanged skips the commit, and False is returned.
+        With on_publish, the root is published as soon as the header is
+        written and on_publish is called before the header flush. Pages
+        the commit retired are queued for reclamation once the new root is
+        published, even if the header flush then fails.
+        """
+        self._check_writable()
+        stats = self._stats
+        stats.begin_commit()
         with self._write_lock:
+            stats.locked()
             self._begin_attempt()
             new_epoch = self._epoch + 1
             try:
-                new_root_id = self._tree.put(self._root_id, key, value)
-                self._persist_free_list()
-                self._backend.flush()
+                new_root_id = build(self._root_id)
+                stats.lap("build")
+                staged = self._staged_trees
+                if new_root_id == self._root_id and staged is None:
+                    self._finish_attempt()
+                    stats.abort_commit()
+                    return False
+                if self._flush_interval is None:
+                    self._persist_free_list()
+                    stats.lap("free_list")
+                    self._backend.flush()
+                    stats.lap("flush_pages")
             except BaseException:
                 self._abort_attempt()
+                stats.abort_commit()
                 raise
             self._finish_attempt()
-            self._write_header(new_root_id)
-            self._backend.flush()
+            trees = self._trees
+            if staged is not None:
+                self._catalog_root, trees = staged
+            if self._flush_interval is None:
+                self._write_header(new_root_id, new_epoch)
+                stats.lap("header")
+                try:
+                    if on_publish is not None:
+                        self._publish(new_root_id, new_epoch, trees)
+                        on_publish()
+                    self._backend.flush()
+                except BaseException:
+                    if self._epoch == new_epoch:
+                        # Published: no new reader can reach them. The
+                        # next commit's header makes their reuse safe.
+                        self._queue_retired(new_epoch)
+                    stats.abort_commit()
+                    raise
+                stats.lap("flush_header")
+                self._durable_epoch = new_epoch
 
-            for page_id in self._pending_this_commit:
-                self._pending.append((new_epoch, page_id))
-            self._pending_this_commit = []
+            self._queue_retired(new_epoch)
 
-            with self._reader_lock:
-                self._root_id = new_root_id
-                self._epoch = new_epoch
+            if on_publish is None:
+                self._publish(new_root_id, new_epoch, trees)
 
             self._reclaim(new_epoch)
+            stats.lap("reclaim")
+            record = None
+            if stats.enabled:
+                record = stats.end_commit(new_epoch, self._gauges())
+        stats.emit(record)
+        return True
+
+    def _queue_retired(self, epoch: int) -> None:
+        """Move the pages retired since the last call to _pending, at epoch."""
+        self._stats.count("pages_retired", len(self._pending_this_commit))
+        for page_id in self._pending_this_commit:
+            self._pending.append((epoch, page_id))
+        self._pending_this_commit = []
+
+    def _check_writable(self) -> None:
+        if self._read_only:
+            raise RuntimeError("store was opened read_only")
+
+    def _apply(self, root_id: int, ops: list[tuple[bytes, bytes | None]]) -> int:
+        """BTree.apply, after moving values past the threshold to overflow pages.
+
+        Runs inside a commit's build, so the chains are allocated within
+        its write attempt and rolled back with it.
+        """
+        if self._overflow_threshold is not None:
+            ops = [(key, self._spill(value)) for key, value in ops]
+        return self._tree.apply(root_id, ops)
+
+    def _spill(self, value: bytes | None) -> bytes | None:
+        threshold = self._overflow_threshold
+        if value is None or threshold is None or len(value) <= threshold:
+            return value
+        return self._allocator.write_overflow(value)
+
+    def _resolve(self, value: bytes | None) -> bytes | None:
+        """The bytes a value read from the tree stands for."""
+        if type(value) is OverflowRef:
+            return read_value(self._backend, value)
+        return value
+
+    def write_amplification(self) -> dict[str, float]:
+        """Bytes written to tree pages and to the log per user byte committed.
+
+        User bytes are the keys and values of committed puts plus the keys
+        of effective deletes; page bytes count every node, free-list and
+        header page write, including those of checkpoints.
+        """
+        wal_bytes = self._wal.bytes_written if self._wal is not None else 0
+        user = self._user_bytes
+        return {
+            "user_bytes": user,
+            "page_bytes": self._page_bytes_written,
+            "wal_bytes": wal_bytes,
+            "amplification": (
+                (self._page_bytes_written + wal_bytes) / user if user else 0.0
+            ),
+        }
+
+    def _publish(self, root_id: int, epoch: int, trees: dict[bytes, int]) -> None:
+        with self._reader_lock:
+            self._state = (epoch, root_id, self._state[2], trees)
+
+    def _publish_overlay(self, overlay: tuple[_Layer, ...]) -> None:
+        with self._reader_lock:
+            epoch, root_id, _, trees = self._state
+            self._state = (epoch, root_id, overlay, trees)
+
+    @property
+    def _epoch(self) -> int:
+        return self._state[0]
+
+    @property
+    def _root_id(self) -> int:
+        return self._state[1]
+
+    @property
+    def _overlay(self) -> tuple[_Layer, ...]:
+        """Log-resident writes laid over the tree, newest layer first."""
+        return self._state[2]
+
+    @property
+    def _trees(self) -> dict[bytes, int]:
+        """Root id of each named tree; never mutated once published."""
+        return self._state[3]
+
+    # named trees
+
+    def open_tree(self, name: str, create: bool = True) -> "Tree":
+        """Handle on the named tree, created empty (in its own commit) if missing.
+
+        With create=False a missing tree raises KeyError. Named trees
+        cannot be combined with wal_path, whose log only covers the
+        store's own keys.
+        """
+        key = _tree_name(name)
+        if self._wal is not None:
+            raise ValueError("named trees cannot be used with wal_path")
+        if key not in self._current_trees():
+            if not create:
+                raise KeyError(f"no tree named {name!r}")
+
+            def build(root_id: int) -> int:
+                if key not in self._trees:  # another thread may have won
+                    page_id = self._allocator.allocate()
+                    self._allocator.write_node(page_id, LeafNode())
+                    self._stage_trees({key: page_id})
+                return root_id
+
+            self._commit_with(build)
+        return Tree(self, key)
+
+    def drop_tree(self, name: str) -> None:
+        """Delete the named tree and every page it holds, as one commit."""
+        key = _tree_name(name)
+
+        def build(root_id: int) -> int:
+            if key not in self._trees:
+                raise KeyError(f"no tree named {name!r}")
+            self._retire_subtree(self._trees[key])
+            self._stage_trees({key: None})
+            return root_id
+
+        self._commit_with(build)
+
+    def tree_names(self) -> list[str]:
+        """Names of the named trees, sorted."""
+        return sorted(name.decode() for name in self._current_trees())
+
+    def _current_trees(self) -> dict[bytes, int]:
+        """_trees, after a read_only store has caught up with the header."""
+        if not self._read_only:
+            return self._trees
+        token, state = self._pin_current()
+        self._end_read(token)
+        return state[3]
+
+    def _commit_trees(
+        self,
+        ops: dict[bytes | None, list[tuple[bytes, bytes | None]]],
+        durable: bool = True,
+    ) -> bool:
+        """Commit sorted ops for several trees at once; None is the store's own.
+
+        Ops for the store's own keys alone take the usual path (group
+        commit, WAL); anything touching a named tree is one direct commit.
+        """
+        if list(ops) == [None]:
+            return self._commit(ops[None], durable)
+
+        def build(root_id: int) -> int:
+            trees = self._trees
+            changed = {}
+            for name, tree_ops in ops.items():
+                if name is None:
+                    continue
+                if name not in trees:
+                    raise KeyError(f"no tree named {name.decode()!r}")
+                new_root = self._apply(trees[name], tree_ops)
+                if new_root != trees[name]:
+                    changed[name] = new_root
+            if changed:
+                self._stage_trees(changed)
+            return self._apply(root_id, ops[None]) if None in ops else root_id
+
+        changed = self._commit_with(build)
+        if changed:
+            self._user_bytes += sum(_ops_bytes(tree_ops) for tree_ops in ops.values())
+        return changed
+
+    def _stage_trees(self, changes: dict[bytes, int | None]) -> None:
+        """Record new roots (None: dropped) in the catalog, within the attempt.
+
+        The catalog is an ordinary tree mapping names to root ids, so the
+        update is one more path copy; the header names its new root and
+        readers get the new roots when the commit publishes.
+        """
+        catalog, trees = self._staged_trees or (self._catalog_root, self._trees)
+        if not catalog:
+            catalog = self._allocator.allocate()
+            self._allocator.write_node(catalog, LeafNode())
+        trees = dict(trees)
+        for name, root in changes.items():
+            if root is None:
+                del trees[name]
+            else:
+                trees[name] = root
+        catalog_ops = [
+            (name, None if root is None else _CATALOG_ROOT.pack(root))
+            for name, root in sorted(changes.items())
+        ]
+        self._staged_trees = (self._tree.apply(catalog, catalog_ops), trees)
+
+    def _retire_subtree(self, page_id: int) -> None:
+        """Retire every page of the tree at page_id, overflow chains included."""
+        node = self._allocator.read_node(page_id)
+        self._allocator.retire(page_id)
+        if isinstance(node, LeafNode):
+            for value in node.values:
+                if type(value) is OverflowRef:
+                    self._allocator.retire_overflow(value)
+        else:
+            for child in node.children:
+                self._retire_subtree(child)
+
+    def _relocate_trees(self, cutoff: int, budget: int, overflow: bool) -> None:
+        """Compaction's share for named trees: move their pages, then the catalog's.
+
+        budget bounds the pages the whole attempt writes; the catalog's
+        height is kept back for the path copy that records new roots.
+        With overflow, the trees' overflow chains past cutoff move too.
+        """
+        reserve = self._tree.height(self._catalog_root)
+        changed = {}
+        for name, root in sorted(self._trees.items()):
+            left = budget - len(self._allocated_this_attempt) - reserve
+            if left < 1:
+                break
+            new_root = self._tree.relocate(root, cutoff, left)
+            if overflow:
+                left = budget - len(self._allocated_this_attempt) - reserve
+                new_root = self._tree.relocate_overflow(new_root, cutoff, left)
+            if new_root != root:
+                changed[name] = new_root
+        if changed:
+            self._stage_trees(changed)
+        catalog, trees = self._staged_trees or (self._catalog_root, self._trees)
+        left = budget - len(self._allocated_this_attempt)
+        if left > 0:
+            new_catalog = self._tree.relocate(catalog, cutoff, left)
+            if new_catalog != catalog:
+                self._staged_trees = (new_catalog, trees)
+
+    # compaction
+
+    def compact(self, max_pages_per_step: int = 64) -> dict[str, int]:
+        """Move live pages toward the front of the file and truncate the tail.
+
+        Runs compact_step until it stops making progress, so the write
+        lock is only ever held for one bounded step and other writers
+        interleave with the compaction. Pages still pinned by readers or
+        snapshots stay where they are until a later call. Returns the
+        number of pages moved and the file size before and after, in
+        bytes, with the difference as reclaimed_bytes.
+        """
+        page_size = self._disk_page_size
+        bytes_before = self._backend.page_count * page_size
+        moved = 0
+        while True:
+            step = self.compact_step(max_pages_per_step)
+            if not step:
+                break
+            moved += step
+        self._truncate_free_tail()
+        bytes_after = self._backend.page_count * page_size
+        return {
+            "pages_moved": moved,
+            "bytes_before": bytes_before,
+            "bytes_after": bytes_after,
+            "reclaimed_bytes": bytes_before - bytes_after,
+        }
+
+    def compact_step(self, max_pages: int = 64) -> int:
+        """Relocate up to max_pages pages from the end of the file, as one commit.
+
+        Live pages past a cutoff are copied onto the lowest free ids, their
+        parents rewritten copy-on-write up to a new root; free-list pages
+        past it move as well. The cutoff is as low as the free ids in front
+        of it allow (see _compaction_cutoff). The old copies are retired
+        like any other. Returns how many pages left the tail, 0 once nothing
+        can.
+        """
+        if max_pages < 1:
+            raise ValueError("max_pages must be positive")
+        # Pages earlier steps retired are only reusable once durable.
+        self.sync()
+        moved = 0
+
+        def build(root_id: int) -> int:
+            nonlocal moved
+            self._reclaim(self._epoch)
+            cutoff, spare = self._compaction_cutoff(self._tree.height(root_id))
+            budget = min(max_pages, spare)
+            containers = list(self._free_list_containers)
+            try:
+                for index, page_id in enumerate(containers):
+                    # Keep one id back for the root copy below.
+                    if page_id >= cutoff and budget > 1:
+                        self._free_list_containers[index] = self._allocate_page_id()
+                        self._retire_page_id(page_id)
+                        self._free_checkpoint_wanted = True
+                        budget -= 1
+                # The checkpoint this commit ends with retires the log
+                # pages, so ones in the tail count as moved.
+                log_moved = sum(page_id >= cutoff for page_id in self._free_log_pages)
+                if log_moved:
+                    self._free_checkpoint_wanted = True
+                new_root = self._tree.relocate(root_id, cutoff, budget)
+                overflow = self._overflow_in_tail(cutoff)
+                if overflow:
+                    left = min(max_pages, spare) - len(self._allocated_this_attempt)
+                    new_root = self._tree.relocate_overflow(new_root, cutoff, left)
+                if self._catalog_root:
+                    self._relocate_trees(cutoff, min(max_pages, spare), overflow)
+                if (
+                    new_root == root_id
+                    and self._staged_trees is None
+                    and (self._pending_this_commit or log_moved)
+                ):
+                    # Only free-list pages moved; a commit still needs a
+                    # new root to publish them with.
+                    new_root = self._allocate_page_id()
+                    root = self._allocator.read_node(root_id)
+                    self._allocator.write_node(new_root, root)
+                    self._retire_page_id(root_id)
+            except BaseException:
+                self._free_list_containers = containers
+                raise
+            moved = log_moved + sum(
+                page_id >= cutoff for page_id in self._pending_this_commit
+            )
+            return new_root
+
+        self._commit_with(build)
+        return moved
+
+    def _overflow_in_tail(self, cutoff: int) -> bool:
+        """Whether a live overflow page lies at or past cutoff."""
+        dead = set(self._free_ids)
+        dead.update(page_id for _, page_id in self._pending)
+        dead.update(self._pending_this_commit)
+        backend = self._backend
+        return any(
+            backend.read_page_view(page_id)[0] == OVERFLOW
+            for page_id in range(cutoff, backend.page_count)
+            if page_id not in dead
+        )
+
+    def _compaction_cutoff(self, height: int) -> tuple[int, int]:
+        """Lowest page id the file could be cut at; with the free ids below it.
+
+        Everything not free at or past the cutoff has to be copied into a
+        free id in front of it, with a root-to-leaf path (height pages)
+        to spare for the ancestors such a copy rewrites.
+        """
+        free = set(self._free_ids)
+        cutoff = self._backend.page_count
+        spare, used = len(free), 0
+        while cutoff > 1:
+            if cutoff - 1 in free:
+                next_spare, next_used = spare - 1, used
+            else:
+                next_spare, next_used = spare, used + 1
+            if next_spare < next_used + height:
+                break
+            cutoff, spare, used = cutoff - 1, next_spare, next_used
+        return cutoff, spare
+
+    def _truncate_free_tail(self) -> None:
+        """Cut free pages off the end of the file.
+
+        The shortened free list and the header naming it are made durable
+        before the backend shrinks, so a crash in between only leaks the
+        tail rather than leaving free ids past the end of the file.
+        """
+        with self._write_lock:
+            if self._durable_epoch != self._epoch:
+                self._make_durable()
+            self._reclaim(self._epoch)
+            free = set(self._free_ids)
+            old_count = self._backend.page_count
+            count = old_count
+            while count - 1 in free:
+                count -= 1
+            if count == old_count:
+                return
+            self._free_ids = sorted(
+                page_id for page_id in self._free_ids if page_id < count
+            )
+            self._free_checkpoint_wanted = True
+            self._make_durable()
+            try:
+                self._backend.truncate(count)
+            except NotImplementedError:
+                # Keep the tail allocatable; the next commit persists it.
+                for page_id in range(count, old_count):
+                    self._push_free(page_id)
+
+    # durability
+
+    def sync(self) -> None:
+        """Make every commit published so far durable.
+
+        Only needed with flush_interval, where commits are published
+        before they are durable; otherwise every commit is durable when it
+        returns and this is a no-op.
+        """
+        self._check_writable()
+        with self._write_lock:
+            if self._durable_epoch != self._epoch:
+                self._make_durable()
+                self._reclaim(self._epoch)
+
+    def _make_durable(self) -> None:
+        """Persist the free set, then name the current root in the header.
+
+        The same two flushes as a commit: everything the header points at
+        is on disk before the header is. Called with the write lock held.
+        """
+        self._persist_free_list()
+        self._backend.flush()
+        self._write_header(self._root_id, self._epoch)
+        self._backend.flush()
+        self._durable_epoch = self._epoch
+        # Log pages a checkpoint retired, reclaimable like a commit's.
+        self._queue_retired(self._epoch)
+
+    def _flush_loop(self) -> None:
+        while not self._flusher_stop.wait(self._flush_interval):
+            try:
+                self.sync()
+            except Exception:
+                # Nothing new is durable; the next interval, sync() or
+                # close() retries, and the latter two surface the error.
+                pass
+
+    def _stop_flusher(self) -> None:
+        thread = self._flusher
+        self._flusher = None
+        self._flusher_stop.set()
+        thread.join()
+
+    # write-ahead log
+
+    def _commit_to_wal(
+        self, ops: list[tuple[bytes, bytes | None]], durable: bool
+    ) -> bool:
+        """Log ops with one append and publish them through the overlay.
+
+        The ops become a new memtable layer rather than a copy of the
+        memtable. Counting the ops merged into each layer, the next older
+        layer is merged into the new one while it holds at most twice as
+        many, so the counts more than double towards the oldest layer:
+        lookups check O(log n) layers, and a commit copies amortized
+        O(len(ops) * log n) entries.
+        """
+        with self._wal_lock:
+            error, self._checkpoint_error = self._checkpoint_error, None
+            if error is not None:
+                raise RuntimeError(
+                    "background checkpoint failed; its writes are still in the log"
+                ) from error
+            token, root_id, overlay = self._begin_read_state()
+            try:
+                changed = any(
+                    value is not None
+                    or _lookup(self._tree, root_id, overlay, key) is not None
+                    for key, value in ops
+                )
+            finally:
+                self._end_read(token)
+            if not changed:
+                return False
+            self._wal.append(ops, sync=durable)
+            layer, merged = _Layer(ops), len(ops)
+            older, older_ops = self._memtable, self._memtable_ops
+            while older and older_ops[0] <= 2 * merged:
+                layer = _Layer({**older[0], **layer})
+                merged += older_ops[0]
+                older, older_ops = older[1:], older_ops[1:]
+            self._memtable = (layer, *older)
+            self._memtable_ops = (merged, *older_ops)
+            self._memtable_bytes += _ops_bytes(ops)
+            self._publish_overlay((*self._memtable, self._frozen))
+            if self._memtable_bytes >= self._checkpoint_bytes:
+                self._checkpoint_wanted.set()
+        return True
+
+    def checkpoint(self) -> None:
+        """Write everything in the log into tree pages and drop the log.
+
+        Runs in the background once checkpoint_bytes of log accumulate;
+        calling it directly checkpoints synchronously. Writers keep
+        appending to a fresh log segment while the tree commit runs. If
+        a background checkpoint fails, the next commit raises its error.
+        A no-op for stores opened without a WAL.
+        """
+        if self._wal is None:
+            return
+        with self._checkpoint_lock:
+            with self._wal_lock:
+                # A previous failed checkpoint leaves its writes frozen.
+                frozen = _collapse((*self._memtable, self._frozen))
+                segments = self._wal.rotate()
+                self._frozen = frozen
+                self._memtable = ()
+                self._memtable_ops = ()
+                self._memtable_bytes = 0
+                self._publish_overlay((frozen,))
+            if frozen:
+                self._commit_with(
+                    lambda root_id: self._apply(root_id, list(frozen.items()))
+                )
+            with self._wal_lock:
+                self._frozen = _Layer()
+                self._checkpoint_error = None
+                self._publish_overlay((*self._memtable, self._frozen))
+            self._wal.remove(segments)
+
+    def _checkpoint_loop(self) -> None:
+        while True:
+            self._checkpoint_wanted.wait()
+            self._checkpoint_wanted.clear()
+            if self._checkpointer is None:
+                return
+            try:
+                self.checkpoint()
+            except Exception as exc:
+                # The writes stay in the overlay and the log; the next
+                # trigger or close() retries, and the next commit raises.
+                self._checkpoint_error = exc
+
+    def _stop_checkpointer(self) -> None:
+        thread = self._checkpointer
+        self._checkpointer = None
+        self._checkpoint_wanted.set()
+        thread.join()
+
+    # group commit
+
+    def _commit_grouped(self, request: "_CommitRequest") -> bool:
+        """Queue request and wait until some leader has committed it.
+
+        The first writer to find no leader running takes the whole queue
+        and commits it; writers arriving meanwhile queue up behind it and
+        go out together in the next group.
+        """
+        with self._group_cond:
+            self._group_queue.append(request)
+            while not request.done:
+                if not self._group_leader:
+                    self._group_leader = True
+                    group = self._group_queue
+                    self._group_queue = []
+                    break
+                self._group_cond.wait()
+            else:
+                return request.result()
+        try:
+            self._lead_group(group)
+        except BaseException as exc:
+            # Nobody else will pick these requests up again.
+            for req in group:
+                if not req.done:
+                    req.error = exc
+            self._release(group, durable=True)
+            raise
+        finally:
+            with self._group_cond:
+                self._group_leader = False
+                self._group_cond.notify_all()
+        return request.result()
+
+    def _lead_group(self, group: list["_CommitRequest"]) -> None:
+        """Commit every request in group with one new root and header.
+
+        Requests apply in queue order, so a later write to a key wins. If
+        the merged commit fails before publishing, each request is retried
+        on its own so that only the offending ones see the error.
+        """
+
+        def build(root_id: int) -> int:
+            merged: dict[bytes, bytes | None] = {}
+            for req in group:
+                req.changed = False
+                for key, value in req.ops:
+                    if value is not None:
+                        req.changed = True
+                    elif not req.changed:
+                        before = merged[key] if key in merged else (
+                            self._tree.get(root_id, key)
+                        )
+                        req.changed = before is not None
+                    merged[key] = value
+            return self._apply(root_id, sorted(merged.items()))
+
+        published = False
+
+        def release_non_durable() -> None:
+            nonlocal published
+            published = True
+            self._release(group, durable=False)
+
+        try:
+            self._commit_with(build, release_non_durable)
+        except Exception as exc:
+            if published:
+                for req in group:
+                    req.error = exc
+                self._release(group, durable=True)
+                return
+            for req in group:
+                try:
+                    req.changed = self._commit_with(
+                        lambda root_id: self._apply(root_id, req.ops)
+                    )
+                except Exception as retry_exc:
+                    req.error = retry_exc
+        self._release(group, durable=True)
+
+    def _release(self, group: list["_CommitRequest"], durable: bool) -> None:
+        """Wake the requests in group that are now allowed to return."""
+        with self._group_cond:
+            for req in group:
+                if durable or not req.durable:
+                    req.done = True
+            self._group_cond.notify_all()
 
     def get(self, key: bytes) -> bytes | None:
         """Look up key, returning its value or None if absent."""
         key = _as_bytes(key, "key")
-        token, root_id = self._begin_read()
+        token, root_id, overlay = self._begin_read_state()
+        try:
+            return self._resolve(_lookup(self._tree, root_id, overlay, key))
+        finally:
+            self._end_read(token)
+
+    def multi_get(self, keys: Iterable[bytes]) -> list[bytes | None]:
+        """Look up many keys from one consistent state, in input order.
+
+        The batch is sorted and walks the tree once, so pages shared by
+        several keys' paths are read and decoded once.
+        """
+        keys = [_as_bytes(key, "key") for key in keys]
+        token, root_id, overlay = self._begin_read_state()
         try:
-            return self._tree.get(root_id, key)
+            values = _multi_lookup(self._tree, root_id, overlay, keys)
+            return [self._resolve(value) for value in values]
         finally:
             self._end_read(token)
 
+    def open_value(self, key: bytes) -> "ValueReader | None":
+        """Stream the value of key, or return None if it is absent.
+
+        A value in overflow pages is read one page at a time as the
+        reader is consumed, so it never has to be in memory whole; the
+        reader keeps its epoch pinned until it is exhausted or closed.
+        """
+        key = _as_bytes(key, "key")
+        token, root_id, overlay = self._begin_read_state()
+        try:
+            value = _lookup(self._tree, root_id, overlay, key)
+        except BaseException:
+            self._end_read(token)
+            raise
+        return self._value_reader(token, value)
+
+    def _value_reader(
+        self, token: ReaderToken, value: bytes | None
+    ) -> "ValueReader | None":
+        """Wrap value in a ValueReader that releases token when done."""
+        if type(value) is not OverflowRef:
+            self._end_read(token)
+            if value is None:
+                return None
+            return ValueReader(self, None, iter((value,)), len(value))
+        return ValueReader(self, token, iter_chunks(self._backend, value), value.length)
+
+    def scan(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        reverse: bool = False,
+        limit: int | None = None,
+    ) -> "Cursor":
+        """Iterate (key, value) pairs with start <= key < end, lazily.
+
+        The cursor reads one snapshot and keeps its reader epoch
+        registered until it is exhausted or closed, so pages it may still
+        visit are not recycled underneath it. Close cursors you abandon
+        early (or use them as context managers).
+        """
+        start, end = _check_scan_args(start, end, limit)
+        token, root_id, overlay = self._begin_read_state()
+        return self._open_cursor(token, root_id, overlay, start, end, reverse, limit)
+
+    def snapshot(self) -> "Snapshot":
+        """Pin the current state for consistent reads until closed.
+
+        The snapshot keeps its reader epoch registered, so every read
+        through it sees the same root and nothing it can reach is
+        reclaimed; close it (or use it as a context manager) promptly,
+        since it holds back the reuse of every page retired after it.
+        """
+        token, (epoch, root_id, overlay, _) = self._pin_current()
+        with self._reader_lock:
+            self._snapshot_epochs[token] = epoch
+        return Snapshot(self, token, root_id, overlay, epoch)
+
+    def snapshot_stats(self) -> list[dict[str, int]]:
+        """Epoch and pages held back from reclamation for each live snapshot."""
+        with self._write_lock:
+            with self._reader_lock:
+                epochs = sorted(self._snapshot_epochs.values())
+            return [
+                {
+                    "epoch": epoch,
+                    "held_pages": sum(1 for tag, _ in self._pending if tag > epoch),
+                }
+                for epoch in epochs
+            ]
+
+    def _open_cursor(
+        self,
+        token: ReaderToken,
+        root_id: int,
+        overlay: tuple[_Layer, ...],
+        start: bytes | None,
+        end: bytes | None,
+        reverse: bool,
+        limit: int | None,
+    ) -> "Cursor":
+        """Wrap a scan of root_id in a Cursor that releases token."""
+        try:
+            items = self._tree.scan(root_id, start, end, reverse)
+            if any(overlay):
+                items = _overlay_scan(items, overlay, start, end, reverse)
+        except BaseException:
+            self._end_read(token)
+            raise
+        return Cursor(self, token, items, limit)
+
+    def cache_stats(self) -> dict[str, int]:
+        """Hit/miss/eviction counters and occupancy of the decoded-node cache."""
+        return self._node_cache.stats()
+
+    def stats(self) -> dict:
+        """Instrumentation totals plus the store's current gauges.
+
+        "counters" and "seconds" (per commit phase, see cow_btree.stats)
+        only move when the store was opened with stats=True; the gauges
+        (pending_reclaim, active_readers, free_pages, page_count,
+        unsynced_commits) are always current.
+        """
+        with self._write_lock:
+            return {**self._stats.snapshot(), **self._gauges()}
+
+    def _gauges(self) -> dict[str, int]:
+        return {
+            "pending_reclaim": len(self._pending),
+            "active_readers": len(self._active_readers),
+            "free_pages": len(self._free_ids),
+            "page_count": self._backend.page_count,
+            "unsynced_commits": self._epoch - self._durable_epoch,
+        }
+
     def close(self) -> None:
-        """Flush the final free-list state and release the backend."""
+        """Flush the final free-list state and release the backend.
+
+        With a WAL, the log is checkpointed into the tree first. The free
+        set is checkpointed too, so a closed file has an empty free log.
+        """
+        if self._wal is not None and self._checkpointer is not None:
+            self._stop_checkpointer()
+            self.checkpoint()
+            self._wal.close()
+        if self._flusher is not None:
+            self._stop_flusher()
         with self._write_lock:
             if self._closed:
                 return
             self._closed = True
+            if self._read_only:
+                self._header_view.release()
+                self._reader_table.close()
+                self._backend.close()
+                return
             try:
+                if self._durable_epoch != self._epoch:
+                    self._make_durable()
+                self._reclaim(self._epoch)
+                self._free_checkpoint_wanted = True
+                self._make_durable()
+                # The checkpoint retired the old log pages; now that the
+                # header no longer names them, a second one frees them.
                 self._reclaim(self._epoch)
-                self._persist_free_list()
-                self._backend.flush()
-                self._write_header(self._root_id)
-                self._backend.flush()
+                if self._free_changes:
+                    self._free_checkpoint_wanted = True
+                    self._make_durable()
             finally:
                 self._backend.close()
+                if self._reader_table is not None:
+                    self._reader_table.close()
 
     # reader epoch registry
 
-    def _begin_read(self) -> tuple[int, int]:
+    def _begin_read(self) -> tuple[ReaderToken, int]:
+        token, (_, root_id, _, _) = self._pin_current()
+        return token, root_id
+
+    def _begin_read_state(
+        self,
+    ) -> tuple[ReaderToken, int, tuple[_Layer, ...]]:
+        """Register a reader; return its token, root and the WAL overlay."""
+        token, (_, root_id, overlay, _) = self._pin_current()
+        return token, root_id, overlay
+
+    def _begin_read_tree(self, name: bytes) -> tuple[ReaderToken, int]:
+        """Register a reader; return its token and the named tree's root."""
+        token, (_, _, _, trees) = self._pin_current()
+        if name not in trees:
+            self._end_read(token)
+            raise KeyError(f"no tree named {name.decode()!r}")
+        return token, trees[name]
+
+    def _pin_current(
+        self,
+    ) -> tuple[
+        ReaderToken,
+        tuple[int, int, tuple[_Layer, ...], dict[bytes, int]],
+    ]:
+        """Pin the published epoch and return the state it belongs to.
+
+        The pin is only trusted once the published epoch is seen unchanged
+        after it: a writer publishes before it computes the minimum pinned
+        epoch in _reclaim, so a commit that slipped in between either sees
+        this pin or makes the check fail and the reader retry.
+        """
+        if self._read_only:
+            return self._pin_shared()
+        while True:
+            state = self._state
+            token = self._readers.pin(state[0])
+            if self._state[0] == state[0]:
+                return token, state
+            self._readers.unpin(token)
+
+    def _pin_shared(
+        self,
+    ) -> tuple[
+        ReaderToken,
+        tuple[int, int, tuple[_Layer, ...], dict[bytes, int]],
+    ]:
+        """_pin_current for read_only: pin the header's epoch in the reader table.
+
+        The same handshake across processes: the writer writes the header
+        before ReaderTable.min_epoch reads the table, so the pin is only
+        trusted once the header is seen unchanged after it. That check
+        also rejects a header read while the writer was rewriting it.
+        """
+        table = self._reader_table
+        while True:
+            header = _HEADER_FMT.unpack_from(self._header_view, 0)
+            table.pin(header[-1])
+            if _HEADER_FMT.unpack_from(self._header_view, 0) == header:
+                break
+            table.unpin(header[-1])
+        try:
+            state = self._adopt(header[-1], header[1], header[7])
+        except BaseException:
+            table.unpin(header[-1])
+            raise
+        return self._readers.pin(state[0]), state
+
+    def _adopt(
+        self, epoch: int, root_id: int, catalog_root: int
+    ) -> tuple[int, int, tuple[_Layer, ...], dict[bytes, int]]:
+        """The state a pinned header names, published unless a newer one was.
+
+        Pages may have been reused since the last epoch seen, so the node
+        cache is emptied before a newer state is published, and the file
+        is remapped for pages the writer appended.
+        """
+        state = self._state
+        if state[0] == epoch:
+            return state
         with self._reader_lock:
-            token = self._next_reader_token
-            self._next_reader_token += 1
-            epoch = self._epoch
-            self._active_readers[token] = epoch
-            return token, self._root_id
+            state = self._state
+            if state[0] == epoch:
+                return state
+            newer = epoch > state[0]
+            if newer:
+                self._backend.refresh()
+                self._node_cache.clear()
+            if catalog_root != self._shared_catalog[0]:
+                roots = {}
+                if catalog_root:
+                    roots = {
+                        name: _CATALOG_ROOT.unpack(value)[0]
+                        for name, value in self._tree.scan(catalog_root)
+                    }
+                if not newer:
+                    return (epoch, root_id, (), roots)
+                self._shared_catalog = (catalog_root, roots)
+            state = (epoch, root_id, (), self._shared_catalog[1])
+            if newer:
+                self._state = state
+            return state
+
+    def _pin_epoch(self, epoch: int) -> ReaderToken:
+        """Register a reader at an epoch another reader already holds."""
+        if self._read_only:
+            self._reader_table.pin(epoch)
+        return self._readers.pin(epoch)
 
-    def _end_read(self, token: int) -> None:
+    def _end_read(self, token: ReaderToken) -> None:
+        epoch = self._readers.unpin(token)
+        if self._read_only:
+            self._reader_table.unpin(epoch)
+
+    def _end_snapshot(self, token: ReaderToken) -> None:
         with self._reader_lock:
-            del self._active_readers[token]
+            del self._snapshot_epochs[token]
+        self._end_read(token)
+
+    @property
+    def _active_readers(self) -> dict[ReaderToken, int]:
+        """Every pinned reader as token -> epoch."""
+        return self._readers.pins()
 
     def _min_active_epoch(self) -> int | None:
-        with self._reader_lock:
-            if not self._active_readers:
-                return None
-            return min(self._active_readers.values())
+        oldest = self._readers.min_epoch()
+        if self._reader_table is not None:
+            shared = self._reader_table.min_epoch()
+            if shared is not None and (oldest is None or shared < oldest):
+                oldest = shared
+        return oldest
 
     def _reclaim(self, new_epoch: int) -> None:
         """Move pages from the pending (retired) list to the real free list."""
         min_epoch = self._min_active_epoch()
+        if min_epoch is None or min_epoch > self._durable_epoch:
+            min_epoch = self._durable_epoch
         still_pending = []
         for retire_epoch, page_id in self._pending:
-            if min_epoch is None or min_epoch >= retire_epoch:
-                self._free_ids.append(page_id)
+            if min_epoch >= retire_epoch:
+                self._node_cache.invalidate(page_id)
+                self._push_free(page_id)
             else:
                 still_pending.append((retire_epoch, page_id))
         self._pending = still_pending
@@ -267,11 +1553,12 @@ class Store:
     def _begin_attempt(self) -> None:
         self._allocated_this_attempt = []
         self._pending_this_commit = []
+        self._staged_trees = None
 
     def _abort_attempt(self) -> None:
         """Roll back an attempt that raised before anything was published."""
         while self._allocated_this_attempt:
-            self._free_ids.append(self._allocated_this_attempt.pop())
+            self._push_free(self._allocated_this_attempt.pop())
         self._pending_this_commit = []
 
     def _finish_attempt(self) -> None:
@@ -282,16 +1569,539 @@ class Store:
 
     def _allocate_page_id(self) -> int:
         if self._free_ids:
-            page_id = self._free_ids.pop()
-            self._free_clean = min(self._free_clean, len(self._free_ids))
+            page_id = self._pop_free()
         else:
             page_id = self._backend.allocate_page()
+        self._node_cache.invalidate(page_id)
         self._allocated_this_attempt.append(page_id)
         return page_id
 
     def _retire_page_id(self, page_id: int) -> None:
         self._pending_this_commit.append(page_id)
 
+    def _push_free(self, page_id: int) -> None:
+        heapq.heappush(self._free_ids, page_id)
+        self._note_free_change(page_id, page_id)
+
+    def _pop_free(self) -> int:
+        page_id = heapq.heappop(self._free_ids)
+        self._note_free_change(page_id, page_id | _FREE_LOG_ALLOCATED)
+        return page_id
+
+    def _note_free_change(self, page_id: int, entry: int) -> None:
+        # Changes to one id alternate, so a second one since the last
+        # persist undoes the first: a page retired by one commit and
+        # reused by the next never reaches the log.
+        if self._free_changes.pop(page_id, None) is None:
+            self._free_changes[page_id] = entry
+
+
+def _check_scan_args(
+    start: object, end: object, limit: int | None
+) -> tuple[bytes | None, bytes | None]:
+    if start is not None:
+        start = _as_bytes(start, "start")
+    if end is not None:
+        end = _as_bytes(end, "end")
+    if limit is not None and limit < 0:
+        raise ValueError("limit must be non-negative")
+    return start, end
+
+
+def _ops_bytes(ops: list[tuple[bytes, bytes | None]]) -> int:
+    return sum(len(key) + (len(value) if value is not None else 0) for key, value in ops)
+
+
+class _Layer(dict):
+    """One overlay layer: never mutated once built, keys in sorted order.
+
+    Iteration follows sorted_keys, so merging two layers hands sorted()
+    two runs, and a scan bisects each layer for its range instead of
+    sorting the whole overlay.
+    """
+
+    __slots__ = ("sorted_keys",)
+
+    def __init__(self, entries: Iterable = ()):
+        entries = dict(entries)
+        self.sorted_keys = sorted(entries)
+        super().__init__((key, entries[key]) for key in self.sorted_keys)
+
+
+def _collapse(overlay: tuple[_Layer, ...]) -> _Layer:
+    """One layer holding the newest entry of each key in overlay."""
+    merged: dict[bytes, bytes | None] = {}
+    for layer in reversed(overlay):
+        merged.update(layer)
+    return _Layer(merged)
+
+
+def _lookup(
+    tree: BTree,
+    root_id: int,
+    overlay: tuple[_Layer, ...],
+    key: bytes,
+) -> bytes | None:
+    """Value of key in the tree at root_id as seen through overlay."""
+    for layer in overlay:
+        if key in layer:
+            return layer[key]
+    return tree.get(root_id, key)
+
+
+def _multi_lookup(
+    tree: BTree,
+    root_id: int,
+    overlay: tuple[_Layer, ...],
+    keys: list[bytes],
+) -> list[bytes | None]:
+    """_lookup for every key in keys, answering from one tree descent."""
+    found: dict[bytes, bytes | None] = {}
+    for layer in reversed(overlay):
+        found.update((key, layer[key]) for key in keys if key in layer)
+    missing = sorted(set(keys).difference(found))
+    found.update(zip(missing, tree.multi_get(root_id, missing)))
+    return [found[key] for key in keys]
+
+
+def _overlay_range(
+    overlay: tuple[_Layer, ...],
+    start: bytes | None,
+    end: bytes | None,
+    reverse: bool,
+) -> Iterator[tuple[bytes, bytes | None]]:
+    """The newest overlay entry of each key in [start, end), in scan order.
+
+    Deletions come through as None. Each layer contributes only its
+    slice of the range, and the slices merge lazily.
+    """
+
+    def run(rank: int, layer: _Layer) -> Iterator[tuple[bytes, int, _Layer]]:
+        keys = layer.sorted_keys
+        lo = 0 if start is None else bisect.bisect_left(keys, start)
+        hi = len(keys) if end is None else bisect.bisect_left(keys, end)
+        # Ties go to the newest layer: rank 0 sorts first either way.
+        tag = -rank if reverse else rank
+        for i in range(hi - 1, lo - 1, -1) if reverse else range(lo, hi):
+            yield keys[i], tag, layer
+
+    runs = [run(rank, layer) for rank, layer in enumerate(overlay)]
+    previous = None
+    for key, _, layer in heapq.merge(*runs, reverse=reverse):
+        if key != previous:
+            previous = key
+            yield key, layer[key]
+
+
+def _overlay_scan(
+    items: Iterator[tuple[bytes, bytes]],
+    overlay: tuple[_Layer, ...],
+    start: bytes | None,
+    end: bytes | None,
+    reverse: bool,
+) -> Iterator[tuple[bytes, bytes]]:
+    """Merge a tree scan with the overlay entries in [start, end)."""
+    pending = _overlay_range(overlay, start, end, reverse)
+    ahead = next(pending, None)
+    try:
+        for key, value in items:
+            while ahead is not None and (
+                ahead[0] > key if reverse else ahead[0] < key
+            ):
+                if ahead[1] is not None:
+                    yield ahead
+                ahead = next(pending, None)
+            if ahead is not None and ahead[0] == key:
+                if ahead[1] is not None:
+                    yield ahead
+                ahead = next(pending, None)
+                continue
+            yield key, value
+        while ahead is not None:
+            if ahead[1] is not None:
+                yield ahead
+            ahead = next(pending, None)
+    finally:
+        items.close()
+
+
+class _CommitRequest:
+    """One writer's operations waiting in the group-commit queue."""
+
+    __slots__ = ("ops", "durable", "done", "changed", "error")
+
+    def __init__(self, ops: list[tuple[bytes, bytes | None]], durable: bool):
+        self.ops = ops
+        self.durable = durable
+        self.done = False
+        self.changed = False
+        self.error: BaseException | None = None
+
+    def result(self) -> bool:
+        if self.error is not None:
+            raise self.error
+        return self.changed
+
+
+class Cursor:
+    """Lazy iterator returned by Store.scan."""
+
+    def __init__(
+        self,
+        store: Store,
+        token: ReaderToken,
+        items: Iterator[tuple[bytes, bytes]],
+        limit: int | None,
+    ):
+        self._store = store
+        self._token = token
+        self._items: Iterator[tuple[bytes, bytes]] | None = items
+        self._remaining = limit
+
+    def __iter__(self) -> "Cursor":
+        return self
+
+    def __next__(self) -> tuple[bytes, bytes]:
+        if self._items is None:
+            raise StopIteration
+        if self._remaining == 0:
+            self.close()
+            raise StopIteration
+        try:
+            item = next(self._items)
+            if type(item[1]) is OverflowRef:
+                item = (item[0], self._store._resolve(item[1]))
+        except BaseException:
+            self.close()
+            raise
+        if self._remaining is not None:
+            self._remaining -= 1
+        return item
+
+    def close(self) -> None:
+        """Stop iterating and release the snapshot. Idempotent."""
+        items = self._items
+        if items is None:
+            return
+        self._items = None
+        try:
+            items.close()
+        finally:
+            self._store._end_read(self._token)
+
+    def __enter__(self) -> "Cursor":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        if getattr(self, "_items", None) is not None:
+            self.close()
+
+
+class ValueReader:
+    """Streaming reader returned by Store.open_value.
+
+    Iterating yields the value in chunks of at most one page and read()
+    returns the next bytes, so a large value is never loaded whole.
+    length is the value's total size.
+    """
+
+    def __init__(
+        self,
+        store: Store,
+        token: ReaderToken | None,
+        chunks: Iterator[bytes],
+        length: int,
+    ):
+        self._store = store
+        self._token = token
+        self._chunks: Iterator[bytes] | None = chunks
+        self._buffer = b""
+        self.length = length
+
+    def __iter__(self) -> "ValueReader":
+        return self
+
+    def __next__(self) -> bytes:
+        if self._buffer:
+            chunk, self._buffer = self._buffer, b""
+            return chunk
+        if self._chunks is None:
+            raise StopIteration
+        try:
+            return next(self._chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def read(self, size: int = -1) -> bytes:
+        """Up to size more bytes (the rest if size < 0); b"" at the end."""
+        if size < 0:
+            return b"".join(self)
+        parts = []
+        while size > 0:
+            chunk = next(self, b"")
+            if not chunk:
+                break
+            if len(chunk) > size:
+                chunk, self._buffer = chunk[:size], chunk[size:]
+            parts.append(chunk)
+            size -= len(chunk)
+        return b"".join(parts)
+
+    def close(self) -> None:
+        """Stop reading and release the pinned epoch. Idempotent."""
+        if self._chunks is None:
+            return
+        self._chunks = None
+        self._buffer = b""
+        if self._token is not None:
+            self._store._end_read(self._token)
+            self._token = None
+
+    def __enter__(self) -> "ValueReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        if getattr(self, "_chunks", None) is not None:
+            self.close()
+
+
+class Snapshot:
+    """Point-in-time, read-only view returned by Store.snapshot.
+
+    Reads go straight to the pinned root without touching the reader
+    registry. Scans register their own pin at the snapshot's epoch, so an
+    open cursor stays valid even if the snapshot is closed first.
+    """
+
+    def __init__(
+        self,
+        store: Store,
+        token: ReaderToken,
+        root_id: int,
+        overlay: tuple[_Layer, ...],
+        epoch: int,
+    ):
+        self._store = store
+        self._token: ReaderToken | None = token
+        self._root_id = root_id
+        self._overlay = overlay
+        self.epoch = epoch
+
+    def get(self, key: bytes) -> bytes | None:
+        self._check_open()
+        key = _as_bytes(key, "key")
+        store = self._store
+        return store._resolve(_lookup(store._tree, self._root_id, self._overlay, key))
+
+    def multi_get(self, keys: Iterable[bytes]) -> list[bytes | None]:
+        """Values of keys (None where absent), in input order."""
+        self._check_open()
+        keys = [_as_bytes(key, "key") for key in keys]
+        store = self._store
+        values = _multi_lookup(store._tree, self._root_id, self._overlay, keys)
+        return [store._resolve(value) for value in values]
+
+    def open_value(self, key: bytes) -> "ValueReader | None":
+        """Like Store.open_value, over the snapshot's state."""
+        self._check_open()
+        key = _as_bytes(key, "key")
+        store = self._store
+        token = store._pin_epoch(self.epoch)
+        try:
+            value = _lookup(store._tree, self._root_id, self._overlay, key)
+        except BaseException:
+            store._end_read(token)
+            raise
+        return store._value_reader(token, value)
+
+    def scan(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        reverse: bool = False,
+        limit: int | None = None,
+    ) -> Cursor:
+        """Like Store.scan, over the snapshot's state."""
+        self._check_open()
+        start, end = _check_scan_args(start, end, limit)
+        store = self._store
+        token = store._pin_epoch(self.epoch)
+        return store._open_cursor(
+            token, self._root_id, self._overlay, start, end, reverse, limit
+        )
+
+    def held_pages(self) -> int:
+        """Retired pages that cannot be reused while this snapshot is open."""
+        self._check_open()
+        with self._store._write_lock:
+            return sum(1 for tag, _ in self._store._pending if tag > self.epoch)
+
+    def close(self) -> None:
+        """Release the pinned epoch. Idempotent."""
+        token = self._token
+        if token is None:
+            return
+        self._token = None
+        self._store._end_snapshot(token)
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        if getattr(self, "_token", None) is not None:
+            self.close()
+
+    def _check_open(self) -> None:
+        if self._token is None:
+            raise RuntimeError("snapshot is closed")
+
+
+class Tree:
+    """A named tree in a Store's file, returned by Store.open_tree.
+
+    Each call reads the tree's latest committed root, so a handle stays
+    current across commits; once the tree is dropped its calls raise
+    KeyError. Writes are commits of the owning store, and a WriteBatch
+    given tree= arguments updates several trees atomically.
+    """
+
+    def __init__(self, store: Store, name: bytes):
+        self._store = store
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        return self._name.decode()
+
+    def get(self, key: bytes) -> bytes | None:
+        key = _as_bytes(key, "key")
+        store = self._store
+        token, root_id = store._begin_read_tree(self._name)
+        try:
+            return store._resolve(store._tree.get(root_id, key))
+        finally:
+            store._end_read(token)
+
+    def multi_get(self, keys: Iterable[bytes]) -> list[bytes | None]:
+        """Values of keys (None where absent), in input order."""
+        keys = [_as_bytes(key, "key") for key in keys]
+        store = self._store
+        token, root_id = store._begin_read_tree(self._name)
+        try:
+            values = _multi_lookup(store._tree, root_id, (), keys)
+            return [store._resolve(value) for value in values]
+        finally:
+            store._end_read(token)
+
+    def open_value(self, key: bytes) -> "ValueReader | None":
+        """Like Store.open_value, within this tree."""
+        key = _as_bytes(key, "key")
+        store = self._store
+        token, root_id = store._begin_read_tree(self._name)
+        try:
+            value = store._tree.get(root_id, key)
+        except BaseException:
+            store._end_read(token)
+            raise
+        return store._value_reader(token, value)
+
+    def scan(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        reverse: bool = False,
+        limit: int | None = None,
+    ) -> Cursor:
+        """Like Store.scan, within this tree."""
+        start, end = _check_scan_args(start, end, limit)
+        store = self._store
+        token, root_id = store._begin_read_tree(self._name)
+        return store._open_cursor(token, root_id, (), start, end, reverse, limit)
+
+    def put(self, key: bytes, value: bytes) -> None:
+        key = _as_bytes(key, "key")
+        value = _as_bytes(value, "value")
+        self._store._commit_trees({self._name: [(key, value)]})
+
+    def delete(self, key: bytes) -> bool:
+        """Remove key, returning whether it was present."""
+        key = _as_bytes(key, "key")
+        return self._store._commit_trees({self._name: [(key, None)]})
+
+
+class WriteBatch:
+    """Puts and deletes buffered in memory and committed atomically.
+
+    Used as a context manager the batch commits when the block exits
+    normally and is discarded if it raises. Later operations on the same
+    key replace earlier ones. Readers see either none or all of the batch.
+    Operations given a tree= go to that named tree instead of the
+    store's own keys, in the same commit.
+    """
+
+    def __init__(self, store: Store):
+        self._store = store
+        self._ops: dict[bytes | None, dict[bytes, bytes | None]] = {}
+        self._done = False
+
+    def put(self, key: bytes, value: bytes, tree: Tree | None = None) -> None:
+        self._check_open()
+        ops = self._tree_ops(tree)
+        ops[_as_bytes(key, "key")] = _as_bytes(value, "value")
+
+    def delete(self, key: bytes, tree: Tree | None = None) -> None:
+        self._check_open()
+        self._tree_ops(tree)[_as_bytes(key, "key")] = None
+
+    def commit(self, durable: bool = True) -> None:
+        """Publish every buffered operation with a single header write."""
+        self._check_open()
+        self._done = True
+        if self._ops:
+            self._store._commit_trees(
+                {name: sorted(ops.items()) for name, ops in self._ops.items()},
+                durable,
+            )
+
+    def discard(self) -> None:
+        self._done = True
+        self._ops = {}
+
+    def __len__(self) -> int:
+        return sum(len(ops) for ops in self._ops.values())
+
+    def _tree_ops(self, tree: Tree | None) -> dict[bytes, bytes | None]:
+        if tree is None:
+            return self._ops.setdefault(None, {})
+        if tree._store is not self._store:
+            raise ValueError("tree belongs to a different store")
+        return self._ops.setdefault(tree._name, {})
+
+    def __enter__(self) -> "WriteBatch":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._done:
+            return
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+    def _check_open(self) -> None:
+        if self._done:
+            raise RuntimeError("write batch was already committed or discarded")
+
 
 class _Allocator:
     """Adapts :class:Store to the :class:~cow_btree.btree.PageAllocator protocol."""
@@ -304,12 +2114,120 @@ class _Allocator:
         return self._store._allocate_page_id()
 
     def write_node(self, page_id: int, node) -> None:
-        data = node.serialize(page_id, self.page_size)
-        self._store._backend.write_page(page_id, data)
+        buf = bytearray(self.page_size)
+        node.serialize_into(buf, page_id, self._store._node_format)
+        self._store._backend.write_page(page_id, buf)
+        self._store._page_bytes_written += len(buf)
 
     def read_node(self, page_id: int):
+        node = self._store._node_cache.get(page_id)
+        if node is None:
+            node = self._load_node(page_id)
+        return node
+
+    def _load_node(self, page_id: int):
         raw = self._store._backend.read_page(page_id)
-        return deserialize_node(raw, page_id)
+        node = deserialize_node(raw, page_id)
+        self._store._node_cache.put(page_id, node)
+        return node
+
+    def read_node_view(self, page_id: int):
+        """Like read_node, but an uncached leaf comes back as a lazy LeafView.
+
+        Internal nodes are decoded and cached as usual since every lookup
+        routes through them; leaves are searched in place over a view of
+        the page and are not cached, so point reads do not evict the
+        upper levels.
+        """
+        node = self._store._node_cache.get(page_id)
+        if node is not None:
+            return node
+        return self._load_view(page_id)
+
+    def _load_view(self, page_id: int):
+        view = self._store._backend.read_page_view(page_id)
+        if is_leaf_page(view):
+            return leaf_view(view, page_id)
+        node = deserialize_node(view, page_id)
+        self._store._node_cache.put(page_id, node)
+        return node
 
     def retire(self, page_id: int) -> None:
         self._store._retire_page_id(page_id)
+
+    def write_overflow(self, value: bytes) -> OverflowRef:
+        store = self._store
+        ref, written = write_chain(store._backend, store._allocate_page_id, value)
+        store._page_bytes_written += written
+        return ref
+
+    def retire_overflow(self, ref: OverflowRef) -> None:
+        for page_id in chain_page_ids(self._store._backend, ref):
+            self._store._retire_page_id(page_id)
+
+    def relocate_overflow(
+        self, ref: OverflowRef, cutoff: int, budget: int
+    ) -> tuple[OverflowRef, int] | None:
+        store = self._store
+        moved = relocate_chain(
+            store._backend, store._allocate_page_id, ref, cutoff, budget
+        )
+        if moved is None:
+            return None
+        new_ref, old_ids = moved
+        for page_id in old_ids:
+            store._retire_page_id(page_id)
+        store._page_bytes_written += len(old_ids) * self.page_size
+        return new_ref, len(old_ids)
+
+    def prefetch(self, page_ids: list[int]) -> None:
+        self._store._backend.prefetch(page_ids)
+
+
+class _InstrumentedAllocator(_Allocator):
+    """_Allocator that reports node reads and writes to the store's StoreStats.
+
+    Only cache misses count as reads. A write's time covers serializing
+    the node and handing the page to the backend.
+    """
+
+    def write_node(self, page_id: int, node) -> None:
+        start = time.perf_counter()
+        super().write_node(page_id, node)
+        stats = self._store._stats
+        stats.add_time("serialize", time.perf_counter() - start)
+        stats.count("pages_written")
+
+    def _load_node(self, page_id: int):
+        start = time.perf_counter()
+        node = super()._load_node(page_id)
+        self._read_done(start)
+        return node
+
+    def _load_view(self, page_id: int):
+        start = time.perf_counter()
+        node = super()._load_view(page_id)
+        self._read_done(start)
+        return node
+
+    def _read_done(self, start: float) -> None:
+        stats = self._store._stats
+        stats.add_time("read", time.perf_counter() - start)
+        stats.count("pages_read")
+
+    def write_overflow(self, value: bytes) -> OverflowRef:
+        store = self._store
+        before = store._page_bytes_written
+        ref = super().write_overflow(value)
+        store._stats.count(
+            "pages_written", (store._page_bytes_written - before) // self.page_size
+        )
+        return ref
+
+    def relocate_overflow(
+        self, ref: OverflowRef, cutoff: int, budget: int
+    ) -> tuple[OverflowRef, int] | None:
+        moved = super().relocate_overflow(ref, cutoff, budget)
+        if moved is not None:
+            self._store._stats.count("pages_written", moved[1])
+        return moved
@@ -0,0 +1,65 @@
+"""The benchmark suite's workloads and its JSON comparison."""
+
+import json
+import random
+
+import pytest
+
+from cow_btree.benchmarks.suite import (
+    DISTRIBUTIONS,
+    Workload,
+    _KeyChooser,
+    compare,
+    default_workloads,
+    main,
+    run_workload,
+)
+
+
+@pytest.mark.parametrize("distribution", DISTRIBUTIONS)
+def test_a_small_case_reports_every_metric(tmp_path, distribution):
+    workload = Workload(
+        backend="mmap", page_size=512, distribution=distribution, preload=300, ops=200, readers=1
+    )
+    result = run_workload(workload, str(tmp_path))
+    json.dumps(result)
+    assert result["name"] == workload.name
+    assert result["workload"]["distribution"] == distribution
+    ops = result["operations"]
+    assert ops["put"]["count"] + ops["get"]["count"] == 200
+    assert ops["reader get"]["count"] > 0
+    for stats in ops.values():
+        assert 0 < stats["p50_us"] <= stats["p99_us"]
+    assert result["page_count"] > 1
+    assert result["file_size"] >= result["page_count"] * 512
+    assert result["write_amplification"] > 1
+
+
+def test_workloads_are_reproducible():
+    workload = Workload(distribution="zipfian", preload=1000)
+    draws = [_KeyChooser(workload, random.Random(5)) for _ in range(2)]
+    first = [draws[0]() for _ in range(500)]
+    assert first == [draws[1]() for _ in range(500)]
+    assert all(0 <= i < 1000 for i in first)
+    # Skewed: the hottest key takes far more than a uniform share.
+    assert max(first.count(i) for i in set(first)) > 20
+    names = [w.name for w in default_workloads(quick=True)]
+    assert len(names) == len(set(names))
+
+
+def test_compare_flags_slower_cases(tmp_path):
+    def run(rate):
+        return {"results": [{"name": "a", "ops_per_sec": rate, "write_amplification": 2.0}]}
+
+    lines, ok = compare(run(1000), run(950), tolerance=0.1)
+    assert ok and "0.95" in lines[1]
+    _, ok = compare(run(1000), run(800), tolerance=0.1)
+    assert not ok
+
+    paths = []
+    for rate in (1000, 800):
+        paths.append(str(tmp_path / f"{rate}.json"))
+        with open(paths[-1], "w") as f:
+            json.dump(run(rate), f)
+    assert main(["--compare", *paths]) == 1
+    assert main(["--compare", paths[0], paths[0]]) == 0
@@ -0,0 +1,144 @@
+"""Bottom-up bulk loading (Store.bulk_load) and the external merge sort."""
+
+import random
+
+import pytest
+
+from cow_btree.external_sort import sort_items
+from cow_btree.node import LeafNode, NodeTooLargeError
+from cow_btree.page_backend import InMemoryPageBackend, MMapPageBackend
+from cow_btree.store import Store
+
+from .test_commit_protocol import _RecordingBackend, _assert_two_phase
+from .test_large_entries import assert_no_pages_lost, read_node, reachable_pages
+
+PAGE_SIZE = 256
+
+
+def pairs(n, value=b"v" * 12):
+    return [(f"key{i:06d}".encode(), value) for i in range(n)]
+
+
+def test_bulk_load_builds_a_readable_tree_with_one_header_write():
+    backend = _RecordingBackend(InMemoryPageBackend(PAGE_SIZE))
+    store = Store(backend)
+    data = pairs(3000)
+    backend.ops = []
+    store.bulk_load(iter(data))
+    _assert_two_phase(backend.ops)
+
+    for k, v in data:
+        assert store.get(k) == v
+    assert list(store.scan()) == data
+    assert_no_pages_lost(store)
+
+
+def test_bulk_loaded_tree_is_denser_than_the_put_loop():
+    data = pairs(2000)
+    loaded = Store(InMemoryPageBackend(PAGE_SIZE))
+    loaded.bulk_load(data)
+    looped = Store(InMemoryPageBackend(PAGE_SIZE))
+    for k, v in data:
+        looped.put(k, v)
+    assert len(reachable_pages(loaded)) < 0.7 * len(reachable_pages(looped))
+
+    leaves = [
+        read_node(loaded, pid)
+        for pid in reachable_pages(loaded)
+        if isinstance(read_node(loaded, pid), LeafNode)
+    ]
+    full = [leaf for leaf in leaves if len(leaf.keys) == len(leaves[0].keys)]
+    assert len(full) >= len(leaves) - 1
+
+
+def test_fill_factor_leaves_room_in_each_page():
+    data = pairs(2000)
+    dense = Store(InMemoryPageBackend(PAGE_SIZE))
+    dense.bulk_load(data, fill_factor=1.0)
+    sparse = Store(InMemoryPageBackend(PAGE_SIZE))
+    sparse.bulk_load(data, fill_factor=0.5)
+    assert len(reachable_pages(sparse)) > 1.6 * len(reachable_pages(dense))
+    for k, v in data[::97]:
+        assert sparse.get(k) == v
+
+    # Later puts into a half-full tree land without splitting.
+    before = len(reachable_pages(sparse))
+    sparse.put(data[10][0] + b"x", b"v")
+    assert len(reachable_pages(sparse)) == before
+
+    with pytest.raises(ValueError, match="fill_factor"):
+        Store(InMemoryPageBackend(PAGE_SIZE)).bulk_load(data, fill_factor=0)
+
+
+@pytest.mark.parametrize(
+    "bad",
+    [
+        [(b"b", b"1"), (b"a", b"2")],
+        [(b"a", b"1"), (b"a", b"2")],
+    ],
+)
+def test_unsorted_or_duplicate_input_is_rejected_and_rolled_back(bad):
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    root = store._root_id
+    with pytest.raises(ValueError, match="strictly increasing"):
+        store.bulk_load(pairs(500) + [(b"zz" + k, v) for k, v in bad])
+    assert store._root_id == root
+    assert list(store.scan()) == []
+    assert_no_pages_lost(store)
+    store.bulk_load(pairs(10))
+    assert len(list(store.scan())) == 10
+
+
+def test_bulk_load_requires_an_empty_store():
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    store.put(b"existing", b"1")
+    with pytest.raises(ValueError, match="empty store"):
+        store.bulk_load(pairs(10))
+    assert store.get(b"existing") == b"1"
+
+
+def test_empty_input_keeps_an_empty_tree():
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    store.bulk_load([])
+    assert list(store.scan()) == []
+    store.put(b"k", b"v")
+    assert store.get(b"k") == b"v"
+
+
+def test_oversized_pair_is_rejected():
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    with pytest.raises(NodeTooLargeError):
+        store.bulk_load([(b"a", b"x" * PAGE_SIZE)])
+    assert_no_pages_lost(store)
+
+
+def test_unsorted_input_is_accepted_through_the_external_sort(tmp_path):
+    data = pairs(3000)
+    shuffled = list(data)
+    random.Random(5).shuffle(shuffled)
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    store.bulk_load(shuffled, presorted=False, sort_buffer_bytes=4096)
+    assert list(store.scan()) == data
+
+
+def test_external_sort_spills_and_merges_runs(tmp_path):
+    rng = random.Random(9)
+    data = [(rng.randbytes(rng.randint(0, 12)), rng.randbytes(5)) for _ in range(2000)]
+    out = list(sort_items(iter(data), buffer_bytes=512, tmp_dir=str(tmp_path)))
+    assert [k for k, _ in out] == sorted(k for k, _ in data)
+    assert sorted(out) == sorted(data)
+    assert list(sort_items([], buffer_bytes=16)) == []
+
+
+def test_bulk_loaded_file_reopens(tmp_path):
+    path = str(tmp_path / "bulk.db")
+    data = pairs(5000)
+    store = Store(MMapPageBackend(path, PAGE_SIZE))
+    store.bulk_load(data)
+    store.close()
+
+    reopened = Store(MMapPageBackend(path, PAGE_SIZE))
+    assert list(reopened.scan()) == data
+    reopened.put(b"key000100x", b"after")
+    assert reopened.get(b"key000100x") == b"after"
+    reopened.close()
@@ -0,0 +1,172 @@
+"""Page checksums and the offline verifier."""
+
+import pytest
+
+from cow_btree.node import LeafNode
+from cow_btree.overflow import OVERFLOW
+from cow_btree.page_backend import (
+    ChecksumPageBackend,
+    InMemoryPageBackend,
+    MMapPageBackend,
+    PageChecksumError,
+)
+from cow_btree.store import Store
+from cow_btree.verify import main, verify
+
+from .test_large_entries import assert_no_pages_lost, reachable_pages, read_node
+
+PAGE_SIZE = 256
+
+
+def build(path, checksums=True, count=2000):
+    store = Store(
+        MMapPageBackend(path, PAGE_SIZE), checksums=checksums, overflow_threshold=64
+    )
+    for i in range(count):
+        store.put(b"k%05d" % i, b"v" * (i % 100))
+    for i in range(0, count, 3):
+        store.delete(b"k%05d" % i)
+    return store
+
+
+def flip_byte(path, offset):
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        byte = f.read(1)
+        f.seek(offset)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+
+def a_leaf(store):
+    return next(p for p in reachable_pages(store) if isinstance(read_node(store, p), LeafNode))
+
+
+def test_checksummed_store_reopens_with_its_flag(tmp_path):
+    path = str(tmp_path / "c.db")
+    store = build(path)
+    assert isinstance(store._backend, ChecksumPageBackend)
+    assert store._allocator.page_size == PAGE_SIZE - 4
+    assert_no_pages_lost(store)
+    store.close()
+
+    reopened = Store(MMapPageBackend(path, PAGE_SIZE))  # checksums follow the file
+    assert isinstance(reopened._backend, ChecksumPageBackend)
+    assert reopened.get(b"k00001") == b"v"
+    assert reopened.get(b"k00098") == b"v" * 98
+    reopened.close()
+
+    plain = Store(InMemoryPageBackend(PAGE_SIZE))
+    assert not isinstance(plain._backend, ChecksumPageBackend)
+
+
+def test_corruption_is_caught_on_read(tmp_path):
+    path = str(tmp_path / "c.db")
+    store = build(path)
+    leaf_id = a_leaf(store)
+    key = read_node(store, leaf_id).keys[0]
+    store.close()
+    flip_byte(path, leaf_id * PAGE_SIZE + PAGE_SIZE // 2)
+
+    store = Store(MMapPageBackend(path, PAGE_SIZE))
+    with pytest.raises(PageChecksumError, match=f"page {leaf_id}"):
+        store.get(key)
+    with pytest.raises(PageChecksumError):
+        list(store.scan())
+    store.close()
+
+    # Point lookups can skip the check; decoded pages are still verified.
+    store = Store(MMapPageBackend(path, PAGE_SIZE), verify_lookups=False)
+    store.get(key)
+    with pytest.raises(PageChecksumError):
+        store._allocator.read_node(leaf_id)
+    store.close()
+
+
+@pytest.mark.parametrize("checksums", [False, True])
+@pytest.mark.parametrize("workers", [1, 3])
+def test_verify_accepts_a_healthy_file(tmp_path, checksums, workers):
+    path = str(tmp_path / "v.db")
+    store = build(path, checksums)
+    store.put(b"blob", bytes(range(256)) * 20)
+    store.close()
+    report = verify(path, workers=workers)
+    assert report.ok, report.errors
+    assert report.leaked == []
+    assert report.live_pages + report.free_pages < report.page_count
+    assert main([path, "--workers", str(workers)]) == 0
+
+
+def test_verify_reports_leaked_pages(tmp_path):
+    path = str(tmp_path / "v.db")
+    build(path).close()
+    with open(path, "ab") as f:
+        f.write(bytes(2 * PAGE_SIZE))
+    report = verify(path, workers=2)
+    assert report.ok
+    assert report.leaked == [report.page_count - 2, report.page_count - 1]
+
+
+def test_verify_finds_damage(tmp_path):
+    path = str(tmp_path / "v.db")
+    store = build(path)
+    leaf_id = a_leaf(store)
+    store.close()
+    flip_byte(path, leaf_id * PAGE_SIZE + 20)
+    report = verify(path, workers=2)
+    assert f"page {leaf_id} fails its checksum" in report.errors
+    assert main([path]) == 1
+
+    # Without checksums, a leaf holding keys its parent does not route to
+    # and a free list naming a live page are still structural errors.
+    path = str(tmp_path / "plain.db")
+    store = build(path, checksums=False)
+    leaf_id = a_leaf(store)
+    stray = LeafNode(keys=[b"zzz"], values=[b"x"])
+    store._free_ids.append(store._root_id)
+    store.close()
+    with open(path, "r+b") as f:
+        f.seek(leaf_id * PAGE_SIZE)
+        f.write(stray.serialize(leaf_id, PAGE_SIZE))
+    errors = verify(path, workers=2).errors
+    assert f"leaf {leaf_id} has keys outside its parent's separators" in errors
+    assert any("is both live and free" in e for e in errors)
+
+
+
+@pytest.mark.parametrize("target", ["container", "overflow"])
+def test_verify_reports_an_impossible_entry_count(tmp_path, target):
+    path = str(tmp_path / "count.db")
+    store = build(path, checksums=False)
+    if target == "container":
+        page_id = store._free_list_containers[-1]
+    else:
+        page_id = next(
+            page_id
+            for page_id in sorted(reachable_pages(store))
+            if store._backend.read_page(page_id)[0] == OVERFLOW
+        )
+    store.close()
+    with open(path, "r+b") as f:
+        f.seek(page_id * PAGE_SIZE + 9)  # the count, after marker, id and next
+        f.write((100000).to_bytes(4, "little"))
+    report = verify(path, workers=2)
+    assert f"page {page_id} claims 100000 entries, more than fit" in report.errors
+
+
+def test_verify_checks_bounds_inherited_from_grandparents(tmp_path):
+    # The leftmost leaf under an inner node has no separator below it on
+    # its path until the root's.
+    path = str(tmp_path / "deep.db")
+    store = build(path, checksums=False)
+    root = read_node(store, store._root_id)
+    inner_id = root.children[1]
+    leaf_id = inner_id
+    while not isinstance(read_node(store, leaf_id), LeafNode):
+        leaf_id = read_node(store, leaf_id).children[0]
+    stray = LeafNode(keys=[b"a"], values=[b"x"])
+    store.close()
+    with open(path, "r+b") as f:
+        f.seek(leaf_id * PAGE_SIZE)
+        f.write(stray.serialize(leaf_id, PAGE_SIZE))
+    errors = verify(path, workers=2).errors
+    assert f"node {inner_id} has keys outside its parent's separators" in errors
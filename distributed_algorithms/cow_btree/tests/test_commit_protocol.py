@@ -1,12 +1,15 @@
-"""Regression tests for the put() commit protocol (R2.2, R4.2, R5.2)."""
+"""Regression tests for the put() commit protocol (R2.2, R4.2, R5.2) and its async mode."""
 
 import threading
+import time
 
 import pytest
 
 from cow_btree.page_backend import InMemoryPageBackend, PageBackend
 from cow_btree.store import Store
 
+from .test_large_entries import reachable_pages
+
 PAGE_SIZE = 128
 
 
@@ -269,7 +272,7 @@ def test_failure_before_the_commit_point_is_a_no_op():
 
 
 def test_free_list_is_persisted_before_the_header():
-    """The free-list containers belong to phase 1, not after the header."""
+    """Free-list pages (containers or log) belong to phase 1, not after the header."""
     backend = _RecordingBackend(InMemoryPageBackend(PAGE_SIZE))
     store = Store(backend)
     keys = [f"k{i:03d}".encode() for i in range(40)]
@@ -286,7 +289,7 @@ def test_free_list_is_persisted_before_the_header():
     store.put(b"k010", b"y")
     assert store._free_list_head != 0, "free list was not persisted"
 
-    containers = set(store._free_list_containers)
+    containers = set(store._free_list_containers) | set(store._free_log_pages)
     header = max(
         i for i, (op, pid) in enumerate(backend.ops) if op == "write" and pid == 0
     )
@@ -299,3 +302,121 @@ def test_free_list_is_persisted_before_the_header():
     assert max(container_writes) < header, (
         f"free-list container written after the header: {backend.ops}"
     )
+
+
+# Asynchronous durability: publish now, flush once per interval
+
+
+class _CrashableBackend(InMemoryPageBackend):
+    """In-memory backend that can be "crashed" into the file a reopen would see.
+
+    Pages as of the last flush are kept aside. A crash either drops
+    everything written since ("none" landed) or keeps all of it ("all"),
+    the two extremes of what a kernel may have written back on its own.
+    """
+
+    def __init__(self, page_size: int):
+        super().__init__(page_size)
+        self._flushed: list[bytes] = []
+        self.fail_flush = False
+
+    def flush(self) -> None:
+        if self.fail_flush:
+            self.fail_flush = False
+            raise OSError("injected flush failure")
+        self._flushed = [bytes(page) for page in self._pages]
+
+    def crash(self, landed: str) -> InMemoryPageBackend:
+        pages = self._flushed if landed == "none" else self._pages
+        crashed = InMemoryPageBackend(self.page_size)
+        crashed._pages = [bytearray(page) for page in pages]
+        return crashed
+
+
+def test_async_commits_leave_the_header_and_flushes_to_sync():
+    backend = _RecordingBackend(InMemoryPageBackend(PAGE_SIZE))
+    store = Store(backend, flush_interval=3600)
+    backend.ops = []
+    for i in range(30):
+        store.put(f"k{i:03d}".encode(), b"v" * 8)
+    assert store.get(b"k007") == b"v" * 8
+    assert not [op for op in backend.ops if op[0] == "flush" or op == ("write", 0)]
+    assert store.stats()["unsynced_commits"] == 30
+
+    backend.ops = []
+    store.sync()
+    _assert_two_phase(backend.ops)
+    assert store.stats()["unsynced_commits"] == 0
+    backend.ops = []
+    store.sync()
+    assert backend.ops == []
+    store.close()
+
+
+@pytest.mark.parametrize("landed", ["none", "all"])
+def test_a_crash_recovers_the_last_synced_root(landed):
+    """Pages the synced tree uses are not reused until a later sync."""
+    backend = _CrashableBackend(PAGE_SIZE)
+    store = Store(backend, flush_interval=3600)
+    synced = {f"k{i:03d}".encode(): b"a" * 8 for i in range(60)}
+    for k, v in synced.items():
+        store.put(k, v)
+    store.sync()
+    for round_no in range(5):
+        for i, k in enumerate(synced):
+            if i % 7 == round_no:
+                store.delete(k)
+            else:
+                store.put(k, str(round_no).encode() * 8)
+        store.put(f"new{round_no}".encode(), b"n")
+    assert store.get(b"k001") == b"4" * 8
+
+    recovered = Store(backend.crash(landed))
+    assert dict(recovered.scan()) == synced
+    assert not reachable_pages(recovered) & set(recovered._free_ids)
+    for k in synced:
+        recovered.put(k, b"b" * 8)
+    assert dict(recovered.scan()) == dict.fromkeys(synced, b"b" * 8)
+
+
+def test_a_failed_sync_keeps_the_previous_durable_root():
+    backend = _CrashableBackend(PAGE_SIZE)
+    store = Store(backend, flush_interval=3600)
+    store.put(b"a", b"1")
+    store.sync()
+    store.put(b"a", b"2")
+    backend.fail_flush = True
+    with pytest.raises(OSError):
+        store.sync()
+    assert store.get(b"a") == b"2"
+    assert store.stats()["unsynced_commits"] == 1
+    assert Store(backend.crash("all")).get(b"a") == b"1"
+
+    store.sync()
+    assert Store(backend.crash("none")).get(b"a") == b"2"
+
+
+def test_the_flusher_syncs_in_the_background():
+    backend = _CrashableBackend(PAGE_SIZE)
+    store = Store(backend, flush_interval=0.01)
+    for i in range(20):
+        store.put(f"k{i:03d}".encode(), b"x")
+    deadline = time.monotonic() + 10
+    while store.stats()["unsynced_commits"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.stats()["unsynced_commits"] == 0
+    assert Store(backend.crash("none")).get(b"k019") == b"x"
+
+    store.put(b"last", b"write")
+    store.close()
+    assert store._flusher is None
+    reopened = Store(backend.crash("none"))
+    assert reopened.get(b"last") == b"write"
+    assert not reopened._free_log
+
+
+def test_flush_interval_is_validated():
+    with pytest.raises(ValueError, match="positive"):
+        Store(InMemoryPageBackend(PAGE_SIZE), flush_interval=0)
+    with pytest.raises(ValueError, match="group_commit"):
+        Store(InMemoryPageBackend(PAGE_SIZE), flush_interval=1, group_commit=True)
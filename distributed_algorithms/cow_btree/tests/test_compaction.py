@@ -0,0 +1,210 @@
+"""Online compaction: relocating live pages forward and truncating the file."""
+
+import os
+import random
+import threading
+
+import pytest
+
+from cow_btree.node import NODE_FORMATS
+from cow_btree.page_backend import InMemoryPageBackend, MMapPageBackend
+from cow_btree.store import FREE_LIST, FREE_LOG, Store
+
+from . import test_named_trees
+from .test_large_entries import assert_no_pages_lost
+
+PAGE_SIZE = 256
+
+
+def fill_and_thin(store, count=3000, keep=300):
+    """Insert count keys, then delete all but keep of them at random."""
+    for i in range(count):
+        store.put(f"k{i:05d}".encode(), f"v{i}".encode() * 3)
+    doomed = random.Random(1).sample(range(count), count - keep)
+    for i in doomed:
+        store.delete(f"k{i:05d}".encode())
+    return dict(store.scan())
+
+
+@pytest.mark.parametrize("node_format", NODE_FORMATS)
+def test_compact_shrinks_the_file_and_keeps_every_key(node_format):
+    store = Store(InMemoryPageBackend(PAGE_SIZE), node_format=node_format)
+    contents = fill_and_thin(store)
+    pages_before = store._backend.page_count
+
+    report = store.compact()
+
+    assert dict(store.scan()) == contents
+    assert report["bytes_before"] == pages_before * PAGE_SIZE
+    assert report["bytes_after"] == store._backend.page_count * PAGE_SIZE
+    assert report["reclaimed_bytes"] == report["bytes_before"] - report["bytes_after"]
+    assert store._backend.page_count < pages_before // 4
+    assert_no_pages_lost(store)
+    assert store.compact()["reclaimed_bytes"] == 0
+
+
+def test_each_step_writes_at_most_max_pages():
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    contents = fill_and_thin(store)
+    writes = []
+    real_write = store._allocator.write_node
+
+    def spy(page_id, node):
+        writes.append(page_id)
+        return real_write(page_id, node)
+
+    store._allocator.write_node = spy
+    steps = 0
+    while True:
+        writes.clear()
+        if not store.compact_step(max_pages=3):
+            break
+        steps += 1
+        assert len(writes) <= 3
+    assert steps > 5
+    assert dict(store.scan()) == contents
+    with pytest.raises(ValueError):
+        store.compact_step(max_pages=0)
+
+
+def test_a_free_log_page_at_the_end_does_not_stop_compaction():
+    store = Store(InMemoryPageBackend(4096))
+    for i in range(3000):
+        store.put(b"k%05d" % i, b"v" * 16)
+    for i in range(3000):
+        store.delete(b"k%05d" % i)
+    assert store._free_log_pages == [store._backend.page_count - 2]
+    live = set(range(store._backend.page_count)) - set(store._free_ids)
+    assert max(live - set(store._free_log_pages)) < store._free_log_pages[0]
+
+    assert store.compact()["reclaimed_bytes"] > 0
+    assert store._backend.page_count <= 4
+    assert list(store.scan()) == []
+    assert_no_pages_lost(store)
+
+
+def test_overflow_chains_move_out_of_the_tail():
+    store = Store(InMemoryPageBackend(PAGE_SIZE), overflow_threshold=64)
+    rng = random.Random(3)
+    for i in range(1500):
+        size = rng.choice([8, 8, 8, 100, 700])
+        store.put(f"k{i:05d}".encode(), bytes([i % 251]) * size)
+    # Chains at the very end: the default tree's, then a named tree's.
+    store.put(b"big", b"B" * 2500)
+    tree = store.open_tree("t")
+    tree.put(b"big", b"T" * 2500)
+    for i in rng.sample(range(1500), 1400):
+        store.delete(f"k{i:05d}".encode())
+    contents = dict(store.scan())
+    snap = store.snapshot()
+    pages_before = store._backend.page_count
+
+    writes = []
+    real_write = store._backend.write_page
+
+    def spy(page_id, data):
+        if page_id and data[0] not in (FREE_LIST, FREE_LOG):
+            writes.append(page_id)
+        return real_write(page_id, data)
+
+    store._backend.write_page = spy
+    while True:
+        writes.clear()
+        if not store.compact_step(max_pages=16):
+            break
+        assert len(writes) <= 16
+    store._backend.write_page = real_write
+    assert dict(snap.scan()) == contents
+    snap.close()
+    store.compact()
+
+    assert store._backend.page_count < pages_before // 4
+    assert dict(store.scan()) == contents
+    assert tree.get(b"big") == b"T" * 2500
+    test_named_trees.assert_no_pages_lost(store)
+
+
+def test_snapshot_pages_stay_until_it_is_closed():
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    contents = fill_and_thin(store)
+    snap = store.snapshot()
+    store.compact()
+    assert dict(snap.scan()) == contents
+    assert dict(store.scan()) == contents
+    pinned_size = store._backend.page_count
+
+    snap.close()
+    assert store.compact()["reclaimed_bytes"] > 0
+    assert store._backend.page_count < pinned_size
+    assert_no_pages_lost(store)
+
+
+def test_writers_interleave_with_compaction():
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    contents = fill_and_thin(store)
+    done = threading.Event()
+    errors = []
+
+    def writer():
+        try:
+            i = 0
+            while not done.is_set():
+                key = f"w{i % 200:03d}".encode()
+                store.put(key, str(i).encode())
+                contents[key] = str(i).encode()
+                i += 1
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    t = threading.Thread(target=writer)
+    t.start()
+    try:
+        for _ in range(3):
+            store.compact(max_pages_per_step=16)
+    finally:
+        done.set()
+        t.join(timeout=30)
+    assert not errors
+    assert dict(store.scan()) == contents
+    assert_no_pages_lost(store)
+
+
+def test_mmap_file_shrinks_and_reopens(tmp_path):
+    path = str(tmp_path / "compact.db")
+    store = Store(MMapPageBackend(path, PAGE_SIZE))
+    contents = fill_and_thin(store)
+    store.close()
+    size_before = os.path.getsize(path)
+
+    store = Store(MMapPageBackend(path, PAGE_SIZE))
+    report = store.compact()
+    assert os.path.getsize(path) == report["bytes_after"] < size_before
+    store.put(b"after", b"compaction")
+    store.close()
+
+    reopened = Store(MMapPageBackend(path, PAGE_SIZE))
+    assert dict(reopened.scan()) == {**contents, b"after": b"compaction"}
+    assert_no_pages_lost(reopened)
+    reopened.close()
+
+
+@pytest.mark.parametrize("make_backend", ["memory", "mmap"])
+def test_truncate_keeps_views_of_the_remaining_pages(tmp_path, make_backend):
+    if make_backend == "memory":
+        backend = InMemoryPageBackend(64)
+    else:
+        backend = MMapPageBackend(str(tmp_path / "t.db"), 64)
+    for page_id in range(10):
+        backend.allocate_page()
+        backend.write_page(page_id, bytes([page_id]) * 64)
+    view = backend.read_page_view(3)
+    backend.truncate(4)
+    assert backend.page_count == 4
+    assert bytes(view) == bytes([3]) * 64
+    view.release()
+    with pytest.raises(IndexError):
+        backend.read_page(4)
+    assert backend.allocate_page() == 4
+    with pytest.raises(IndexError):
+        backend.truncate(6)
+    backend.close()
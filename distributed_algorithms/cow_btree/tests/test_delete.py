@@ -0,0 +1,163 @@
+"""Store.delete: path copying, sibling merges and root collapse."""
+
+import random
+
+import pytest
+
+from cow_btree.node import InternalNode, LeafNode
+from cow_btree.page_backend import InMemoryPageBackend, MMapPageBackend
+from cow_btree.store import Store
+
+from .test_large_entries import assert_no_pages_lost, reachable_pages, read_node
+
+PAGE_SIZE = 128
+
+
+def make_store(page_size=PAGE_SIZE):
+    return Store(InMemoryPageBackend(page_size))
+
+
+def height(store):
+    levels = 1
+    node = read_node(store, store._root_id)
+    while isinstance(node, InternalNode):
+        levels += 1
+        node = read_node(store, node.children[0])
+    return levels
+
+
+def assert_well_formed(store, page_id=None, low=None, high=None):
+    """Keys are ordered within separator bounds and no non-root internal
+    node is left with a single child."""
+    if page_id is None:
+        page_id = store._root_id
+    node = read_node(store, page_id)
+    assert node.keys == sorted(node.keys)
+    assert all(low is None or k >= low for k in node.keys)
+    assert all(high is None or k < high for k in node.keys)
+    if isinstance(node, InternalNode):
+        assert node.keys, f"internal page {page_id} has a single child"
+        bounds = [low] + node.keys + [high]
+        for i, child in enumerate(node.children):
+            assert_well_formed(store, child, bounds[i], bounds[i + 1])
+
+
+def test_delete_reports_whether_the_key_existed():
+    store = make_store()
+    store.put(b"a", b"1")
+    store.put(b"b", b"2")
+    epoch = store._epoch
+    assert store.delete(b"a") is True
+    assert store.get(b"a") is None
+    assert store.get(b"b") == b"2"
+    assert store._epoch == epoch + 1
+    assert store.delete(b"a") is False
+    assert store.delete(b"missing") is False
+    assert store._epoch == epoch + 1
+
+
+def test_delete_rejects_non_bytes_keys():
+    store = make_store()
+    with pytest.raises(TypeError):
+        store.delete("a")
+
+
+def test_mass_deletion_shrinks_height_and_page_count():
+    store = make_store()
+    keys = [f"k{i:04d}".encode() for i in range(600)]
+    for k in keys:
+        store.put(k, b"v" * 8)
+    full_pages = len(reachable_pages(store))
+    full_height = height(store)
+
+    survivors = keys[::50]
+    for k in keys:
+        if k not in survivors:
+            assert store.delete(k)
+    assert [k for k, _ in store.scan()] == survivors
+    assert height(store) < full_height
+    assert len(reachable_pages(store)) < full_pages // 10
+    assert_well_formed(store)
+    assert_no_pages_lost(store)
+
+
+def test_deleting_every_key_one_by_one_collapses_to_a_leaf():
+    store = make_store()
+    keys = [f"k{i:03d}".encode() for i in range(200)]
+    for k in keys:
+        store.put(k, b"v")
+    random.Random(5).shuffle(keys)
+    for k in keys:
+        store.delete(k)
+    assert isinstance(read_node(store, store._root_id), LeafNode)
+    assert list(store.scan()) == []
+    assert_no_pages_lost(store)
+
+
+def test_underfull_leaf_merges_into_its_sibling():
+    store = make_store()
+    for i in range(40):
+        store.put(f"k{i:03d}".encode(), b"v" * 8)
+    leaves_before = len(reachable_pages(store))
+    # Empty most of one leaf so it drops under a quarter page.
+    root = read_node(store, store._root_id)
+    while isinstance(root, InternalNode):
+        first_leaf_id = root.children[0]
+        root = read_node(store, first_leaf_id)
+    for k in root.keys[1:]:
+        store.delete(k)
+    assert len(reachable_pages(store)) < leaves_before
+    assert_well_formed(store)
+
+
+def test_random_puts_and_deletes_match_a_dict():
+    store = make_store()
+    rng = random.Random(11)
+    model = {}
+    for step in range(3000):
+        key = f"k{rng.randrange(400):03d}".encode()
+        if rng.random() < 0.45:
+            assert store.delete(key) == (key in model)
+            model.pop(key, None)
+        else:
+            value = bytes([97 + step % 26]) * rng.randrange(1, 20)
+            store.put(key, value)
+            model[key] = value
+    assert list(store.scan()) == sorted(model.items())
+    assert_well_formed(store)
+    assert_no_pages_lost(store)
+
+
+def test_open_cursor_keeps_deleted_pages_alive():
+    store = make_store()
+    keys = [f"k{i:03d}".encode() for i in range(150)]
+    for k in keys:
+        store.put(k, b"v")
+    cursor = store.scan()
+    first = next(cursor)
+    for k in keys:
+        store.delete(k)
+    # Retired pages wait for the cursor's epoch before they are reused.
+    assert store._pending
+    for k in keys[:40]:
+        store.put(k, b"new")
+    assert [first] + list(cursor) == [(k, b"v") for k in keys]
+    assert not store._active_readers
+    store.put(b"last", b"x")
+    assert_no_pages_lost(store)
+
+
+def test_deletes_survive_reopen(tmp_path):
+    path = str(tmp_path / "delete.db")
+    store = Store(MMapPageBackend(path, 256))
+    for i in range(300):
+        store.put(f"k{i:03d}".encode(), b"v" * 10)
+    for i in range(0, 300, 3):
+        store.delete(f"k{i:03d}".encode())
+    store.close()
+
+    reopened = Store(MMapPageBackend(path, 256))
+    keys = [k for k, _ in reopened.scan()]
+    assert keys == [f"k{i:03d}".encode() for i in range(300) if i % 3]
+    assert_no_pages_lost(reopened)
+    reopened.close()
@@ -0,0 +1,121 @@
+"""The pread/pwrite backend with its buffer pool."""
+
+import os
+
+import pytest
+
+from cow_btree.page_backend import FilePageBackend, MMapPageBackend
+from cow_btree.store import Store
+
+from .test_large_entries import assert_no_pages_lost
+
+PAGE_SIZE = 512
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "file.db")
+
+
+def fill(store, count=2000):
+    pairs = {f"key{i:05d}".encode(): f"value{i}".encode() * 4 for i in range(count)}
+    for i in range(0, count, 250):
+        with store.write_batch() as batch:
+            for k in list(pairs)[i : i + 250]:
+                batch.put(k, pairs[k])
+    return pairs
+
+
+@pytest.mark.parametrize("pool_pages", [1, 8, 4096])
+def test_store_round_trip_and_reopen(db_path, pool_pages):
+    store = Store(FilePageBackend(db_path, PAGE_SIZE, pool_pages), cache_size=0)
+    pairs = fill(store)
+    for k in list(pairs)[::3]:
+        assert store.delete(k)
+        del pairs[k]
+    assert dict(store.scan()) == pairs
+    assert_no_pages_lost(store)
+    store.close()
+    assert os.path.getsize(db_path) % PAGE_SIZE == 0
+
+    reopened = Store(FilePageBackend(db_path, PAGE_SIZE, pool_pages))
+    assert dict(reopened.scan()) == pairs
+    reopened.close()
+
+
+def test_files_are_interchangeable_with_mmap(db_path):
+    store = Store(MMapPageBackend(db_path, PAGE_SIZE))
+    pairs = fill(store, 500)
+    store.close()
+    store = Store(FilePageBackend(db_path, PAGE_SIZE, pool_pages=16))
+    assert dict(store.scan()) == pairs
+    store.put(b"from-file", b"backend")
+    store.close()
+    store = Store(MMapPageBackend(db_path, PAGE_SIZE))
+    assert store.get(b"from-file") == b"backend"
+    assert store.get(b"key00042") == pairs[b"key00042"]
+    store.close()
+
+
+def test_adjacent_dirty_pages_are_written_together(db_path, monkeypatch):
+    backend = FilePageBackend(db_path, 64, pool_pages=100)
+    for page_id in range(10):
+        backend.allocate_page()
+    calls = []
+    real_pwritev = os.pwritev
+
+    def spy(fd, buffers, offset):
+        calls.append((offset // 64, len(buffers)))
+        return real_pwritev(fd, buffers, offset)
+
+    monkeypatch.setattr(os, "pwritev", spy)
+    for page_id in (7, 2, 3, 4, 9, 8):
+        backend.write_page(page_id, bytes([page_id]) * 64)
+    assert calls == []  # nothing leaves the pool before a flush
+    backend.flush()
+    assert calls == [(2, 3), (7, 3)]
+    assert os.path.getsize(db_path) == 10 * 64
+    backend.close()
+    with open(db_path, "rb") as f:
+        data = f.read()
+    assert data[3 * 64 : 4 * 64] == bytes([3]) * 64
+    assert data[5 * 64 : 6 * 64] == bytes(64)
+
+
+def test_evicting_a_dirty_page_writes_it_back(db_path):
+    backend = FilePageBackend(db_path, 64, pool_pages=2)
+    for page_id in range(5):
+        backend.allocate_page()
+        backend.write_page(page_id, bytes([page_id + 1]) * 64)
+    view = backend.read_page_view(0)
+    backend.write_page(0, b"\xff" * 64)
+    assert bytes(view) == bytes([1]) * 64  # views outlive rewrites
+    for page_id in range(1, 5):
+        assert backend.read_page(page_id) == bytes([page_id + 1]) * 64
+    assert backend.read_page(0) == b"\xff" * 64
+    assert len(backend._pool) <= 2
+    backend.truncate(3)
+    assert backend.page_count == 3
+    with pytest.raises(IndexError):
+        backend.read_page(3)
+    assert backend.allocate_page() == 3
+    assert backend.read_page(3) == bytes(64)
+    backend.close()
+    assert os.path.getsize(db_path) == 4 * 64
+
+
+def test_compaction_and_checksums_over_the_file_backend(db_path):
+    store = Store(FilePageBackend(db_path, PAGE_SIZE, 32), checksums=True)
+    pairs = fill(store)
+    for k in list(pairs)[200:]:
+        store.delete(k)
+        del pairs[k]
+    report = store.compact()
+    assert report["reclaimed_bytes"] > 0
+    assert dict(store.scan()) == pairs
+    store.close()
+    assert os.path.getsize(db_path) == report["bytes_after"]
+
+    store = Store(FilePageBackend(db_path, PAGE_SIZE), access_hint="random")
+    assert dict(store.scan()) == pairs
+    store.close()
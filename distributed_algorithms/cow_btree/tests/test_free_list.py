@@ -1,6 +1,7 @@
 """Free-list persistence: write amplification, page accounting, recovery."""
 
 import os
+import random
 import struct
 
 import pytest
@@ -8,6 +9,7 @@ import pytest
 from cow_btree.node import InternalNode, NodeTooLargeError, deserialize_node
 from cow_btree.page_backend import InMemoryPageBackend, MMapPageBackend
 from cow_btree.store import FREE_LIST, Store
+from cow_btree.verify import verify
 
 SMALL_PAGE = 128
 PAGE_SIZE = 256
@@ -109,18 +111,27 @@ def test_write_amplification_does_not_grow_with_the_free_set():
         assert store.get(k) is not None, i
 
 
-def test_free_list_io_per_commit_is_one_container_in_the_steady_state():
-    """Only the container holding the top of the stack is rewritten"""
+def _add_spare_free_pages(store, count):
+    """Grow the file by count pages and checkpoint them onto the free list."""
+    # Ids past every free id keep _free_ids a valid heap.
+    store._free_ids.extend(range(store._backend.page_count, store._backend.page_count + count))
+    for _ in range(count):
+        store._backend.allocate_page()
+    store._free_checkpoint_wanted = True
+
+
+def test_free_list_io_per_commit_is_at_most_one_log_page_in_the_steady_state():
+    """A commit appends its changes to the free log; no container is rewritten.
+
+    Pages one commit retires are the lowest free ids for the next, and a
+    page freed and reused between two persists never reaches the log.
+    """
     backend = CountingBackend(SMALL_PAGE)
     store = Store(backend)
     for i in range(200):
         store.put(f"k{i:04d}".encode(), b"v" * 8)
 
-    # Force a multi-container free set, then confirm a commit touches at
-    store._free_ids.extend(range(store._backend.page_count, store._backend.page_count + 300))
-    for _ in range(300):
-        store._backend.allocate_page()
-    containers_before = len(store._free_list_containers)
+    _add_spare_free_pages(store, 300)
     store.put(b"k0000", b"w" * 8)
     assert len(store._free_list_containers) > 3
 
@@ -132,12 +143,156 @@ def test_free_list_io_per_commit_is_one_container_in_the_steady_state():
         real_write_page(page_id, data)
 
     backend.write_page = spy
-    store.put(b"k0001", b"x" * 8)
+    for i in range(20):
+        written.clear()
+        store.put(f"k{i:04d}".encode(), b"x" * 8)
+        assert not set(written) & set(store._free_list_containers)
+        assert len(set(written) & set(store._free_log_pages)) <= 2
     backend.write_page = real_write_page
+    assert len(store._free_log_pages) <= 1, store._free_log
+
+
+def test_allocation_hands_out_the_lowest_free_ids():
+    """A commit's new pages are the lowest free ids, so they sit together."""
+    store = Store(InMemoryPageBackend(SMALL_PAGE))
+    keys = [f"k{i:04d}".encode() for i in range(300)]
+    for k in keys:
+        store.put(k, b"v" * 8)
+    for k in keys[::2]:
+        store.delete(k)
+    lowest = sorted(store._free_ids)
+    written = []
+    real_write = store._allocator.write_node
+
+    def spy(page_id, node):
+        written.append(page_id)
+        return real_write(page_id, node)
 
-    containers = set(store._free_list_containers)
-    touched_containers = [pid for pid in written if pid in containers]
-    assert len(touched_containers) <= 2, (touched_containers, containers_before)
+    store._allocator.write_node = spy
+    with store.write_batch() as batch:
+        for k in keys[::2]:
+            batch.put(k, b"w" * 8)
+    used = min(len(written), len(lowest))
+    assert used > 5
+    assert sorted(written)[:used] == lowest[:used]
+
+
+def test_an_unclosed_store_recovers_from_the_free_log(tmp_path):
+    """Reopening without close replays the log on top of the last checkpoint."""
+    path = str(tmp_path / "crash.db")
+    store = Store(MMapPageBackend(path, SMALL_PAGE))
+    keys = [f"k{i:04d}".encode() for i in range(80)]
+    for k in keys:
+        store.put(k, b"v" * 8)
+    store.close()
+    store = Store(MMapPageBackend(path, SMALL_PAGE))
+    for round_no in range(5):
+        for k in keys:
+            store.put(k, str(round_no).encode() * 8)
+    assert store._free_log_pages, "the commits should have gone to the log"
+    durable_free = set(store._free_ids) | set(store._free_changes)
+
+    assert verify(path, workers=1).ok
+    crashed = Store(MMapPageBackend(path, SMALL_PAGE))  # the header as last written
+    assert crashed._free_log == store._free_log
+    assert set(crashed._free_ids) <= durable_free
+    assert not set(crashed._free_ids) & set(crashed._free_log_pages)
+    for k in keys:
+        assert crashed.get(k) == b"4" * 8
+    accounted = set(crashed._free_ids) | set(crashed._free_list_containers)
+    live = _reachable(crashed)
+    assert not live & accounted
+    # Only what the last commit left pending or reclaimed is unaccounted for.
+    # The running store's count: the file still has its preallocated tail.
+    leaked = set(range(store._backend.page_count)) - live - accounted
+    leaked -= set(crashed._free_log_pages) | {0}
+    assert len(leaked) <= 2 * crashed._tree.height(crashed._root_id) + 2
+    crashed.put(b"after", b"crash")
+    crashed.close()
+    store._backend.close()
+
+
+class HeaderCrashBackend(InMemoryPageBackend):
+    """Calls on_crash with the file as a crash just before a header write leaves it.
+
+    Every earlier write has been flushed by then, so the copy is what a
+    reopen would find if the header never landed.
+    """
+
+    def __init__(self, page_size: int):
+        super().__init__(page_size)
+        self.on_crash = None
+
+    def write_page(self, page_id: int, data: bytes) -> None:
+        if page_id == 0 and self.on_crash is not None:
+            crashed = InMemoryPageBackend(self.page_size)
+            crashed._pages = [bytearray(page) for page in self._pages]
+            self.on_crash(crashed)
+        super().write_page(page_id, data)
+
+
+def test_a_crash_before_any_header_write_recovers_a_consistent_store():
+    """Including right after a checkpoint, whose header still names the old log."""
+    backend = HeaderCrashBackend(PAGE_SIZE)
+    store = Store(backend)
+    rng = random.Random(5)
+    keys = [f"k{i:03d}".encode() for i in range(300)]
+    contents: dict[bytes, bytes] = {}
+    checkpoints = 0
+    real_checkpoint = store._checkpoint_free_list
+
+    def counting_checkpoint():
+        nonlocal checkpoints
+        checkpoints += 1
+        real_checkpoint()
+
+    def check(crashed):
+        recovered = Store(crashed)
+        free = set(recovered._free_ids)
+        assert not free & set(recovered._free_log_pages)
+        assert not free & set(recovered._free_list_containers)
+        assert not free & _reachable(recovered)
+        assert dict(recovered.scan()) == contents
+        expected = dict(contents)
+        for key in keys[::15]:
+            recovered.put(key, b"after")
+            expected[key] = b"after"
+        for key in keys[7::15]:
+            recovered.delete(key)
+            expected.pop(key, None)
+        assert dict(recovered.scan()) == expected
+
+    store._checkpoint_free_list = counting_checkpoint
+    token = None
+    for step in range(2000):
+        # A reader parked for a while frees a burst of pages when it
+        # leaves, which the free list checkpoints.
+        if step % 100 == 0:
+            token, _ = store._begin_read()
+        elif step % 100 == 60:
+            store._end_read(token)
+        key = rng.choice(keys)
+        backend.on_crash = check
+        if rng.random() < 0.3:
+            store.delete(key)
+            contents.pop(key, None)
+        else:
+            value = b"v" * rng.randrange(1, 60)
+            store.put(key, value)
+            contents[key] = value
+    assert checkpoints > 5
+
+
+def _reachable(store):
+    seen = set()
+    stack = [store._root_id]
+    while stack:
+        page_id = stack.pop()
+        seen.add(page_id)
+        node = deserialize_node(store._backend.read_page(page_id))
+        if isinstance(node, InternalNode):
+            stack.extend(node.children)
+    return seen
 
 
 # тo page falls out of the graph
@@ -173,15 +328,13 @@ def test_container_pool_stays_linked_when_the_free_set_shrinks(tmp_path):
     store = Store(MMapPageBackend(path, PAGE_SIZE))
     for i in range(400):
         store.put(f"k{i:04d}".encode(), b"v" * 10)
-    store._free_ids.extend(range(store._backend.page_count, store._backend.page_count + 200))
-    for _ in range(200):
-        store._backend.allocate_page()
+    _add_spare_free_pages(store, 200)
     store.put(b"k0000", b"w" * 10)
     pool = list(store._free_list_containers)
     assert len(pool) > 3
 
     store._free_ids.clear()
-    store._free_clean = 0
+    store._free_checkpoint_wanted = True
     store.put(b"k0001", b"x" * 10)
 
     assert store._free_list_head != 0
@@ -247,15 +400,12 @@ def test_reopen_recovers_a_large_free_set_and_reuses_it(tmp_path):
 
 
 def test_reopen_repositions_a_chain_written_in_a_different_order(tmp_path):
-    """A chain whose containers are not in stack position heals on the next commit."""
+    """A chain whose containers were written in another order is read in full."""
     path = str(tmp_path / "legacy_order.db")
     store = Store(MMapPageBackend(path, SMALL_PAGE))
     for i in range(60):
         store.put(f"k{i:04d}".encode(), b"v" * 6)
-    first_spare = store._backend.page_count
-    for _ in range(60):
-        store._backend.allocate_page()
-    store._free_ids.extend(range(first_spare, first_spare + 60))
+    _add_spare_free_pages(store, 60)
     store.put(b"k0000", b"w" * 6)
     assert len(store._free_list_containers) >= 3
     store.close()
@@ -286,7 +436,6 @@ def test_reopen_repositions_a_chain_written_in_a_different_order(tmp_path):
 
     reopened = Store(MMapPageBackend(path, SMALL_PAGE))
     assert set(reopened._free_ids) == expected_free
-    assert reopened._free_clean == 0, "a mis-positioned chain must not count as clean"
     handed_out = []
     for i in range(60, 100):
         reopened.put(f"k{i:04d}".encode(), b"x" * 6)
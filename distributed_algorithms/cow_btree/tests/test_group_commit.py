@@ -0,0 +1,265 @@
+"""Group commit: concurrent writers share one root and header publish."""
+
+import threading
+import time
+
+import pytest
+
+from cow_btree.node import NodeTooLargeError
+from cow_btree.page_backend import InMemoryPageBackend
+from cow_btree.store import Store
+
+from .test_large_entries import assert_no_pages_lost
+
+PAGE_SIZE = 128
+
+
+class _SlowFlushBackend(InMemoryPageBackend):
+    """Counts header writes; flushes take long enough for writers to queue."""
+
+    def __init__(self, page_size, flush_delay=0.0):
+        super().__init__(page_size)
+        self.flush_delay = flush_delay
+        self.header_writes = 0
+        self.hold_header_flush = threading.Event()
+        self.header_flush_waiting = threading.Event()
+        self.gate = threading.Event()
+        self._last_page = None
+
+    def write_page(self, page_id, data):
+        self._last_page = page_id
+        if page_id == 0:
+            self.header_writes += 1
+        super().write_page(page_id, data)
+
+    def flush(self):
+        if self.hold_header_flush.is_set() and self._last_page == 0:
+            self.header_flush_waiting.set()
+            assert self.gate.wait(timeout=30)
+        time.sleep(self.flush_delay)
+        super().flush()
+
+
+def _queue_behind_a_leader(store, calls):
+    """Start one thread per (method, args, kwargs) call while leadership is
+    held, so that they all land in the same group; returns the threads and
+    a dict collecting their results or exceptions."""
+    store._group_leader = True
+    outcomes = {}
+
+    def run(i, method, args, kwargs):
+        try:
+            outcomes[i] = getattr(store, method)(*args, **kwargs)
+        except Exception as exc:
+            outcomes[i] = exc
+
+    threads = [
+        threading.Thread(target=run, args=(i, *call)) for i, call in enumerate(calls)
+    ]
+    for t in threads:
+        t.start()
+    deadline = time.monotonic() + 10
+    while len(store._group_queue) < len(calls):
+        assert time.monotonic() < deadline, "writers never queued"
+        time.sleep(0.001)
+    return threads, outcomes
+
+
+def _lead(store):
+    group = store._group_queue
+    store._group_queue = []
+    try:
+        store._lead_group(group)
+    finally:
+        store._group_leader = False
+
+
+def test_concurrent_writers_share_header_writes():
+    backend = _SlowFlushBackend(PAGE_SIZE, flush_delay=0.005)
+    store = Store(backend, group_commit=True)
+    backend.header_writes = 0
+
+    def writer(t):
+        for i in range(25):
+            store.put(f"t{t}-{i:02d}".encode(), f"{t}:{i}".encode())
+
+    threads = [threading.Thread(target=writer, args=(t,)) for t in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=60)
+
+    assert backend.header_writes < 8 * 25 // 2
+    for t in range(8):
+        for i in range(25):
+            assert store.get(f"t{t}-{i:02d}".encode()) == f"{t}:{i}".encode()
+    assert_no_pages_lost(store)
+
+
+def test_one_group_is_one_commit():
+    backend = _SlowFlushBackend(PAGE_SIZE)
+    store = Store(backend, group_commit=True)
+    backend.header_writes = 0
+    threads, outcomes = _queue_behind_a_leader(
+        store, [("put", (f"k{i}".encode(), b"v"), {}) for i in range(6)]
+    )
+    _lead(store)
+    for t in threads:
+        t.join(timeout=10)
+    assert backend.header_writes == 1
+    assert store._epoch == 1
+    assert outcomes == {i: None for i in range(6)}
+
+
+def test_non_durable_writes_return_before_the_header_flush():
+    backend = _SlowFlushBackend(PAGE_SIZE)
+    store = Store(backend, group_commit=True)
+    threads, outcomes = _queue_behind_a_leader(
+        store,
+        [
+            ("put", (b"fast", b"1"), {"durable": False}),
+            ("put", (b"safe", b"2"), {"durable": True}),
+        ],
+    )
+    fast, safe = threads
+    backend.hold_header_flush.set()
+    leader = threading.Thread(target=_lead, args=(store,))
+    leader.start()
+    try:
+        assert backend.header_flush_waiting.wait(timeout=10)
+        fast.join(timeout=10)
+        assert not fast.is_alive()
+        assert store.get(b"fast") == b"1"
+        assert safe.is_alive(), "a durable write returned before its flush"
+        # Pages retired by the commit wait for the header flush.
+        assert not store._free_ids
+    finally:
+        backend.gate.set()
+        leader.join(timeout=10)
+        safe.join(timeout=10)
+    assert outcomes == {0: None, 1: None}
+    assert store.get(b"safe") == b"2"
+
+
+def test_a_failing_write_does_not_sink_its_group():
+    store = Store(InMemoryPageBackend(PAGE_SIZE), group_commit=True)
+    store.put(b"k", b"old")
+    threads, outcomes = _queue_behind_a_leader(
+        store,
+        [
+            ("put", (b"a", b"1"), {}),
+            ("put", (b"huge", b"x" * (PAGE_SIZE * 2)), {}),
+            ("put", (b"k", b"new"), {}),
+        ],
+    )
+    _lead(store)
+    for t in threads:
+        t.join(timeout=10)
+    assert outcomes[0] is None and outcomes[2] is None
+    assert isinstance(outcomes[1], NodeTooLargeError)
+    assert store.get(b"a") == b"1"
+    assert store.get(b"k") == b"new"
+    assert store.get(b"huge") is None
+    assert_no_pages_lost(store)
+
+
+def test_a_failed_header_flush_after_publishing_leaks_no_pages():
+    backend = _SlowFlushBackend(PAGE_SIZE)
+    store = Store(backend, group_commit=True)
+    for i in range(30):
+        store.put(b"k%02d" % i, b"old")
+    threads, outcomes = _queue_behind_a_leader(
+        store,
+        [("put", (b"k%02d" % i, b"new"), {"durable": False}) for i in range(30)]
+        + [("put", (b"last", b"v"), {})],
+    )
+    flush = backend.flush
+
+    def failing_flush():
+        if backend._last_page == 0:
+            raise OSError("disk gone")
+        flush()
+
+    backend.flush = failing_flush
+    _lead(store)
+    backend.flush = flush
+    for t in threads:
+        t.join(timeout=10)
+    assert isinstance(outcomes[30], OSError)
+    assert store.get(b"k00") == b"new"  # published before the flush
+    assert store._pending
+    assert_no_pages_lost(store)
+    store.put(b"k00", b"newer")
+    assert_no_pages_lost(store)
+
+
+def test_deletes_in_a_group_report_their_own_outcome():
+    store = Store(InMemoryPageBackend(PAGE_SIZE), group_commit=True)
+    store.put(b"x", b"1")
+    threads, outcomes = _queue_behind_a_leader(
+        store,
+        [
+            ("delete", (b"x",), {}),
+            ("delete", (b"x",), {}),  # already gone by its turn
+            ("put", (b"y", b"2"), {}),
+            ("delete", (b"y",), {}),
+            ("delete", (b"never",), {}),
+        ],
+    )
+    _lead(store)
+    for t in threads:
+        t.join(timeout=10)
+    assert outcomes == {0: True, 1: False, 2: None, 3: True, 4: False}
+    assert store.get(b"x") is None and store.get(b"y") is None
+
+
+def test_single_writer_behaves_like_the_default_mode():
+    store = Store(InMemoryPageBackend(PAGE_SIZE), group_commit=True)
+    for i in range(100):
+        store.put(f"k{i:03d}".encode(), b"v", durable=i % 2 == 0)
+    assert store.delete(b"k050") is True
+    assert store.delete(b"k050") is False
+    with store.write_batch() as batch:
+        batch.put(b"batched", b"b")
+    assert store.get(b"batched") == b"b"
+    assert len(list(store.scan())) == 100
+    assert not store._group_leader and not store._group_queue
+
+
+@pytest.mark.parametrize("durable", [True, False])
+def test_readers_see_whole_groups(durable):
+    store = Store(InMemoryPageBackend(256), group_commit=True)
+    keys = [f"k{i:02d}".encode() for i in range(20)]
+    with store.write_batch() as batch:
+        for k in keys:
+            batch.put(k, b"0")
+    stop = threading.Event()
+    errors = []
+
+    def writer(w):
+        for i in range(1, 30):
+            with store.write_batch() as batch:
+                for k in keys:
+                    batch.put(k, f"{w}.{i}".encode())
+
+    def reader():
+        while not stop.is_set():
+            token, root_id = store._begin_read()
+            try:
+                seen = {store._tree.get(root_id, k) for k in keys}
+            finally:
+                store._end_read(token)
+            if len(seen) != 1:
+                errors.append(sorted(seen))
+                return
+
+    writers = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    for t in writers + readers:
+        t.start()
+    for t in writers:
+        t.join(timeout=60)
+    stop.set()
+    for t in readers:
+        t.join(timeout=10)
+    assert not errors, errors
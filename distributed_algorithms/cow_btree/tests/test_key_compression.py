@@ -0,0 +1,130 @@
+"""The prefix node layout and suffix-truncated separators."""
+
+import random
+
+import pytest
+
+from cow_btree.node import (
+    CLASSIC,
+    INTERNAL_PREFIX,
+    LEAF_PREFIX,
+    PREFIX,
+    InternalNode,
+    LeafNode,
+    NodeTooLargeError,
+    PrefixLeafView,
+    deserialize_node,
+    leaf_view,
+    node_size,
+    shortest_separator,
+)
+from cow_btree.page_backend import InMemoryPageBackend, MMapPageBackend
+from cow_btree.store import Store
+
+from .test_large_entries import assert_no_pages_lost, read_node
+
+PAGE_SIZE = 256
+
+
+def tenant_keys(count, seed=4):
+    rng = random.Random(seed)
+    keys = {
+        f"tenant{rng.randrange(4):02d}/eu-west/orders/{rng.getrandbits(32):08x}".encode()
+        for _ in range(count)
+    }
+    return sorted(keys)
+
+
+def test_prefix_roundtrip_keeps_keys_and_encoded_size():
+    leaf = LeafNode(
+        keys=[b"user/0001", b"user/0002", b"user/01"], values=[b"a", b"", b"ccc"]
+    )
+    internal = InternalNode(keys=[b"user/1", b"user/15", b"user/2"], children=[1, 2, 3, 4])
+    for node, marker in ((leaf, LEAF_PREFIX), (internal, INTERNAL_PREFIX)):
+        raw = node.serialize(6, PAGE_SIZE, PREFIX)
+        assert raw[0] == marker
+        restored = deserialize_node(raw, 6)
+        assert restored == node
+        assert restored.encoded_size == node.encoded_size
+    for node in (LeafNode(), LeafNode([b"only"], [b"1"]), InternalNode(children=[9])):
+        assert deserialize_node(node.serialize(1, PAGE_SIZE, PREFIX)) == node
+
+
+def test_packed_size_is_exact():
+    leaf = LeafNode(keys=[b"shared/prefix/%03d" % i for i in range(8)], values=[b"v"] * 8)
+    size = node_size(leaf, PREFIX)
+    assert size < node_size(leaf, CLASSIC) == leaf.encoded_size
+    leaf.serialize(0, size, PREFIX)
+    with pytest.raises(NodeTooLargeError):
+        leaf.serialize(0, size - 1, PREFIX)
+    # Nothing shared: the prefix length field is pure overhead.
+    plain = LeafNode(keys=[b"a", b"b"], values=[b"1", b"2"])
+    assert node_size(plain, PREFIX) == plain.encoded_size + 4
+
+
+def test_prefix_view_matches_the_decoded_leaf():
+    keys = tenant_keys(40)
+    leaf = LeafNode(keys=keys, values=[k[-4:] for k in keys])
+    view = leaf_view(memoryview(leaf.serialize(9, 4096, PREFIX)), 9)
+    assert isinstance(view, PrefixLeafView)
+    probes = keys + [b"", b"tenant", b"tenant00/", b"zzz", keys[3] + b"\x00"]
+    for probe in probes:
+        assert view.get(probe) == leaf.get(probe)
+    assert view.get_many(sorted(probes)) == [leaf.get(k) for k in sorted(probes)]
+
+
+def test_shortest_separator_lies_between_its_inputs():
+    rng = random.Random(8)
+    for _ in range(500):
+        left, right = sorted(rng.sample([rng.randbytes(rng.randint(0, 5)) for _ in range(4)], 2))
+        if left == right:
+            continue
+        sep = shortest_separator(left, right)
+        assert left < sep <= right
+        assert right.startswith(sep)
+    assert shortest_separator(b"tenant07/x", b"tenant08/a") == b"tenant08"
+
+
+def test_prefix_store_uses_fewer_pages_and_short_separators():
+    keys = tenant_keys(600)
+    page_counts = {}
+    for node_format in (CLASSIC, PREFIX):
+        store = Store(InMemoryPageBackend(PAGE_SIZE), node_format=node_format)
+        for k in keys:
+            store.put(k, b"v")
+        store._node_cache.clear()
+        assert store.multi_get(keys) == [b"v"] * len(keys)
+        assert [k for k, _ in store.scan()] == keys
+        assert_no_pages_lost(store)
+        page_counts[node_format] = store._backend.page_count - len(store._free_ids)
+        root = read_node(store, store._root_id)
+        assert max(len(k) for k in root.keys) < len(keys[0])
+    assert page_counts[PREFIX] < page_counts[CLASSIC] * 0.8
+
+
+def test_bulk_load_promotes_truncated_separators():
+    keys = tenant_keys(800)
+    store = Store(InMemoryPageBackend(PAGE_SIZE), node_format=PREFIX)
+    store.bulk_load((k, b"x" * 4) for k in keys)
+    root = read_node(store, store._root_id)
+    assert isinstance(root, InternalNode)
+    assert all(len(k) < len(keys[0]) for k in root.keys)
+    for k in keys[::7]:
+        assert store.get(k) == b"x" * 4
+    assert store.get(keys[0][:-1]) is None
+
+
+def test_prefix_pages_reopen_under_another_format(tmp_path):
+    path = str(tmp_path / "prefix.db")
+    keys = tenant_keys(300)
+    store = Store(MMapPageBackend(path, PAGE_SIZE), node_format=PREFIX)
+    for k in keys:
+        store.put(k, b"p")
+    store.close()
+
+    store = Store(MMapPageBackend(path, PAGE_SIZE), node_format=CLASSIC)
+    assert store._backend.read_page(store._root_id)[0] == INTERNAL_PREFIX
+    for k in keys[:100]:
+        store.delete(k)
+    assert [k for k, _ in store.scan()] == keys[100:]
+    store.close()
@@ -3,7 +3,14 @@
 import pytest
 
 from cow_btree.btree import BTree
-from cow_btree.node import InternalNode, LeafNode, NodeTooLargeError, deserialize_node
+from cow_btree.node import (
+    InternalNode,
+    LeafNode,
+    NodeTooLargeError,
+    OverflowRef,
+    deserialize_node,
+)
+from cow_btree.overflow import chain_page_ids
 from cow_btree.page_backend import InMemoryPageBackend
 from cow_btree.store import Store
 
@@ -19,7 +26,10 @@ def read_node(store, page_id):
 
 
 def reachable_pages(store, page_id=None):
-    """Page ids reachable from the published root (the live tree)."""
+    """Page ids reachable from the published root (the live tree).
+
+    Includes the overflow chains that leaves point at.
+    """
     if page_id is None:
         page_id = store._root_id
     node = read_node(store, page_id)
@@ -27,6 +37,10 @@ def reachable_pages(store, page_id=None):
     if isinstance(node, InternalNode):
         for child in node.children:
             pages |= reachable_pages(store, child)
+    else:
+        for value in node.values:
+            if type(value) is OverflowRef:
+                pages.update(chain_page_ids(store._backend, value))
     return pages
 
 
@@ -35,6 +49,7 @@ def assert_no_pages_lost(store):
     accounted = reachable_pages(store)
     accounted.add(0)  # header
     accounted.update(store._free_list_containers)
+    accounted.update(store._free_log_pages)
     accounted.update(store._free_ids)
     accounted.update(page_id for _, page_id in store._pending)
     assert accounted == set(range(store._backend.page_count)), sorted(
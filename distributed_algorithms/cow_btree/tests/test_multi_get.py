@@ -0,0 +1,98 @@
+"""Store.multi_get: batched lookups with a single tree descent."""
+
+import random
+
+import pytest
+
+from cow_btree.node import CLASSIC, NODE_FORMATS, InternalNode, LeafNode, leaf_view
+from cow_btree.page_backend import InMemoryPageBackend
+from cow_btree.store import Store
+
+from .test_large_entries import read_node
+
+PAGE_SIZE = 256
+
+
+@pytest.fixture(params=NODE_FORMATS)
+def store(request):
+    store = Store(InMemoryPageBackend(PAGE_SIZE), node_format=request.param)
+    store.bulk_load((f"k{i:05d}".encode(), f"v{i}".encode()) for i in range(0, 4000, 2))
+    return store
+
+
+def test_answers_come_back_in_input_order(store):
+    rng = random.Random(2)
+    keys = [f"k{rng.randrange(4000):05d}".encode() for _ in range(500)]
+    keys += [b"", b"a", b"zzz", keys[0], keys[0]]  # misses and duplicates
+    assert store.multi_get(keys) == [store.get(k) for k in keys]
+    assert store.multi_get([]) == []
+    assert not store._active_readers
+
+
+def test_every_page_is_read_once_per_batch(store):
+    keys = [f"k{i:05d}".encode() for i in range(1000, 1400, 2)]
+    reads = []
+    real_read = store._allocator.read_node_view
+
+    def spy(page_id):
+        reads.append(page_id)
+        return real_read(page_id)
+
+    store._allocator.read_node_view = spy
+    values = store.multi_get(keys[::-1])
+    assert values == [f"v{int(k[1:])}".encode() for k in keys[::-1]]
+    assert len(reads) == len(set(reads))
+
+    reads.clear()
+    for k in keys:
+        store.get(k)
+    assert len(reads) > 3 * len(set(reads))
+
+
+def test_multi_get_sees_the_wal_overlay(tmp_path):
+    store = Store(
+        InMemoryPageBackend(PAGE_SIZE),
+        wal_path=str(tmp_path / "mg.wal"),
+        checkpoint_bytes=1 << 30,
+    )
+    for i in range(100):
+        store.put(f"k{i:03d}".encode(), b"tree")
+    store.checkpoint()
+    store.put(b"k001", b"log")
+    store.delete(b"k002")
+    store.put(b"new", b"log")
+    assert store.multi_get([b"k000", b"k001", b"k002", b"new", b"k099"]) == [
+        b"tree",
+        b"log",
+        None,
+        b"log",
+        b"tree",
+    ]
+    store.close()
+
+
+def test_multi_get_rejects_non_bytes_keys(store):
+    with pytest.raises(TypeError):
+        store.multi_get([b"k00000", "k00002"])
+    assert not store._active_readers
+
+
+def test_leaf_get_many_matches_get():
+    leaf = LeafNode()
+    for i in range(0, 60, 3):
+        leaf.put(f"k{i:02d}".encode(), f"v{i}".encode())
+    probes = sorted({f"k{i:02d}".encode() for i in range(0, 62)} | {b"", b"z"})
+    want = [leaf.get(k) for k in probes]
+    assert leaf.get_many(probes) == want
+    for node_format in NODE_FORMATS:
+        view = leaf_view(memoryview(leaf.serialize(1, 4096, node_format)), 1)
+        assert view.get_many(probes) == want
+        assert view.get_many(probes[5:6]) == want[5:6]
+
+
+def test_root_that_is_a_leaf():
+    store = Store(InMemoryPageBackend(PAGE_SIZE), node_format=CLASSIC)
+    store.put(b"a", b"1")
+    store.put(b"c", b"3")
+    assert not isinstance(read_node(store, store._root_id), InternalNode)
+    assert store.multi_get([b"c", b"b", b"a"]) == [b"3", None, b"1"]
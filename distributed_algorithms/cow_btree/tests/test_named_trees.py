@@ -0,0 +1,196 @@
+"""Named trees sharing one file: Store.open_tree and its catalog."""
+
+import pytest
+
+from cow_btree.node import NodeTooLargeError
+from cow_btree.page_backend import InMemoryPageBackend, MMapPageBackend
+from cow_btree.store import Store
+from cow_btree.verify import verify
+
+from .test_commit_protocol import _CrashableBackend, _RecordingBackend, _assert_two_phase
+from .test_large_entries import reachable_pages
+
+PAGE_SIZE = 256
+
+
+def make_store(page_size=PAGE_SIZE, **kwargs):
+    return Store(InMemoryPageBackend(page_size), overflow_threshold=64, **kwargs)
+
+
+def assert_no_pages_lost(store):
+    """Like test_large_entries', counting the catalog and every named tree."""
+    accounted = reachable_pages(store)
+    if store._catalog_root:
+        accounted |= reachable_pages(store, store._catalog_root)
+    for root in store._trees.values():
+        accounted |= reachable_pages(store, root)
+    accounted.add(0)
+    accounted.update(store._free_list_containers)
+    accounted.update(store._free_log_pages)
+    accounted.update(store._free_ids)
+    accounted.update(page_id for _, page_id in store._pending)
+    assert accounted == set(range(store._backend.page_count))
+
+
+def test_trees_are_separate_key_spaces():
+    store = make_store()
+    a = store.open_tree("a")
+    b = store.open_tree("b")
+    store.put(b"k", b"default")
+    a.put(b"k", b"in a")
+    b.put(b"k", b"in b")
+    b.put(b"only b", b"x")
+
+    assert store.get(b"k") == b"default"
+    assert a.get(b"k") == b"in a"
+    assert b.multi_get([b"k", b"only b", b"missing"]) == [b"in b", b"x", None]
+    assert a.get(b"only b") is None
+    assert list(b.scan()) == [(b"k", b"in b"), (b"only b", b"x")]
+    assert list(store.scan()) == [(b"k", b"default")]
+    assert store.tree_names() == ["a", "b"]
+    assert store.open_tree("a").get(b"k") == b"in a"
+    assert b.delete(b"k") and not b.delete(b"k")
+    assert_no_pages_lost(store)
+
+
+def test_open_tree_without_create_needs_an_existing_tree():
+    store = make_store()
+    with pytest.raises(KeyError):
+        store.open_tree("missing", create=False)
+    assert store.tree_names() == []
+    with pytest.raises(ValueError):
+        store.open_tree("")
+
+
+def test_batch_across_trees_is_one_two_phase_commit():
+    backend = _RecordingBackend(InMemoryPageBackend(PAGE_SIZE))
+    store = Store(backend)
+    a = store.open_tree("a")
+    b = store.open_tree("b")
+    epoch = store._epoch
+    backend.ops = []
+    with store.write_batch() as batch:
+        for i in range(100):
+            batch.put(b"%03d" % i, b"a", tree=a)
+            batch.put(b"%03d" % i, b"b", tree=b)
+            batch.put(b"%03d" % i, b"default")
+        assert len(batch) == 300
+    _assert_two_phase(backend.ops)
+    assert len([op for op in backend.ops if op[0] == "flush"]) == 2
+    assert store._epoch == epoch + 1
+    assert a.get(b"042") == b"a" and b.get(b"042") == b"b"
+    assert store.get(b"042") == b"default"
+
+
+def test_failed_batch_changes_no_tree():
+    store = make_store(page_size=128)
+    store._overflow_threshold = None
+    a = store.open_tree("a")
+    b = store.open_tree("b")
+    a.put(b"k", b"old")
+    with pytest.raises(NodeTooLargeError):
+        with store.write_batch() as batch:
+            batch.put(b"k", b"new", tree=a)
+            batch.put(b"k", b"x" * 500, tree=b)
+    assert a.get(b"k") == b"old"
+    assert b.get(b"k") is None
+    assert_no_pages_lost(store)
+
+
+def test_batch_rejects_a_tree_of_another_store():
+    other = make_store().open_tree("a")
+    with make_store().write_batch() as batch:
+        with pytest.raises(ValueError):
+            batch.put(b"k", b"v", tree=other)
+
+
+def test_drop_tree_frees_its_pages_and_overflow_chains():
+    store = make_store()
+    a = store.open_tree("a")
+    with store.write_batch() as batch:
+        for i in range(300):
+            batch.put(b"k%04d" % i, b"v" * (200 if i % 10 == 0 else 8), tree=a)
+    tree_pages = len(reachable_pages(store, store._trees[b"a"]))
+    in_use = store._backend.page_count - len(store._free_ids)
+    store.drop_tree("a")
+    store.put(b"k", b"v")  # lets the pages retired by the drop be reclaimed
+
+    assert store.tree_names() == []
+    with pytest.raises(KeyError):
+        a.get(b"k0001")
+    with pytest.raises(KeyError):
+        store.drop_tree("a")
+    # Only the header, roots and free-list pages stay in use.
+    assert in_use - (store._backend.page_count - len(store._free_ids)) >= tree_pages - 3
+    assert_no_pages_lost(store)
+
+
+def test_trees_survive_reopen_and_verify(tmp_path):
+    path = str(tmp_path / "trees.db")
+    store = Store(MMapPageBackend(path, PAGE_SIZE), overflow_threshold=64)
+    for name in ("users", "orders"):
+        tree = store.open_tree(name)
+        with store.write_batch() as batch:
+            for i in range(200):
+                batch.put(b"%04d" % i, name.encode() * 20, tree=tree)
+    store.put(b"default", b"v")
+    store.close()
+
+    report = verify(path, workers=1)
+    assert report.ok, report.errors
+    assert not report.leaked
+
+    store = Store(MMapPageBackend(path, PAGE_SIZE), overflow_threshold=64)
+    assert store.tree_names() == ["orders", "users"]
+    assert store.open_tree("users", create=False).get(b"0199") == b"users" * 20
+    assert store.get(b"default") == b"v"
+    store.close()
+
+
+def test_compaction_moves_named_tree_pages(tmp_path):
+    path = str(tmp_path / "compact.db")
+    store = Store(MMapPageBackend(path, PAGE_SIZE))
+    with store.write_batch() as batch:
+        for i in range(2000):
+            batch.put(b"%05d" % i, b"v" * 16)
+    # The named tree lands past the default one, which is then emptied.
+    tree = store.open_tree("t")
+    with store.write_batch() as batch:
+        for i in range(0, 2000, 10):
+            batch.put(b"%05d" % i, b"t" * 16, tree=tree)
+    with store.write_batch() as batch:
+        for i in range(2000):
+            batch.delete(b"%05d" % i)
+    before = store._backend.page_count
+
+    result = store.compact()
+    assert result["reclaimed_bytes"] > 0
+    assert store._backend.page_count < before // 4
+    assert [key for key, _ in tree.scan()] == [b"%05d" % i for i in range(0, 2000, 10)]
+    assert_no_pages_lost(store)
+    store.close()
+    report = verify(path, workers=1)
+    assert report.ok, report.errors
+
+
+def test_async_crash_reopens_on_the_durable_catalog():
+    backend = _CrashableBackend(PAGE_SIZE)
+    store = Store(backend, flush_interval=60)
+    a = store.open_tree("a")
+    a.put(b"k", b"durable")
+    store.sync()
+    a.put(b"k", b"lost")
+    store.open_tree("b")
+    assert store.tree_names() == ["a", "b"]
+
+    store._stop_flusher()
+    reopened = Store(backend.crash("none"))
+    assert reopened.tree_names() == ["a"]
+    assert reopened.open_tree("a").get(b"k") == b"durable"
+
+
+def test_named_trees_are_refused_with_a_wal(tmp_path):
+    store = Store(InMemoryPageBackend(PAGE_SIZE), wal_path=str(tmp_path / "wal"))
+    with pytest.raises(ValueError):
+        store.open_tree("a")
+    store.close()
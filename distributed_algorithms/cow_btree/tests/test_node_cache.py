@@ -0,0 +1,100 @@
+"""Decoded-node cache: eviction policies, counters, invalidation on reuse."""
+
+import pytest
+
+from cow_btree.node import LeafNode
+from cow_btree.node_cache import FIFO, LRU, NodeCache
+from cow_btree.page_backend import InMemoryPageBackend
+from cow_btree.store import Store
+
+PAGE_SIZE = 128
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = NodeCache(2, LRU)
+    cache.put(1, "a")
+    cache.put(2, "b")
+    assert cache.get(1) == "a"
+    cache.put(3, "c")
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+    assert cache.get(3) == "c"
+    assert cache.evictions == 1
+
+
+def test_fifo_evicts_in_insertion_order_regardless_of_hits():
+    cache = NodeCache(2, FIFO)
+    cache.put(1, "a")
+    cache.put(2, "b")
+    assert cache.get(1) == "a"
+    cache.put(3, "c")
+    assert cache.get(1) is None
+    assert cache.get(2) == "b"
+
+
+def test_zero_capacity_caches_nothing():
+    cache = NodeCache(0)
+    cache.put(1, "a")
+    assert cache.get(1) is None
+    assert len(cache) == 0
+
+
+def test_bad_configuration_is_rejected():
+    with pytest.raises(ValueError, match="eviction policy"):
+        NodeCache(4, "random")
+    with pytest.raises(ValueError, match="non-negative"):
+        NodeCache(-1)
+
+
+def test_repeated_lookups_hit_the_upper_levels():
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    keys = [f"k{i:04d}".encode() for i in range(200)]
+    for k in keys:
+        store.put(k, b"v")
+
+    before = store.cache_stats()
+    for k in keys:
+        assert store.get(k) == b"v"
+    after = store.cache_stats()
+    lookups = (after["hits"] - before["hits"]) + (after["misses"] - before["misses"])
+    assert lookups > len(keys), "every lookup reads at least root and leaf"
+    assert after["hits"] - before["hits"] > len(keys) // 2
+    assert after["size"] <= after["capacity"]
+
+
+def test_reclaimed_pages_are_invalidated_before_reuse():
+    """A page id recycled by the free list must never serve its old node."""
+    store = Store(InMemoryPageBackend(PAGE_SIZE), cache_size=64)
+    keys = [f"k{i:03d}".encode() for i in range(30)]
+    for round_no in range(6):
+        value = f"r{round_no}".encode()
+        for k in keys:
+            store.put(k, value)
+            assert store.get(k) == value
+        for k in keys:
+            assert store.get(k) == value
+    assert store._free_ids or store._pending
+    for page_id in store._free_ids:
+        assert store._node_cache.get(page_id) is None
+
+
+def test_allocation_invalidates_a_stale_entry():
+    """A free id handed out by _allocate_page_id drops its cached node."""
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    spare = store._backend.allocate_page()
+    store._node_cache.put(spare, LeafNode(keys=[b"stale"], values=[b"x"]))
+    store._free_ids.append(spare)
+
+    store.put(b"fresh", b"y")
+    assert store._root_id == spare
+    assert store.get(b"stale") is None
+    assert store.get(b"fresh") == b"y"
+
+
+def test_disabled_cache_still_serves_reads():
+    store = Store(InMemoryPageBackend(PAGE_SIZE), cache_size=0)
+    for i in range(50):
+        store.put(f"k{i:02d}".encode(), b"v")
+    for i in range(50):
+        assert store.get(f"k{i:02d}".encode()) == b"v"
+    assert store.cache_stats()["hits"] == 0
@@ -0,0 +1,119 @@
+"""The slotted node layout and mixed-format files."""
+
+import pytest
+
+from cow_btree.node import (
+    CLASSIC,
+    INTERNAL_SLOTTED,
+    LEAF_SLOTTED,
+    NODE_FORMATS,
+    SLOTTED,
+    InternalNode,
+    LeafNode,
+    NodeTooLargeError,
+    SlottedLeafView,
+    deserialize_node,
+    leaf_view,
+)
+from cow_btree.page_backend import InMemoryPageBackend, MMapPageBackend
+from cow_btree.store import Store
+
+from .test_large_entries import assert_no_pages_lost
+
+PAGE_SIZE = 256
+
+
+def test_slotted_leaf_roundtrip():
+    leaf = LeafNode(keys=[b"", b"a", b"bb", b"ccc"], values=[b"0", b"", b"22", b"333"])
+    raw = leaf.serialize(3, PAGE_SIZE, SLOTTED)
+    assert len(raw) == PAGE_SIZE
+    assert raw[0] == LEAF_SLOTTED
+    restored = deserialize_node(raw, 3)
+    assert restored == leaf
+
+
+def test_slotted_internal_roundtrip():
+    node = InternalNode(keys=[b"f", b"mm", b"t"], children=[10, 20, 30, 40])
+    raw = node.serialize(5, PAGE_SIZE, SLOTTED)
+    assert raw[0] == INTERNAL_SLOTTED
+    assert deserialize_node(raw, 5) == node
+    empty = InternalNode(keys=[], children=[7])
+    assert deserialize_node(empty.serialize(1, PAGE_SIZE, SLOTTED)) == empty
+
+
+def test_both_layouts_need_the_same_number_of_bytes():
+    """Split decisions do not depend on the format a page will be written in."""
+    leaf = LeafNode(keys=[b"k" * 40] * 4, values=[b"v" * 13] * 4)
+    limit = len(leaf.serialize(0, 4096).rstrip(b"\0"))
+    for node_format in (CLASSIC, SLOTTED):
+        leaf.serialize(0, limit + 1, node_format)
+        with pytest.raises(NodeTooLargeError):
+            leaf.serialize(0, limit - 30, node_format)
+
+
+def test_slotted_view_binary_search_matches_the_decoded_leaf():
+    keys = sorted({bytes([a, b]) for a in range(97, 105) for b in range(97, 100)})
+    leaf = LeafNode(keys=keys, values=[k * 2 for k in keys])
+    view = leaf_view(memoryview(leaf.serialize(9, 1024, SLOTTED)), 9)
+    assert isinstance(view, SlottedLeafView)
+    for probe in keys + [b"", b"a", b"zz", b"ab\x00", b"hc"]:
+        assert view.get(probe) == leaf.get(probe)
+    assert leaf_view(memoryview(LeafNode().serialize(1, 64, SLOTTED))).get(b"x") is None
+
+
+@pytest.mark.parametrize("node_format", NODE_FORMATS)
+def test_view_key_range_matches_the_decoded_leaf(node_format):
+    leaf = LeafNode(keys=[b"pre:a", b"pre:bb", b"pre:c"], values=[b"1", b"", b"3" * 9])
+    view = leaf_view(memoryview(leaf.serialize(2, PAGE_SIZE, node_format)), 2)
+    assert view.key_range() == (b"pre:a", b"pre:c")
+    assert leaf_view(LeafNode().serialize(1, PAGE_SIZE, node_format)).key_range() is None
+
+
+def test_wrong_class_for_a_slotted_page_is_rejected():
+    raw = LeafNode(keys=[b"a"], values=[b"1"]).serialize(1, PAGE_SIZE, SLOTTED)
+    with pytest.raises(ValueError, match="node type marker"):
+        InternalNode.deserialize(raw)
+    with pytest.raises(ValueError, match="describes itself as page 1"):
+        deserialize_node(raw, 2)
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError, match="node format"):
+        Store(InMemoryPageBackend(PAGE_SIZE), node_format="columnar")
+
+
+def test_slotted_store_end_to_end():
+    store = Store(InMemoryPageBackend(PAGE_SIZE), node_format=SLOTTED)
+    expected = {f"k{i:04d}".encode(): f"v{i}".encode() * 3 for i in range(500)}
+    for k, v in expected.items():
+        store.put(k, v)
+    store._node_cache.clear()
+    for k, v in expected.items():
+        assert store.get(k) == v
+    assert list(store.scan()) == sorted(expected.items())
+    assert store._backend.read_page(store._root_id)[0] == INTERNAL_SLOTTED
+    assert_no_pages_lost(store)
+
+
+def test_classic_file_stays_readable_and_is_rewritten_gradually(tmp_path):
+    path = str(tmp_path / "mixed.db")
+    store = Store(MMapPageBackend(path, PAGE_SIZE))
+    expected = {f"k{i:04d}".encode(): b"old" for i in range(300)}
+    for k, v in expected.items():
+        store.put(k, v)
+    store.close()
+
+    store = Store(MMapPageBackend(path, PAGE_SIZE), node_format=SLOTTED)
+    for k, v in expected.items():
+        assert store.get(k) == v
+    for k in list(expected)[:50]:
+        store.put(k, b"new")
+        expected[k] = b"new"
+    assert list(store.scan()) == sorted(expected.items())
+    store.close()
+
+    for node_format in (CLASSIC, SLOTTED):
+        reopened = Store(MMapPageBackend(path, PAGE_SIZE), node_format=node_format)
+        for k, v in expected.items():
+            assert reopened.get(k) == v
+        reopened.close()
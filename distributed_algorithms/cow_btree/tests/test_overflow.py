@@ -0,0 +1,178 @@
+"""Overflow pages for values above overflow_threshold, and open_value."""
+
+import pytest
+
+from cow_btree.node import (
+    NODE_FORMATS,
+    LeafNode,
+    NodeTooLargeError,
+    OverflowRef,
+    deserialize_node,
+    leaf_view,
+)
+from cow_btree.page_backend import InMemoryPageBackend, MMapPageBackend
+from cow_btree.store import Store
+
+from .test_large_entries import assert_no_pages_lost
+
+PAGE_SIZE = 256
+THRESHOLD = 64
+
+
+def big(tag: int, size: int = 5000) -> bytes:
+    return bytes((tag + i) % 251 for i in range(size))
+
+
+@pytest.fixture(params=NODE_FORMATS)
+def store(request):
+    return Store(
+        InMemoryPageBackend(PAGE_SIZE),
+        node_format=request.param,
+        overflow_threshold=THRESHOLD,
+    )
+
+
+def test_large_values_round_trip_and_small_ones_stay_inline(store):
+    expected = {}
+    for i in range(40):
+        key = f"k{i:03d}".encode()
+        expected[key] = big(i, 100 * i) if i % 3 == 0 else b"x" * min(i, THRESHOLD)
+        store.put(key, expected[key])
+    store._node_cache.clear()
+    for key, value in expected.items():
+        assert store.get(key) == value
+    assert store.multi_get(list(expected)) == list(expected.values())
+    assert list(store.scan()) == sorted(expected.items())
+    stored = dict(store._tree.scan(store._root_id))
+    for key, value in expected.items():
+        assert (type(stored[key]) is OverflowRef) == (len(value) > THRESHOLD)
+    assert_no_pages_lost(store)
+
+
+def test_overwrite_and_delete_retire_the_chain(store):
+    store.put(b"small", b"s")
+    # The old chain is only retired by the commit that writes the new one,
+    # so two chains' worth of pages is the steady state.
+    store.put(b"blob", big(1, 20_000))
+    store.put(b"blob", big(2, 20_000))
+    pages = store._backend.page_count
+    for round_no in range(10):
+        store.put(b"blob", big(round_no, 20_000))
+        assert store.get(b"blob") == big(round_no, 20_000)
+    assert store._backend.page_count <= pages + 3
+    assert store.delete(b"blob")
+    assert store.get(b"blob") is None
+    assert_no_pages_lost(store)
+    assert len(store._free_ids) >= 20_000 // PAGE_SIZE
+
+
+def test_open_value_streams_and_pins_its_epoch(store):
+    value = big(7, 10_000)
+    store.put(b"blob", value)
+    reader = store.open_value(b"blob")
+    assert reader.length == len(value)
+    head = reader.read(1000)
+    assert store._active_readers
+    store.put(b"blob", b"replaced")  # its chain must survive the reader
+    chunks = list(reader)
+    assert all(len(chunk) <= PAGE_SIZE for chunk in chunks)
+    assert head + b"".join(chunks) == value
+    assert reader.read(10) == b""
+    assert not store._active_readers
+
+    with store.open_value(b"blob") as inline:
+        assert inline.read() == b"replaced"
+    assert store.open_value(b"missing") is None
+
+    reader = store.open_value(b"blob")
+    reader.close()
+    assert not store._active_readers
+
+
+def test_snapshot_keeps_overwritten_values(store):
+    store.put(b"blob", big(3))
+    with store.snapshot() as snap:
+        store.put(b"blob", big(4))
+        store.delete(b"blob")
+        assert snap.get(b"blob") == big(3)
+        assert snap.multi_get([b"blob"]) == [big(3)]
+        with snap.open_value(b"blob") as reader:
+            assert reader.read() == big(3)
+    assert store.get(b"blob") is None
+    assert_no_pages_lost(store)
+
+
+def test_failed_commit_rolls_back_its_chains():
+    store = Store(InMemoryPageBackend(PAGE_SIZE), overflow_threshold=THRESHOLD)
+    store.put(b"a", b"1")
+    with pytest.raises(NodeTooLargeError):
+        with store.write_batch() as batch:
+            batch.put(b"blob", big(5))
+            batch.put(b"k" * PAGE_SIZE, b"key too large for any page")
+    assert store.get(b"blob") is None
+    assert_no_pages_lost(store)
+    assert not store._pending
+
+
+def test_without_a_threshold_large_values_are_still_rejected():
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    with pytest.raises(NodeTooLargeError):
+        store.put(b"blob", big(1))
+    with pytest.raises(ValueError, match="overflow_threshold"):
+        Store(InMemoryPageBackend(PAGE_SIZE), overflow_threshold=0)
+
+
+def test_bulk_load_and_wal_checkpoint_spill(tmp_path):
+    store = Store(InMemoryPageBackend(PAGE_SIZE), overflow_threshold=THRESHOLD)
+    items = [(f"k{i:03d}".encode(), big(i, 300 * (i % 4))) for i in range(50)]
+    store.bulk_load(items)
+    assert list(store.scan()) == items
+    assert_no_pages_lost(store)
+
+    wal_store = Store(
+        InMemoryPageBackend(PAGE_SIZE),
+        wal_path=str(tmp_path / "o.wal"),
+        checkpoint_bytes=1 << 30,
+        overflow_threshold=THRESHOLD,
+    )
+    wal_store.put(b"blob", big(9))
+    assert wal_store.get(b"blob") == big(9)
+    wal_store.checkpoint()
+    assert wal_store.get(b"blob") == big(9)
+    with wal_store.open_value(b"blob") as reader:
+        assert reader.read() == big(9)
+    assert_no_pages_lost(wal_store)
+    wal_store.close()
+
+
+def test_values_survive_a_reopen_without_the_option(tmp_path):
+    path = str(tmp_path / "overflow.db")
+    store = Store(MMapPageBackend(path, PAGE_SIZE), overflow_threshold=THRESHOLD)
+    for i in range(20):
+        store.put(f"k{i:02d}".encode(), big(i, 1000 + i))
+    store.close()
+
+    reopened = Store(MMapPageBackend(path, PAGE_SIZE))
+    for i in range(20):
+        assert reopened.get(f"k{i:02d}".encode()) == big(i, 1000 + i)
+    reopened.delete(b"k00")
+    assert_no_pages_lost(reopened)
+    reopened.close()
+
+
+def test_references_are_flagged_in_every_layout():
+    ref = OverflowRef.to(42, 123_456)
+    leaf = LeafNode(keys=[b"a", b"b", b"c"], values=[b"plain", ref, b""])
+    for node_format in NODE_FORMATS:
+        raw = leaf.serialize(3, PAGE_SIZE, node_format)
+        restored = deserialize_node(raw, 3)
+        assert restored == leaf
+        assert [type(v) is OverflowRef for v in restored.values] == [False, True, False]
+        assert restored.encoded_size == leaf.encoded_size
+        view = leaf_view(memoryview(raw), 3)
+        got = view.get(b"b")
+        assert type(got) is OverflowRef
+        assert (got.page_id, got.length) == (42, 123_456)
+        assert view.get(b"c") == b""
+        assert type(view.get(b"a")) is bytes
+        assert view.get_many([b"a", b"b", b"c", b"d", b"e", b"f"])[:3] == leaf.values
@@ -0,0 +1,129 @@
+"""Per-thread reader epoch slots and the pin-then-validate read protocol."""
+
+import gc
+import threading
+
+from cow_btree.page_backend import InMemoryPageBackend
+from cow_btree.reader_registry import ReaderRegistry
+from cow_btree.store import Store
+
+PAGE_SIZE = 128
+
+
+def test_minimum_tracks_pins_and_unpins():
+    registry = ReaderRegistry()
+    assert registry.min_epoch() is None
+    a = registry.pin(5)
+    b = registry.pin(3)
+    c = registry.pin(7)
+    assert registry.min_epoch() == 3
+    registry.unpin(b)
+    assert registry.min_epoch() == 5
+    registry.unpin(a)
+    assert registry.min_epoch() == 7
+    registry.unpin(c)
+    assert registry.min_epoch() is None
+    assert registry.pins() == {}
+
+
+def test_threads_get_separate_slots_and_the_minimum_spans_them():
+    registry = ReaderRegistry()
+    main_token = registry.pin(10)
+    pinned = threading.Event()
+    release = threading.Event()
+    tokens = []
+
+    def reader():
+        tokens.append(registry.pin(4))
+        pinned.set()
+        release.wait(timeout=10)
+
+    t = threading.Thread(target=reader)
+    t.start()
+    assert pinned.wait(timeout=10)
+    assert tokens[0][0] is not main_token[0]
+    assert registry.min_epoch() == 4
+    # A pin can be released from another thread (e.g. a cursor handed off).
+    registry.unpin(tokens[0])
+    assert registry.min_epoch() == 10
+    release.set()
+    t.join(timeout=10)
+    registry.unpin(main_token)
+
+
+def test_slots_of_exited_threads_are_pruned():
+    registry = ReaderRegistry()
+
+    def reader():
+        registry.unpin(registry.pin(1))
+
+    threads = [threading.Thread(target=reader) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    del threads, t
+    gc.collect()
+    assert registry.min_epoch() is None
+    assert registry._slots == []
+
+
+def test_a_commit_between_pin_and_validation_forces_a_retry():
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    store.put(b"k", b"old")
+    real_pin = store._readers.pin
+    attempts = []
+
+    def racing_pin(epoch):
+        token = real_pin(epoch)
+        attempts.append(epoch)
+        if len(attempts) == 1:
+            # A writer publishes (and reclaims) after we read the state but
+            # before the pin could be validated.
+            store._readers.pin = real_pin
+            store.put(b"k", b"new")
+            store._readers.pin = racing_pin
+        return token
+
+    store._readers.pin = racing_pin
+    token, root_id = store._begin_read()
+    assert attempts == [attempts[0], attempts[0] + 1]
+    assert root_id == store._root_id
+    assert store._active_readers == {token: store._epoch}
+    assert store._tree.get(root_id, b"k") == b"new"
+    store._end_read(token)
+    assert not store._active_readers
+
+
+def test_reclaim_respects_pins_from_many_threads():
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    for i in range(60):
+        store.put(f"k{i:02d}".encode(), b"0")
+    barrier = threading.Barrier(5)
+    done = threading.Event()
+    errors = []
+
+    def reader():
+        token, root_id = store._begin_read()
+        try:
+            barrier.wait(timeout=10)
+            done.wait(timeout=30)
+            for i in range(60):
+                if store._tree.get(root_id, f"k{i:02d}".encode()) != b"0":
+                    errors.append(i)
+        finally:
+            store._end_read(token)
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for t in readers:
+        t.start()
+    barrier.wait(timeout=10)
+    for round_no in range(1, 6):
+        for i in range(60):
+            store.put(f"k{i:02d}".encode(), str(round_no).encode())
+    done.set()
+    for t in readers:
+        t.join(timeout=30)
+    assert not errors
+    store.put(b"k00", b"final")
+    assert not store._pending
@@ -0,0 +1,137 @@
+"""Ordered range scans (Store.scan) over the COW B+-tree."""
+
+import random
+
+import pytest
+
+from cow_btree.page_backend import InMemoryPageBackend, MMapPageBackend
+from cow_btree.store import Store
+
+from .test_large_entries import assert_no_pages_lost
+
+PAGE_SIZE = 128
+
+
+@pytest.fixture
+def populated():
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    rng = random.Random(3)
+    expected = {}
+    keys = [f"k{i:04d}".encode() for i in range(0, 1000, 2)]
+    rng.shuffle(keys)
+    for k in keys:
+        expected[k] = k[::-1]
+        store.put(k, k[::-1])
+    return store, dict(sorted(expected.items()))
+
+
+def test_full_scan_returns_everything_in_order(populated):
+    store, expected = populated
+    assert list(store.scan()) == list(expected.items())
+    assert list(store.scan(reverse=True)) == list(expected.items())[::-1]
+
+
+@pytest.mark.parametrize(
+    "start,end",
+    [
+        (b"k0100", b"k0200"),
+        (b"k0101", b"k0199"),  # bounds that are not stored keys
+        (None, b"k0050"),
+        (b"k0950", None),
+        (b"a", b"b"),  # entirely before the data
+        (b"k0500", b"k0500"),  # empty range
+        (b"k0600", b"k0400"),  # inverted range
+    ],
+)
+def test_bounded_scans_match_a_sorted_dict(populated, start, end):
+    store, expected = populated
+    want = [
+        (k, v)
+        for k, v in expected.items()
+        if (start is None or k >= start) and (end is None or k < end)
+    ]
+    assert list(store.scan(start, end)) == want
+    assert list(store.scan(start, end, reverse=True)) == want[::-1]
+
+
+def test_limit_stops_early(populated):
+    store, expected = populated
+    items = list(expected.items())
+    assert list(store.scan(limit=5)) == items[:5]
+    assert list(store.scan(reverse=True, limit=3)) == items[::-1][:3]
+    assert list(store.scan(b"k0100", limit=0)) == []
+    with pytest.raises(ValueError):
+        store.scan(limit=-1)
+
+
+def test_scan_of_an_empty_store():
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    assert list(store.scan()) == []
+    assert list(store.scan(reverse=True)) == []
+    assert not store._active_readers
+
+
+def test_cursor_pins_its_epoch_until_closed(populated):
+    store, _ = populated
+    cursor = store.scan()
+    next(cursor)
+    assert len(store._active_readers) == 1
+    cursor.close()
+    assert not store._active_readers
+    cursor.close()
+    assert list(cursor) == []
+
+
+def test_exhaustion_and_context_manager_release_the_epoch(populated):
+    store, expected = populated
+    assert len(list(store.scan(b"k0900"))) > 0
+    assert not store._active_readers
+    with store.scan() as cursor:
+        next(cursor)
+        assert store._active_readers
+    assert not store._active_readers
+    list(store.scan(limit=2))
+    assert not store._active_readers
+
+
+def test_open_cursor_reads_its_snapshot_while_writers_recycle_pages(populated):
+    store, expected = populated
+    cursor = store.scan()
+    first = next(cursor)
+    for round_no in range(5):
+        for k in list(expected)[::3]:
+            store.put(k, f"new{round_no}".encode())
+        store.put(f"z{round_no}".encode(), b"added later")
+    rest = list(cursor)
+    assert [first] + rest == list(expected.items())
+    assert_no_pages_lost(store)
+    assert store.get(list(expected)[0]) == b"new4"
+
+
+def test_scan_rejects_non_bytes_bounds(populated):
+    store, _ = populated
+    with pytest.raises(TypeError):
+        store.scan("k0001")
+    assert not store._active_readers
+
+
+def test_scan_hints_upcoming_siblings_to_the_backend(populated):
+    store, expected = populated
+    hinted: list[list[int]] = []
+    store._backend.prefetch = hinted.append
+    assert len(list(store.scan())) == len(expected)
+    assert hinted
+    assert all(hint for hint in hinted)
+
+
+def test_scan_over_the_mmap_backend(tmp_path):
+    path = str(tmp_path / "scan.db")
+    store = Store(MMapPageBackend(path, 256))
+    for i in range(300):
+        store.put(f"k{i:04d}".encode(), b"v" * 10)
+    store.close()
+
+    reopened = Store(MMapPageBackend(path, 256))
+    keys = [k for k, _ in reopened.scan(b"k0100", b"k0200")]
+    assert keys == [f"k{i:04d}".encode() for i in range(100, 200)]
+    reopened.close()
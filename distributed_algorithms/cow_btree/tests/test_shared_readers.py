@@ -0,0 +1,204 @@
+"""Read-only stores in other processes, pinning epochs through a ReaderTable."""
+
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from cow_btree.page_backend import InMemoryPageBackend, MMapPageBackend
+from cow_btree.reader_table import ReaderTable
+from cow_btree.store import Store
+
+PAGE_SIZE = 256
+KEYS = [b"k%03d" % i for i in range(200)]
+
+
+def open_pair(tmp_path, **writer_kwargs):
+    path = str(tmp_path / "shared.db")
+    table = str(tmp_path / "shared.readers")
+    writer = Store(MMapPageBackend(path, PAGE_SIZE), reader_table=table, **writer_kwargs)
+    writer.put(b"k", b"v0")
+    reader = Store(MMapPageBackend(path, PAGE_SIZE), read_only=True, reader_table=table)
+    return writer, reader
+
+
+def test_reader_follows_the_writers_commits(tmp_path):
+    writer, reader = open_pair(tmp_path)
+    assert reader.get(b"k") == b"v0"
+    with writer.write_batch() as batch:
+        for key in KEYS:
+            batch.put(key, b"x" * 40)  # grows the file past the reader's mapping
+    assert reader.get(b"k199") == b"x" * 40
+    assert len(list(reader.scan())) == len(KEYS) + 1
+    assert reader._epoch == writer._epoch
+
+    writer.open_tree("t").put(b"a", b"in t")
+    assert reader.tree_names() == ["t"]
+    assert reader.open_tree("t", create=False).get(b"a") == b"in t"
+    reader.close()
+    writer.close()
+
+
+def test_read_only_store_refuses_writes(tmp_path):
+    writer, reader = open_pair(tmp_path)
+    for write in (
+        lambda: reader.put(b"k", b"v"),
+        lambda: reader.delete(b"k"),
+        lambda: reader.open_tree("new"),
+        lambda: reader.compact(),
+    ):
+        with pytest.raises(RuntimeError):
+            write()
+    with pytest.raises(RuntimeError):
+        with reader.write_batch() as batch:
+            batch.put(b"k", b"v")
+    assert writer.get(b"k") == b"v0"
+    reader.close()
+    writer.close()
+
+
+def test_read_only_needs_a_table_and_a_shared_file(tmp_path):
+    path = str(tmp_path / "x.db")
+    Store(MMapPageBackend(path, PAGE_SIZE)).close()
+    with pytest.raises(ValueError):
+        Store(MMapPageBackend(path, PAGE_SIZE), read_only=True)
+    with pytest.raises(ValueError):
+        Store(
+            InMemoryPageBackend(PAGE_SIZE),
+            read_only=True,
+            reader_table=str(tmp_path / "t"),
+        )
+
+
+def test_pinned_reader_keeps_its_pages_from_reuse(tmp_path):
+    writer, reader = open_pair(tmp_path)
+    with writer.write_batch() as batch:
+        for key in KEYS:
+            batch.put(key, b"a" * 40)
+    cursor = reader.scan()
+    assert next(cursor) == (b"k", b"v0")
+    for value in (b"b", b"c", b"d"):
+        with writer.write_batch() as batch:
+            for key in KEYS:
+                batch.put(key, value * 40)
+    assert writer._pending  # held back for the reader process
+    assert list(cursor) == [(key, b"a" * 40) for key in KEYS]
+
+    writer.put(b"k", b"v1")
+    assert not writer._pending
+    assert reader.get(b"k000") == b"d" * 40
+    reader.close()
+    writer.close()
+
+
+def test_header_epoch_survives_reopen(tmp_path):
+    path = str(tmp_path / "epoch.db")
+    store = Store(MMapPageBackend(path, PAGE_SIZE))
+    for i in range(5):
+        store.put(b"k", b"%d" % i)
+    epoch = store._epoch
+    store.close()
+    assert Store(MMapPageBackend(path, PAGE_SIZE))._epoch == epoch
+
+
+def test_table_slots_run_out(tmp_path):
+    path = str(tmp_path / "small.readers")
+    tables = [ReaderTable(path, slots=2) for _ in range(3)]
+    tables[0].claim()
+    tables[1].claim()
+    with pytest.raises(RuntimeError):
+        tables[2].claim()
+    tables[0].pin(7)
+    tables[1].pin(4)
+    tables[1].pin(9)
+    assert tables[2].min_epoch() == 4
+    tables[1].unpin(4)
+    assert tables[2].min_epoch() == 7
+    for table in tables:
+        table.close()
+
+
+# reader processes
+
+
+def _pin_and_wait(path, table, pinned, release, die):
+    store = Store(MMapPageBackend(path, PAGE_SIZE), read_only=True, reader_table=table)
+    snapshot = store.snapshot()
+    pinned.set()
+    release.wait(30)
+    if die:
+        os._exit(0)  # no close: the slot stays set
+    snapshot.close()
+    store.close()
+
+
+def _check_batches(path, table, seconds, results):
+    store = Store(MMapPageBackend(path, PAGE_SIZE), read_only=True, reader_table=table)
+    checked = torn = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        values = store.multi_get(KEYS)
+        torn += len(set(values)) != 1
+        checked += 1
+    store.close()
+    results.put((checked, torn))
+
+
+@pytest.fixture
+def spawn():
+    return multiprocessing.get_context("spawn")
+
+
+def test_dead_reader_process_does_not_pin_forever(tmp_path, spawn):
+    writer, reader = open_pair(tmp_path)
+    reader.close()
+    path, table = str(tmp_path / "shared.db"), str(tmp_path / "shared.readers")
+    pinned, release = spawn.Event(), spawn.Event()
+    child = spawn.Process(target=_pin_and_wait, args=(path, table, pinned, release, True))
+    child.start()
+    assert pinned.wait(30)
+    epoch = writer._epoch
+    writer.put(b"k", b"v1")
+    assert writer._reader_table.min_epoch() == epoch
+    assert writer._pending
+
+    release.set()
+    child.join(30)
+    writer.put(b"k", b"v2")
+    assert writer._reader_table.min_epoch() is None
+    assert not writer._pending
+    writer.close()
+
+
+def test_reader_processes_see_only_whole_commits(tmp_path, spawn):
+    writer, reader = open_pair(tmp_path)
+    reader.close()
+    with writer.write_batch() as batch:
+        for key in KEYS:
+            batch.put(key, b"0")
+    path, table = str(tmp_path / "shared.db"), str(tmp_path / "shared.readers")
+    results = spawn.Queue()
+    children = [
+        spawn.Process(target=_check_batches, args=(path, table, 2.0, results))
+        for _ in range(2)
+    ]
+    for child in children:
+        child.start()
+    stop = threading.Event()
+    threading.Timer(2.5, stop.set).start()
+    i = 0
+    while not stop.is_set():
+        i += 1
+        # Varying lengths so leaves split, merge and reuse pages.
+        value = b"%d" % i * (1 + i % 30)
+        with writer.write_batch() as batch:
+            for key in KEYS:
+                batch.put(key, value)
+    outcomes = [results.get(timeout=30) for _ in children]
+    for child in children:
+        child.join(30)
+    assert all(checked > 0 for checked, _ in outcomes)
+    assert [torn for _, torn in outcomes] == [0, 0]
+    writer.close()
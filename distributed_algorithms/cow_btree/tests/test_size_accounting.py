@@ -0,0 +1,121 @@
+"""Incremental encoded-size tracking and single serialization per commit."""
+
+import random
+
+import pytest
+
+from cow_btree.btree import BTree
+from cow_btree.node import (
+    CLASSIC,
+    SLOTTED,
+    InternalNode,
+    LeafNode,
+    NodeTooLargeError,
+    deserialize_node,
+    fits_in_page,
+)
+from cow_btree.page_backend import InMemoryPageBackend
+from cow_btree.store import Store
+
+from .test_large_entries import _SizeOnlyAllocator
+
+PAGE_SIZE = 256
+
+
+def _used_bytes(node, node_format):
+    """Serialized length, measured independently of encoded_size."""
+    raw = node.serialize(0, 4096, node_format)
+    restored = deserialize_node(raw)
+    assert restored == node
+    return restored.encoded_size
+
+
+@pytest.mark.parametrize("node_format", [CLASSIC, SLOTTED])
+def test_leaf_size_tracks_every_mutation(node_format):
+    rng = random.Random(11)
+    leaf = LeafNode()
+    for _ in range(300):
+        key = rng.randbytes(rng.randint(0, 6))
+        if rng.random() < 0.3:
+            leaf.remove(key)
+        else:
+            leaf.put(key, rng.randbytes(rng.randint(0, 8)))
+        if leaf.encoded_size > 4096:
+            break
+        assert leaf.encoded_size == LeafNode(list(leaf.keys), list(leaf.values)).encoded_size
+    assert leaf.encoded_size == _used_bytes(leaf, node_format)
+
+
+@pytest.mark.parametrize("node_format", [CLASSIC, SLOTTED])
+def test_decoded_nodes_report_their_encoded_size(node_format):
+    leaf = LeafNode(keys=[b"a", b"bcd"], values=[b"", b"xyz"])
+    internal = InternalNode(keys=[b"m", b"nn"], children=[1, 2, 3])
+    for node in (leaf, internal, LeafNode(), InternalNode(children=[4])):
+        raw = node.serialize(7, PAGE_SIZE, node_format)
+        assert deserialize_node(raw, 7).encoded_size == node.encoded_size
+
+
+def test_fit_check_does_not_serialize():
+    class Exploding(LeafNode):
+        def serialize_into(self, *args, **kwargs):
+            raise AssertionError("fit check serialized the node")
+
+    leaf = Exploding(keys=[b"k" * 10], values=[b"v" * 10])
+    assert fits_in_page(leaf, 0, PAGE_SIZE)
+    assert not fits_in_page(leaf, 0, 20)
+
+
+def test_serialize_into_rejects_a_short_buffer():
+    leaf = LeafNode(keys=[b"x" * 100], values=[b"y" * 100])
+    with pytest.raises(NodeTooLargeError):
+        leaf.serialize_into(bytearray(64), 0)
+
+
+def test_split_pieces_carry_exact_sizes():
+    tree = BTree(_SizeOnlyAllocator(PAGE_SIZE))
+    leaf = LeafNode()
+    for i in range(60):
+        leaf.put(f"key{i:03d}".encode(), b"v" * (i % 17))
+    pieces = tree._split_leaf_to_fit(leaf)
+    assert len(pieces) > 2
+    for piece in pieces:
+        assert piece.encoded_size == LeafNode(piece.keys, piece.values).encoded_size
+        assert piece.encoded_size <= PAGE_SIZE
+
+    node = InternalNode(
+        keys=[f"sep{i:03d}".encode() * 3 for i in range(40)], children=list(range(41))
+    )
+    pieces, seps = tree._split_internal_to_fit(node)
+    assert len(seps) == len(pieces) - 1
+    for piece in pieces:
+        assert piece.encoded_size == InternalNode(piece.keys, piece.children).encoded_size
+        assert piece.encoded_size <= PAGE_SIZE
+
+
+def test_each_written_node_is_serialized_once_per_commit(monkeypatch):
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    for i in range(200):
+        store.put(f"k{i:04d}".encode(), b"v" * 12)
+
+    calls = []
+    for cls in (LeafNode, InternalNode):
+        real = cls.serialize_into
+
+        def counting(self, buf, page_id, node_format=CLASSIC, _real=real):
+            calls.append(page_id)
+            _real(self, buf, page_id, node_format)
+
+        monkeypatch.setattr(cls, "serialize_into", counting)
+
+    allocated = []
+    real_allocate = store._allocate_page_id
+
+    def spy_allocate():
+        page_id = real_allocate()
+        allocated.append(page_id)
+        return page_id
+
+    store._allocate_page_id = spy_allocate
+    store.put(b"k0100", b"w" * 40)  # forces a leaf split
+    assert sorted(calls) == sorted(allocated)
+    assert len(calls) == len(set(calls))
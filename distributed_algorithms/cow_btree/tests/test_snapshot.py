@@ -0,0 +1,115 @@
+"""Store.snapshot(): long-lived, point-in-time read handles."""
+
+import pytest
+
+from cow_btree.page_backend import InMemoryPageBackend
+from cow_btree.store import Store
+
+from .test_large_entries import assert_no_pages_lost
+
+PAGE_SIZE = 128
+
+
+@pytest.fixture
+def store():
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    for i in range(200):
+        store.put(f"k{i:03d}".encode(), b"old")
+    return store
+
+
+def test_snapshot_reads_ignore_later_writes(store):
+    with store.snapshot() as snap:
+        for i in range(0, 200, 2):
+            store.put(f"k{i:03d}".encode(), b"new")
+        store.delete(b"k001")
+        store.put(b"zzz", b"added")
+        assert snap.get(b"k000") == b"old"
+        assert snap.get(b"k001") == b"old"
+        assert snap.get(b"zzz") is None
+        assert snap.multi_get([b"k002", b"zzz", b"k003"]) == [b"old", None, b"old"]
+        assert [v for _, v in snap.scan()] == [b"old"] * 200
+        assert list(snap.scan(b"k010", b"k013", reverse=True)) == [
+            (b"k012", b"old"),
+            (b"k011", b"old"),
+            (b"k010", b"old"),
+        ]
+    assert store.get(b"k000") == b"new"
+    assert store.get(b"k001") is None
+
+
+def test_snapshot_pins_its_epoch_until_closed(store):
+    snap = store.snapshot()
+    assert store._active_readers == {snap._token: store._epoch}
+    for i in range(50):
+        store.put(f"k{i:03d}".encode(), b"churn")
+    assert store._active_readers
+    snap.close()
+    snap.close()
+    assert not store._active_readers
+    with pytest.raises(RuntimeError, match="closed"):
+        snap.get(b"k000")
+    store.put(b"k000", b"after")
+    assert not store._pending
+    assert_no_pages_lost(store)
+
+
+def test_reads_do_not_touch_the_reader_registry(store):
+    snap = store.snapshot()
+    calls = []
+    real_begin = store._begin_read_state
+    store._begin_read_state = lambda: calls.append(1) or real_begin()
+    for i in range(200):
+        snap.get(f"k{i:03d}".encode())
+    assert calls == []
+    snap.close()
+
+
+def test_held_pages_metric_tracks_churn(store):
+    snap = store.snapshot()
+    assert snap.held_pages() == 0
+    assert store.snapshot_stats() == [{"epoch": snap.epoch, "held_pages": 0}]
+    for i in range(20):
+        store.put(f"k{i:03d}".encode(), b"churn")
+    held = snap.held_pages()
+    assert held > 0
+    assert held == len(store._pending)
+
+    later = store.snapshot()
+    store.put(b"k100", b"more")
+    stats = store.snapshot_stats()
+    assert [s["epoch"] for s in stats] == [snap.epoch, later.epoch]
+    assert stats[0]["held_pages"] > stats[1]["held_pages"] > 0
+
+    snap.close()
+    later.close()
+    assert store.snapshot_stats() == []
+
+
+def test_cursor_outlives_its_snapshot(store):
+    snap = store.snapshot()
+    cursor = snap.scan()
+    first = next(cursor)
+    snap.close()
+    for i in range(200):
+        store.put(f"k{i:03d}".encode(), b"new")
+    rest = list(cursor)
+    assert [first] + rest == [(f"k{i:03d}".encode(), b"old") for i in range(200)]
+    assert not store._active_readers
+
+
+def test_snapshot_sees_wal_overlay(tmp_path):
+    store = Store(
+        InMemoryPageBackend(PAGE_SIZE),
+        wal_path=str(tmp_path / "snap.wal"),
+        checkpoint_bytes=1 << 30,
+    )
+    store.put(b"a", b"1")
+    snap = store.snapshot()
+    store.put(b"a", b"2")
+    store.checkpoint()
+    assert snap.get(b"a") == b"1"
+    assert list(snap.scan()) == [(b"a", b"1")]
+    snap.close()
+    assert store.get(b"a") == b"2"
+    store.close()
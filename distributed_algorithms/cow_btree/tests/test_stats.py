@@ -0,0 +1,114 @@
+"""Opt-in instrumentation: counters, phase timings and commit records."""
+
+import io
+import json
+
+import pytest
+
+from cow_btree.node import NodeTooLargeError
+from cow_btree.page_backend import InMemoryPageBackend, MMapPageBackend
+from cow_btree.stats import BUILD_PHASES, COMMIT_PHASES, COUNTERS, JsonLinesExporter
+from cow_btree.store import Store, _Allocator, _InstrumentedAllocator
+
+PAGE_SIZE = 256
+
+
+def test_disabled_stats_install_no_hooks():
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    assert type(store._allocator) is _Allocator
+    for i in range(100):
+        store.put(b"k%03d" % i, b"v" * 20)
+    stats = store.stats()
+    assert not stats["enabled"]
+    assert all(v == 0 for v in stats["counters"].values())
+    assert stats["free_pages"] == len(store._free_ids)
+    assert stats["page_count"] == store._backend.page_count
+    assert stats["active_readers"] == 0
+
+
+def test_commit_records_account_for_every_page(tmp_path):
+    records = []
+    store = Store(
+        MMapPageBackend(str(tmp_path / "s.db"), PAGE_SIZE),
+        cache_size=0,
+        on_commit=records.append,
+    )
+    assert isinstance(store._allocator, _InstrumentedAllocator)
+    for i in range(200):
+        store.put(b"k%04d" % i, b"v" * 20)
+
+    assert len(records) == 200
+    assert [r["epoch"] for r in records] == list(range(1, 201))
+    last = records[-1]
+    assert set(last["seconds"]) == set(COMMIT_PHASES + BUILD_PHASES)
+    assert set(last["counters"]) == set(COUNTERS)
+    assert last["counters"]["commits"] == 1
+    # With the cache off, the path down is read from the backend.
+    assert last["counters"]["pages_read"] >= store._tree.height(store._root_id)
+    # A path copy plus the header; retired pages match the old path.
+    assert last["counters"]["pages_written"] >= last["counters"]["pages_retired"] + 1
+    assert last["seconds"]["build"] >= last["seconds"]["serialize"]
+
+    totals = store.stats()
+    assert totals["enabled"]
+    counters = totals["counters"]
+    assert counters["commits"] == 200
+    assert counters["splits"] > 0
+    assert counters["pages_written"] == sum(r["counters"]["pages_written"] for r in records) + 1
+    assert counters["free_list_pages_written"] >= 1
+    assert sum(r["counters"]["splits"] for r in records) == counters["splits"]
+    assert all(v >= 0 for v in totals["seconds"].values())
+    assert totals["seconds"]["flush_pages"] > 0
+
+
+def test_gauges_follow_readers_and_the_reclaim_backlog():
+    records = []
+    store = Store(InMemoryPageBackend(PAGE_SIZE), on_commit=records.append)
+    store.put(b"a", b"1")
+    with store.snapshot():
+        store.put(b"a", b"2")
+        store.put(b"a", b"3")
+        assert records[-1]["active_readers"] == 1
+        assert records[-1]["pending_reclaim"] > 0
+        assert store.stats()["active_readers"] == 1
+    store.put(b"a", b"4")
+    assert records[-1]["active_readers"] == 0
+    assert records[-1]["pending_reclaim"] == 0
+
+
+def test_failed_and_empty_commits_emit_no_record():
+    records = []
+    store = Store(InMemoryPageBackend(PAGE_SIZE), on_commit=records.append)
+    store.put(b"a", b"1")
+    with pytest.raises(NodeTooLargeError):
+        store.put(b"b", b"x" * PAGE_SIZE)
+    assert not store.delete(b"missing")
+    assert len(records) == 1
+    store.put(b"b", b"2")
+    assert [r["epoch"] for r in records] == [1, 2]
+    assert store.stats()["counters"]["commits"] == 2
+
+
+def test_a_failing_callback_does_not_fail_the_commit(caplog):
+    def broken(record):
+        raise ValueError("exporter down")
+
+    store = Store(InMemoryPageBackend(PAGE_SIZE), on_commit=broken)
+    with caplog.at_level("ERROR", logger="cow_btree.stats"):
+        store.put(b"a", b"1")
+        assert store.delete(b"a")
+    assert store.get(b"a") is None
+    assert store._epoch == 2
+    assert [r.exc_info[0] for r in caplog.records] == [ValueError, ValueError]
+
+
+def test_json_lines_exporter():
+    out = io.StringIO()
+    store = Store(InMemoryPageBackend(PAGE_SIZE), on_commit=JsonLinesExporter(out))
+    with store.write_batch() as batch:
+        for i in range(50):
+            batch.put(b"k%02d" % i, b"v" * 10)
+    store.delete(b"k00")
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [line["epoch"] for line in lines] == [1, 2]
+    assert lines[0]["counters"]["splits"] > 0
@@ -1,10 +1,11 @@
 """Integration tests against the real mmap file backend"""
 
+import mmap
 import os
 
 import pytest
 
-from cow_btree.page_backend import MMapPageBackend
+from cow_btree.page_backend import ACCESS_HINTS, MMapPageBackend, _advice_ranges
 from cow_btree.store import Store
 
 PAGE_SIZE = 512
@@ -229,3 +230,37 @@ def test_multiple_reopen_cycles(db_path):
     for k, v in all_pairs.items():
         assert store.get(k) == v
     store.close()
+
+
+def test_advice_ranges_align_to_os_pages_and_merge():
+    per_os_page = mmap.PAGESIZE // PAGE_SIZE
+    page_ids = [3 * per_os_page, 1, 0, 2 * per_os_page + 1, 10**9]
+    ranges = _advice_ranges(page_ids, PAGE_SIZE, 100)
+    assert ranges == [(0, mmap.PAGESIZE), (2 * mmap.PAGESIZE, 4 * mmap.PAGESIZE)]
+    assert _advice_ranges([], PAGE_SIZE, 100) == []
+
+
+@pytest.mark.parametrize("hint", ACCESS_HINTS)
+def test_access_hints_survive_growth_and_truncation(db_path, hint):
+    store = Store(MMapPageBackend(db_path, PAGE_SIZE), access_hint=hint)
+    pairs = {f"key{i:05d}".encode(): b"v" * 40 for i in range(2000)}
+    with store.write_batch() as batch:
+        for k, v in pairs.items():
+            batch.put(k, v)
+    store._backend.prefetch([0, 5, 6, 7, store._backend.page_count + 10])
+    store._node_cache.clear()
+    assert dict(store.scan()) == pairs
+    assert store.multi_get(sorted(pairs)) == list(pairs.values())
+    for k in list(pairs)[:1500]:
+        store.delete(k)
+    store.compact()
+    store._backend.advise("sequential")
+    assert len(list(store.scan())) == 500
+    store.close()
+
+
+def test_unknown_access_hint_is_rejected(db_path):
+    with pytest.raises(ValueError, match="access hint"):
+        Store(MMapPageBackend(db_path, PAGE_SIZE), access_hint="backwards")
+    with pytest.raises(ValueError, match="access hint"):
+        MMapPageBackend(db_path, PAGE_SIZE, access_hint="backwards")
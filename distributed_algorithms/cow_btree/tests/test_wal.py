@@ -0,0 +1,254 @@
+"""Write-ahead log mode: log-only commits, lazy checkpoints, replay."""
+
+import os
+import random
+import threading
+
+import pytest
+
+from cow_btree.page_backend import InMemoryPageBackend, MMapPageBackend
+from cow_btree.store import Store
+from cow_btree.wal import WriteAheadLog, decode_ops, encode_ops
+
+from .test_commit_protocol import _RecordingBackend
+from .test_large_entries import assert_no_pages_lost
+
+PAGE_SIZE = 256
+
+
+@pytest.fixture
+def wal_path(tmp_path):
+    return str(tmp_path / "store.wal")
+
+
+def segments(wal_path):
+    prefix = os.path.basename(wal_path) + "."
+    return sorted(
+        name for name in os.listdir(os.path.dirname(wal_path)) if name.startswith(prefix)
+    )
+
+
+def test_record_round_trip():
+    ops = [(b"a", b"1"), (b"b", None), (b"", b""), (b"k" * 300, b"v" * 5000)]
+    record = encode_ops(ops)
+    assert decode_ops(record[8:]) == ops
+
+
+def test_commits_touch_only_the_log(wal_path):
+    backend = _RecordingBackend(InMemoryPageBackend(PAGE_SIZE))
+    store = Store(backend, wal_path=wal_path, checkpoint_bytes=1 << 30)
+    backend.ops = []
+    for i in range(50):
+        store.put(f"k{i:02d}".encode(), b"v")
+    assert store.delete(b"k07") is True
+    assert store.delete(b"k07") is False
+    assert backend.ops == []
+    assert store.get(b"k03") == b"v"
+    assert store.get(b"k07") is None
+    assert store._epoch == 0
+    store.close()
+
+
+def test_checkpoint_moves_the_log_into_pages(wal_path):
+    store = Store(InMemoryPageBackend(PAGE_SIZE), wal_path=wal_path, checkpoint_bytes=1 << 30)
+    for i in range(100):
+        store.put(f"k{i:03d}".encode(), f"v{i}".encode())
+    for i in range(0, 100, 4):
+        store.delete(f"k{i:03d}".encode())
+    store.checkpoint()
+    assert store._epoch == 1
+    assert not any(store._overlay)
+    assert len(segments(wal_path)) == 1  # just the fresh, empty segment
+    expected = [(f"k{i:03d}".encode(), f"v{i}".encode()) for i in range(100) if i % 4]
+    assert list(store.scan()) == expected
+    assert_no_pages_lost(store)
+    store.close()
+
+
+def test_scans_merge_the_log_with_the_tree(wal_path):
+    store = Store(InMemoryPageBackend(PAGE_SIZE), wal_path=wal_path, checkpoint_bytes=1 << 30)
+    model = {}
+    for i in range(0, 200, 2):
+        store.put(f"k{i:03d}".encode(), b"tree")
+        model[f"k{i:03d}".encode()] = b"tree"
+    store.checkpoint()
+    rng = random.Random(4)
+    for _ in range(150):
+        key = f"k{rng.randrange(200):03d}".encode()
+        if rng.random() < 0.3:
+            store.delete(key)
+            model.pop(key, None)
+        else:
+            store.put(key, b"log")
+            model[key] = b"log"
+    expected = sorted(model.items())
+    assert list(store.scan()) == expected
+    assert list(store.scan(reverse=True)) == expected[::-1]
+    window = [(k, v) for k, v in expected if b"k050" <= k < b"k120"]
+    assert list(store.scan(b"k050", b"k120")) == window
+    assert list(store.scan(b"k050", b"k120", reverse=True, limit=5)) == window[::-1][:5]
+    store.close()
+
+
+def test_memtable_layers_stay_few_and_unmutated(wal_path):
+    store = Store(InMemoryPageBackend(PAGE_SIZE), wal_path=wal_path, checkpoint_bytes=1 << 30)
+    model = {}
+    published = []
+    rng = random.Random(7)
+    for i in range(3000):
+        key = f"k{rng.randrange(1000):03d}".encode()
+        if rng.random() < 0.2:
+            store.delete(key)
+            model.pop(key, None)
+        else:
+            store.put(key, b"%d" % i)
+            model[key] = b"%d" % i
+        if i % 500 == 0:
+            published.append((store._overlay, [dict(layer) for layer in store._overlay]))
+        assert len(store._overlay) <= 13  # the frozen dict and log2(3000) layers
+    for overlay, contents in published:
+        assert [dict(layer) for layer in overlay] == contents
+    assert all(list(layer) == layer.sorted_keys == sorted(layer) for layer in store._overlay)
+    expected = sorted(model.items())
+    assert list(store.scan()) == expected
+    for _ in range(50):
+        lo, hi = sorted(f"k{rng.randrange(1000):03d}".encode() for _ in range(2))
+        window = [(k, v) for k, v in expected if lo <= k < hi]
+        assert list(store.scan(lo, hi, limit=3)) == window[:3]
+        assert list(store.scan(lo, hi, reverse=True)) == window[::-1]
+    assert store.multi_get(list(model)) == list(model.values())
+    store.close()
+
+
+def test_failed_background_checkpoint_surfaces_on_the_next_commit(wal_path):
+    store = Store(InMemoryPageBackend(PAGE_SIZE), wal_path=wal_path, checkpoint_bytes=1 << 30)
+    store.put(b"k", b"v")
+    commit_with = store._commit_with
+    failed = threading.Event()
+
+    def failing(build, on_publish=None):
+        failed.set()
+        raise OSError("disk full")
+
+    store._commit_with = failing
+    store._checkpoint_wanted.set()
+    assert failed.wait(30)
+    store._stop_checkpointer()  # waits for the failed run to finish
+    store._commit_with = commit_with
+    with pytest.raises(RuntimeError) as info:
+        store.put(b"k2", b"v2")
+    assert isinstance(info.value.__cause__, OSError)
+    assert store.get(b"k2") is None
+    assert store.get(b"k") == b"v"  # still in the frozen overlay
+    store.put(b"k2", b"v2")  # reported once
+    store.checkpoint()
+    assert not any(store._overlay)
+    assert list(store.scan()) == [(b"k", b"v"), (b"k2", b"v2")]
+    store._wal.close()
+
+
+def test_background_checkpoints_keep_up(wal_path):
+    store = Store(InMemoryPageBackend(PAGE_SIZE), wal_path=wal_path, checkpoint_bytes=2048)
+    for i in range(2000):
+        store.put(f"k{i % 300:03d}".encode(), f"{i}".encode())
+    store.close()
+    assert store._epoch > 1
+
+
+def test_replay_after_a_crash(tmp_path, wal_path):
+    path = str(tmp_path / "store.db")
+    store = Store(MMapPageBackend(path, PAGE_SIZE), wal_path=wal_path, checkpoint_bytes=1 << 30)
+    for i in range(120):
+        store.put(f"k{i:03d}".encode(), b"first")
+    store.checkpoint()
+    for i in range(0, 120, 3):
+        store.put(f"k{i:03d}".encode(), b"second")
+    store.delete(b"k001")
+    # Crash: no close(), no checkpoint of the later writes.
+    store._stop_checkpointer()
+    store._wal.close()
+
+    reopened = Store(
+        MMapPageBackend(path, PAGE_SIZE), wal_path=wal_path, checkpoint_bytes=1 << 30
+    )
+    for i in range(120):
+        want = None if i == 1 else (b"second" if i % 3 == 0 else b"first")
+        assert reopened.get(f"k{i:03d}".encode()) == want
+    reopened.close()
+
+    # Everything was checkpointed on close; the log replays to nothing.
+    final = Store(MMapPageBackend(path, PAGE_SIZE), wal_path=wal_path)
+    assert not any(final._overlay)
+    assert final.get(b"k000") == b"second"
+    final.close()
+
+
+def test_torn_tail_is_ignored(wal_path):
+    log = WriteAheadLog(wal_path)
+    log.append([(b"a", b"1")])
+    log.append([(b"b", b"2")])
+    log.close()
+    [name] = segments(wal_path)
+    full = os.path.join(os.path.dirname(wal_path), name)
+    with open(full, "ab") as f:
+        f.write(encode_ops([(b"c", b"3")])[:-2])
+
+    store = Store(InMemoryPageBackend(PAGE_SIZE), wal_path=wal_path)
+    assert store.get(b"a") == b"1"
+    assert store.get(b"b") == b"2"
+    assert store.get(b"c") is None
+    store.put(b"d", b"4")
+    assert store.get(b"d") == b"4"
+    store.close()
+
+
+def test_write_amplification_is_lower_than_pure_cow(wal_path):
+    rng = random.Random(9)
+    keys = [f"user:{rng.randrange(10**6):07d}".encode() for _ in range(400)]
+    cow = Store(InMemoryPageBackend(1024))
+    wal = Store(InMemoryPageBackend(1024), wal_path=wal_path, checkpoint_bytes=8192)
+    for k in keys:
+        cow.put(k, b"v" * 16)
+        wal.put(k, b"v" * 16)
+    wal.close()
+    cow_amp = cow.write_amplification()
+    wal_amp = wal.write_amplification()
+    assert cow_amp["user_bytes"] == wal_amp["user_bytes"] > 0
+    assert cow_amp["wal_bytes"] == 0
+    assert wal_amp["wal_bytes"] > 0
+    assert wal_amp["amplification"] * 5 < cow_amp["amplification"]
+
+
+def test_readers_never_see_a_partial_checkpoint(wal_path):
+    store = Store(InMemoryPageBackend(PAGE_SIZE), wal_path=wal_path, checkpoint_bytes=512)
+    keys = [f"k{i:02d}".encode() for i in range(20)]
+    with store.write_batch() as batch:
+        for k in keys:
+            batch.put(k, b"0")
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        while not stop.is_set():
+            seen = {v for _, v in store.scan()}
+            if len(seen) != 1:
+                errors.append(sorted(seen))
+                return
+
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    for t in readers:
+        t.start()
+    for i in range(1, 80):
+        with store.write_batch() as batch:
+            for k in keys:
+                batch.put(k, str(i).encode())
+    stop.set()
+    for t in readers:
+        t.join(timeout=30)
+    store.close()
+    assert not errors, errors
+
+
+def test_group_commit_and_wal_are_exclusive(wal_path):
+    with pytest.raises(ValueError, match="cannot be combined"):
+        Store(InMemoryPageBackend(PAGE_SIZE), group_commit=True, wal_path=wal_path)
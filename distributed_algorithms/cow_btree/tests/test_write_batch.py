@@ -0,0 +1,206 @@
+"""Batched multi-key commits through Store.write_batch()."""
+
+import threading
+
+import pytest
+
+from cow_btree.node import NodeTooLargeError
+from cow_btree.page_backend import InMemoryPageBackend
+from cow_btree.store import Store
+
+from .test_commit_protocol import _RecordingBackend, _assert_two_phase
+from .test_large_entries import assert_no_pages_lost, reachable_pages
+
+PAGE_SIZE = 128
+
+
+def make_store(page_size=PAGE_SIZE):
+    return Store(InMemoryPageBackend(page_size))
+
+
+def test_batch_commits_every_put_with_one_header_write():
+    backend = _RecordingBackend(InMemoryPageBackend(PAGE_SIZE))
+    store = Store(backend)
+    backend.ops = []
+    with store.write_batch() as batch:
+        for i in range(200):
+            batch.put(f"k{i:04d}".encode(), b"v" * 8)
+    _assert_two_phase(backend.ops)
+    assert len([op for op in backend.ops if op[0] == "flush"]) == 2
+
+    for i in range(200):
+        assert store.get(f"k{i:04d}".encode()) == b"v" * 8
+    assert_no_pages_lost(store)
+
+
+def test_shared_path_nodes_are_copied_once_per_batch():
+    store = make_store()
+    keys = [f"k{i:04d}".encode() for i in range(300)]
+    with store.write_batch() as batch:
+        for k in keys:
+            batch.put(k, b"a")
+    old_tree = reachable_pages(store)
+
+    retired: list[int] = []
+    allocated: list[int] = []
+    real_retire = store._retire_page_id
+    real_allocate = store._allocate_page_id
+
+    def spy_retire(page_id):
+        retired.append(page_id)
+        real_retire(page_id)
+
+    def spy_allocate():
+        page_id = real_allocate()
+        allocated.append(page_id)
+        return page_id
+
+    store._retire_page_id = spy_retire
+    store._allocate_page_id = spy_allocate
+    with store.write_batch() as batch:
+        for k in keys:
+            batch.put(k, b"b")
+
+    # Every old page is replaced exactly once and nothing is written that
+    # the new tree does not use: no intermediate copies of shared nodes.
+    assert sorted(retired) == sorted(old_tree)
+    assert sorted(allocated) == sorted(reachable_pages(store))
+    for k in keys:
+        assert store.get(k) == b"b"
+
+
+def test_batch_deletes_and_puts_apply_together():
+    store = make_store()
+    for i in range(100):
+        store.put(f"k{i:03d}".encode(), b"old")
+    with store.write_batch() as batch:
+        for i in range(0, 100, 2):
+            batch.delete(f"k{i:03d}".encode())
+        batch.put(b"k001", b"new")
+        batch.put(b"extra", b"x")
+    for i in range(100):
+        k = f"k{i:03d}".encode()
+        if i % 2 == 0:
+            assert store.get(k) is None
+        elif i == 1:
+            assert store.get(k) == b"new"
+        else:
+            assert store.get(k) == b"old"
+    assert store.get(b"extra") == b"x"
+    assert_no_pages_lost(store)
+
+
+def test_deleting_everything_leaves_an_empty_tree():
+    store = make_store()
+    keys = [f"k{i:03d}".encode() for i in range(80)]
+    for k in keys:
+        store.put(k, b"v")
+    with store.write_batch() as batch:
+        for k in keys:
+            batch.delete(k)
+    for k in keys:
+        assert store.get(k) is None
+    store.put(b"again", b"1")
+    assert store.get(b"again") == b"1"
+    assert_no_pages_lost(store)
+
+
+def test_last_operation_on_a_key_wins():
+    store = make_store()
+    with store.write_batch() as batch:
+        batch.put(b"k", b"1")
+        batch.delete(b"k")
+        batch.put(b"k", b"2")
+        batch.put(b"gone", b"x")
+        batch.delete(b"gone")
+    assert store.get(b"k") == b"2"
+    assert store.get(b"gone") is None
+
+
+def test_a_batch_that_changes_nothing_does_not_commit():
+    backend = _RecordingBackend(InMemoryPageBackend(PAGE_SIZE))
+    store = Store(backend)
+    store.put(b"a", b"1")
+    epoch = store._epoch
+    backend.ops = []
+    with store.write_batch() as batch:
+        batch.delete(b"missing")
+    assert backend.ops == []
+    assert store._epoch == epoch
+
+
+def test_exception_inside_the_block_discards_the_batch():
+    store = make_store()
+    with pytest.raises(RuntimeError, match="boom"):
+        with store.write_batch() as batch:
+            batch.put(b"k", b"v")
+            raise RuntimeError("boom")
+    assert store.get(b"k") is None
+
+
+def test_batch_cannot_be_reused_after_commit():
+    store = make_store()
+    batch = store.write_batch()
+    batch.put(b"k", b"v")
+    batch.commit()
+    with pytest.raises(RuntimeError, match="already committed"):
+        batch.put(b"k2", b"v")
+    assert store.get(b"k") == b"v"
+
+
+def test_a_failing_batch_is_a_no_op():
+    store = make_store()
+    for i in range(40):
+        store.put(f"k{i:03d}".encode(), b"v" * 6)
+    root_before = store._root_id
+    free_before = sorted(store._free_ids)
+
+    with pytest.raises(NodeTooLargeError):
+        with store.write_batch() as batch:
+            batch.put(b"k005", b"changed")
+            batch.put(b"huge", b"x" * (PAGE_SIZE * 2))
+
+    assert store._root_id == root_before
+    assert sorted(store._free_ids) == free_before
+    assert store.get(b"k005") == b"v" * 6
+    assert store.get(b"huge") is None
+    assert_no_pages_lost(store)
+
+
+def test_readers_see_all_of_a_batch_or_none_of_it():
+    store = make_store(page_size=256)
+    keys = [f"k{i:03d}".encode() for i in range(40)]
+    with store.write_batch() as batch:
+        for k in keys:
+            batch.put(k, b"0")
+
+    stop = threading.Event()
+    errors: list[str] = []
+
+    def writer() -> None:
+        for i in range(1, 60):
+            with store.write_batch() as batch:
+                for k in keys:
+                    batch.put(k, str(i).encode())
+        stop.set()
+
+    def reader() -> None:
+        while not stop.is_set():
+            token, root_id = store._begin_read()
+            try:
+                seen = {store._tree.get(root_id, k) for k in keys}
+            finally:
+                store._end_read(token)
+            if len(seen) != 1:
+                errors.append(f"mixed batch observed: {sorted(seen)}")
+                return
+
+    threads = [threading.Thread(target=writer)] + [
+        threading.Thread(target=reader) for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=60)
+    assert not errors, errors
+
@@ -0,0 +1,88 @@
+"""Zero-copy page views and lazily decoded leaves on the read path."""
+
+import pytest
+
+from cow_btree.node import LeafNode, LeafView
+from cow_btree.page_backend import InMemoryPageBackend, MMapPageBackend
+from cow_btree.store import Store
+
+PAGE_SIZE = 256
+
+
+def test_mmap_view_points_into_the_mapping(tmp_path):
+    backend = MMapPageBackend(str(tmp_path / "view.db"), PAGE_SIZE)
+    page_id = backend.allocate_page()
+    backend.write_page(page_id, b"\x07" * PAGE_SIZE)
+    view = backend.read_page_view(page_id)
+    assert isinstance(view, memoryview)
+    assert view.readonly
+    assert view.obj is backend._mmap
+    assert bytes(view) == b"\x07" * PAGE_SIZE
+    del view
+    backend.close()
+
+
+def test_view_taken_before_a_remap_stays_readable(tmp_path):
+    backend = MMapPageBackend(str(tmp_path / "grow.db"), PAGE_SIZE)
+    page_id = backend.allocate_page()
+    backend.write_page(page_id, b"\x01" * PAGE_SIZE)
+    view = backend.read_page_view(page_id)
+    old_map = backend._mmap
+    while backend._mmap is old_map:
+        backend.allocate_page()
+    assert old_map in backend._retired_maps
+    assert bytes(view) == b"\x01" * PAGE_SIZE
+    del view
+    backend.close()
+
+
+def test_in_memory_view_is_not_disturbed_by_a_later_write():
+    backend = InMemoryPageBackend(PAGE_SIZE)
+    page_id = backend.allocate_page()
+    backend.write_page(page_id, b"a" * PAGE_SIZE)
+    view = backend.read_page_view(page_id)
+    backend.write_page(page_id, b"b" * PAGE_SIZE)
+    assert bytes(view) == b"a" * PAGE_SIZE
+    with pytest.raises(TypeError):
+        view[0] = 1
+
+
+def test_leaf_view_agrees_with_the_decoded_leaf():
+    keys = [b"", b"a", b"ab", b"b", b"bb" * 10]
+    leaf = LeafNode(keys=keys, values=[k.upper() + b"!" for k in keys])
+    raw = leaf.serialize(4, PAGE_SIZE)
+    view = LeafView(memoryview(raw), 4)
+    assert view.count == len(keys)
+    for k in keys + [b"missing", b"abc", b"bb"]:
+        assert view.get(k) == leaf.get(k)
+    assert isinstance(view.get(b"a"), bytes)
+    with pytest.raises(ValueError, match="describes itself as page 4"):
+        LeafView(memoryview(raw), 5)
+
+
+def test_point_reads_do_not_copy_whole_pages(tmp_path):
+    store = Store(MMapPageBackend(str(tmp_path / "reads.db"), PAGE_SIZE))
+    for i in range(300):
+        store.put(f"k{i:04d}".encode(), f"v{i}".encode())
+    store._node_cache.clear()
+
+    def no_copies(page_id):
+        raise AssertionError("get() copied a page with read_page")
+
+    store._backend.read_page = no_copies
+    for i in range(300):
+        assert store.get(f"k{i:04d}".encode()) == f"v{i}".encode()
+    assert store.get(b"absent") is None
+    del store._backend.read_page
+    store.close()
+
+
+def test_lookups_cache_internal_nodes_but_not_leaves():
+    store = Store(InMemoryPageBackend(PAGE_SIZE))
+    for i in range(300):
+        store.put(f"k{i:04d}".encode(), b"v")
+    store._node_cache.clear()
+    store.get(b"k0150")
+    cached = list(store._node_cache._entries.values())
+    assert cached
+    assert not any(isinstance(node, LeafNode) for node in cached)
@@ -0,0 +1,566 @@
+"""Offline integrity check of a cow_btree file.
+
+    python -m cow_btree.verify FILE [--page-size N] [--workers N]
+
+Every page is read once, by a pool of worker processes that each take a
+contiguous range of page ids: they check page checksums, decode nodes,
+free-list and overflow pages, and check that each node's keys are in
+order and that every child of an internal node, down its leftmost and
+rightmost paths, lies within that node's separators. They send back
+only each page's kind, children, chain links and the errors they found.
+The parent then walks the tree from the header root over those
+summaries, checking that leaves sit at one depth, that overflow chains
+add up to their values' lengths and that no page is reachable twice;
+named trees are walked the same way from the roots their catalog
+records. It then reads the free set from the last checkpoint and the
+free log and checks it is disjoint from the live pages. Pages that are
+neither live, free nor part of the free list are reported as leaked.
+"""
+
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from .node import (
+    INTERNAL,
+    INTERNAL_PREFIX,
+    INTERNAL_SLOTTED,
+    LEAF,
+    LEAF_PREFIX,
+    LEAF_SLOTTED,
+    InternalNode,
+    OverflowRef,
+    deserialize_node,
+    is_leaf_page,
+    leaf_view,
+)
+from .overflow import _OVERFLOW_HEADER, OVERFLOW
+from .page_backend import _MADV_WILLNEED, _MADVICE, SEQUENTIAL, _advice_ranges
+from .store import (
+    _CATALOG_ROOT,
+    _FL_HEADER,
+    _FREE_LOG_ALLOCATED,
+    _HEADER_CHECKSUMS,
+    _HEADER_FMT,
+    _HEADER_MARKER,
+    FREE_LIST,
+    FREE_LOG,
+)
+
+_CRC = struct.Struct("<I")
+_NODE_MARKERS = (
+    LEAF, INTERNAL, LEAF_SLOTTED, INTERNAL_SLOTTED, LEAF_PREFIX, INTERNAL_PREFIX
+)
+# Page kinds in _Summaries.kinds; 0 marks a page no worker scanned.
+_BAD, _UNKNOWN, _LEAF, _INTERNAL, _FREE, _LOG, _OVERFLOW = range(1, 8)
+_KIND_NAMES = {
+    _LEAF: "leaf",
+    _INTERNAL: "internal",
+    _FREE: "free",
+    _LOG: "log",
+    _OVERFLOW: "overflow",
+}
+# Separator checks follow child pointers across the file; a cycle or a
+# corrupt pointer must not send them round forever.
+_MAX_DEPTH = 64
+
+
+@dataclass
+class VerifyReport:
+    """What verify found; ok means no errors (leaked pages are not errors)."""
+
+    page_count: int
+    live_pages: int = 0
+    free_pages: int = 0
+    errors: list[str] = field(default_factory=list)
+    leaked: list[int] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+@dataclass
+class _Summaries:
+    """What the walk needs to know about pages [start, start + len(kinds)).
+
+    kinds holds one page kind per page; the dicts are sparse. children
+    are an internal node's, links a chain page's (next, count), refs a
+    leaf's overflow (first page, length) pairs, problems a bad page's
+    message and markers an unknown page's marker byte. notes are the
+    separator errors a worker found among an internal node's children;
+    like every problem they only count once the walk reaches the node.
+    """
+
+    start: int
+    kinds: bytearray
+    children: dict[int, array] = field(default_factory=dict)
+    links: dict[int, tuple[int, int]] = field(default_factory=dict)
+    refs: dict[int, tuple[tuple[int, int], ...]] = field(default_factory=dict)
+    problems: dict[int, str] = field(default_factory=dict)
+    markers: dict[int, int] = field(default_factory=dict)
+    notes: dict[int, list[str]] = field(default_factory=dict)
+
+    def kind(self, page_id: int) -> int:
+        return self.kinds[page_id - self.start]
+
+    def update(self, other: _Summaries) -> None:
+        offset = other.start - self.start
+        self.kinds[offset : offset + len(other.kinds)] = other.kinds
+        self.children.update(other.children)
+        self.links.update(other.links)
+        self.refs.update(other.refs)
+        self.problems.update(other.problems)
+        self.markers.update(other.markers)
+        self.notes.update(other.notes)
+
+
+def _checked(raw: bytes, checksums: bool) -> bytes | None:
+    """raw without its checksum, or None if the checksum does not match."""
+    if not checksums:
+        return raw
+    (stored,) = _CRC.unpack_from(raw, len(raw) - _CRC.size)
+    raw = raw[: -_CRC.size]
+    return raw if zlib.crc32(raw) == stored else None
+
+
+def _decode(raw: bytes, page_id: int, checksums: bool):
+    """(kind, detail) for one page.
+
+    detail is the message of a _BAD page, the marker of an _UNKNOWN
+    one, (next, count) for chain pages and the node itself otherwise.
+    Pages that are not live may hold anything, so problems are only
+    reported once the walk reaches them.
+    """
+    raw = _checked(raw, checksums)
+    if raw is None:
+        return _BAD, f"page {page_id} fails its checksum"
+    marker = raw[0]
+    if marker in (FREE_LIST, FREE_LOG, OVERFLOW):
+        header = _OVERFLOW_HEADER if marker == OVERFLOW else _FL_HEADER
+        _, stored_id, next_page, count = header.unpack_from(raw, 0)
+        if stored_id != page_id:
+            return _BAD, f"page {page_id} describes itself as page {stored_id}"
+        room = len(raw) - header.size
+        if count > (room if marker == OVERFLOW else room // 4):
+            return _BAD, f"page {page_id} claims {count} entries, more than fit"
+        kind = {FREE_LIST: _FREE, FREE_LOG: _LOG, OVERFLOW: _OVERFLOW}[marker]
+        return kind, (next_page, count)
+    try:
+        node = deserialize_node(raw, page_id)
+    except ValueError as exc:
+        if marker in _NODE_MARKERS:
+            return _BAD, f"page {page_id}: {exc}"
+        return _UNKNOWN, marker
+    except (struct.error, IndexError) as exc:
+        return _BAD, f"page {page_id} cannot be decoded: {exc}"
+    keys = node.keys
+    if any(a >= b for a, b in zip(keys, keys[1:])):
+        return _BAD, f"node {page_id} has keys out of order"
+    if isinstance(node, InternalNode):
+        if len(node.children) != len(keys) + 1:
+            return (
+                _BAD,
+                f"node {page_id} has {len(keys)} keys "
+                f"but {len(node.children)} children",
+            )
+        return _INTERNAL, node
+    return _LEAF, node
+
+
+def _scan(
+    path: str, page_size: int, checksums: bool, start: int, stop: int
+) -> _Summaries:
+    """Summaries of pages [start, stop); runs in a worker process."""
+    summaries = _Summaries(start, bytearray(stop - start))
+    # page id -> (first key, last key, first child, last child) of the
+    # nodes seen so far, None for pages that are not nodes.
+    edges: dict[int, tuple | None] = {}
+    internal = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if _MADVICE[SEQUENTIAL] is not None:
+            mm.madvise(_MADVICE[SEQUENTIAL])
+        if _MADV_WILLNEED is not None:
+            for begin, end in _advice_ranges(range(start, stop), page_size, stop):
+                mm.madvise(_MADV_WILLNEED, begin, min(end, len(mm)) - begin)
+        for page_id in range(start, stop):
+            raw = mm[page_id * page_size : (page_id + 1) * page_size]
+            kind, detail = _decode(raw, page_id, checksums)
+            summaries.kinds[page_id - start] = kind
+            edges[page_id] = _edges(detail) if kind in (_LEAF, _INTERNAL) else None
+            if kind == _INTERNAL:
+                summaries.children[page_id] = array("I", detail.children)
+                internal.append((page_id, detail))
+            elif kind == _LEAF:
+                refs = tuple(
+                    (value.page_id, value.length)
+                    for value in detail.values
+                    if type(value) is OverflowRef
+                )
+                if refs:
+                    summaries.refs[page_id] = refs
+            elif kind == _BAD:
+                summaries.problems[page_id] = detail
+            elif kind == _UNKNOWN:
+                summaries.markers[page_id] = detail
+            else:
+                summaries.links[page_id] = detail
+
+        def node_edges(page_id: int) -> tuple | None:
+            if page_id not in edges:
+                edges[page_id] = None
+                if 0 < page_id < len(mm) // page_size:
+                    raw = mm[page_id * page_size : (page_id + 1) * page_size]
+                    edges[page_id] = _read_edges(raw, page_id, checksums)
+            return edges[page_id]
+
+        for page_id, node in internal:
+            bounds = [None, *node.keys, None]
+            for i, child in enumerate(node.children):
+                span = _subtree_span(child, node_edges)
+                if span is not None and _out_of_range(*span, bounds[i], bounds[i + 1]):
+                    what = "node" if node_edges(child)[2] is not None else "leaf"
+                    summaries.notes.setdefault(page_id, []).append(
+                        f"{what} {child} has keys outside its parent's separators"
+                    )
+    return summaries
+
+
+def _edges(node) -> tuple:
+    """(first key, last key, first child, last child); None where absent."""
+    keys = node.keys
+    children = node.children if isinstance(node, InternalNode) else (None,)
+    if not keys:
+        return None, None, children[0], children[-1]
+    return keys[0], keys[-1], children[0], children[-1]
+
+
+def _read_edges(raw: bytes, page_id: int, checksums: bool) -> tuple | None:
+    """_edges of a node page another worker decodes, without its values."""
+    raw = _checked(raw, checksums)
+    try:
+        if raw is None:
+            return None
+        if is_leaf_page(raw):
+            span = leaf_view(raw, page_id).key_range() or (None, None)
+            return (*span, None, None)
+        if raw[0] in _NODE_MARKERS:
+            return _edges(deserialize_node(raw, page_id))
+    except (ValueError, struct.error, IndexError):
+        pass
+    return None
+
+
+def _subtree_span(page_id: int, node_edges) -> tuple[bytes, bytes] | None:
+    """(lowest, highest) key on the leftmost and rightmost paths under page_id.
+
+    In a sound subtree these are its smallest and largest keys, so
+    checking them against the parent's separators covers every key
+    below, given each node below is checked against its own parent.
+    """
+    lowest = _path_keys(page_id, node_edges, leftmost=True)
+    highest = _path_keys(page_id, node_edges, leftmost=False)
+    if not lowest or not highest:
+        return None
+    return min(lowest), max(highest)
+
+
+def _path_keys(page_id: int, node_edges, leftmost: bool) -> list[bytes]:
+    """Each node's first (last) key down the leftmost (rightmost) path."""
+    keys = []
+    for _ in range(_MAX_DEPTH):
+        edges = node_edges(page_id)
+        if edges is None:
+            break
+        first, last, first_child, last_child = edges
+        key = first if leftmost else last
+        if key is not None:
+            keys.append(key)
+        page_id = first_child if leftmost else last_child
+        if page_id is None:
+            break
+    return keys
+
+
+def _read_header(
+    path: str, page_size: int | None
+) -> tuple[int, int, int, bool, int, int, int]:
+    """(page size, root id, free-list head, checksums, free-log head,
+    free-log entries, catalog root)."""
+    with open(path, "rb") as f:
+        head = f.read(_HEADER_FMT.size)
+    if len(head) < _HEADER_FMT.size:
+        raise ValueError(f"{path} is too short to be a cow_btree file")
+    (
+        marker, root_id, free_head, stored_size, flags, log_head, log_entries, catalog, _
+    ) = _HEADER_FMT.unpack(head)
+    if marker != _HEADER_MARKER:
+        raise ValueError("not a cow_btree file (bad header marker)")
+    if stored_size and page_size and stored_size != page_size:
+        raise ValueError(
+            f"file was written with page_size={stored_size}, not {page_size}"
+        )
+    page_size = stored_size or page_size
+    if not page_size:
+        raise ValueError("the header does not record a page size; pass page_size")
+    checksums = bool(flags & _HEADER_CHECKSUMS)
+    return page_size, root_id, free_head, checksums, log_head, log_entries, catalog
+
+
+def verify(
+    path: str, page_size: int | None = None, workers: int | None = None
+) -> VerifyReport:
+    """Check the file at path; see the module docstring for what is checked.
+
+    page_size is only needed for files whose header does not record it.
+    workers defaults to the CPU count; with 1 the scan runs in-process.
+    """
+    page_size, root_id, free_head, checksums, log_head, log_entries, catalog = (
+        _read_header(path, page_size)
+    )
+    page_count = os.path.getsize(path) // page_size
+    report = VerifyReport(page_count)
+
+    workers = workers or os.cpu_count() or 1
+    step = max(1, -(-(page_count - 1) // (workers * 4)))
+    ranges = [
+        (start, min(start + step, page_count)) for start in range(1, page_count, step)
+    ]
+    summaries = _Summaries(0, bytearray(page_count))
+    if workers == 1:
+        for start, stop in ranges:
+            summaries.update(_scan(path, page_size, checksums, start, stop))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [
+                pool.submit(_scan, path, page_size, checksums, start, stop)
+                for start, stop in ranges
+            ]
+            for future in futures:
+                summaries.update(future.result())
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        kind, detail = _decode(mm[:page_size], 0, checksums)
+        if kind == _BAD:
+            report.errors.append(detail)
+        live: set[int] = set()
+        roots = [root_id]
+        if catalog:
+            _walk_tree(summaries, catalog, report, live)
+            leaves = [page_id for page_id in live if summaries.kind(page_id) == _LEAF]
+            roots += _catalog_roots(mm, page_size, checksums, leaves, report)
+        for root in roots:
+            _walk_tree(summaries, root, report, live)
+        containers, free_ids = _walk_free_list(
+            mm, page_size, summaries, free_head, log_head, log_entries, live, report
+        )
+    report.live_pages = len(live)
+    report.free_pages = len(free_ids)
+    accounted = live | containers | free_ids
+    report.leaked = [p for p in range(1, page_count) if p not in accounted]
+    return report
+
+
+def _page(mm: mmap.mmap, page_id: int, page_size: int, checksums: bool) -> bytes:
+    raw = mm[page_id * page_size : (page_id + 1) * page_size]
+    return raw[: -_CRC.size] if checksums else raw
+
+
+def _catalog_roots(
+    mm: mmap.mmap,
+    page_size: int,
+    checksums: bool,
+    leaves: list[int],
+    report: VerifyReport,
+) -> list[int]:
+    """Root ids the catalog's leaves record; summaries keep no values."""
+    roots = []
+    for page_id in sorted(leaves):
+        node = deserialize_node(_page(mm, page_id, page_size, checksums), page_id)
+        for name, value in zip(node.keys, node.values):
+            if type(value) is OverflowRef or len(value) != _CATALOG_ROOT.size:
+                report.errors.append(f"catalog entry {name!r} does not hold a root id")
+                continue
+            roots.append(_CATALOG_ROOT.unpack(value)[0])
+    return roots
+
+
+def _walk_tree(
+    summaries: _Summaries, root_id: int, report: VerifyReport, live: set[int]
+) -> None:
+    """Add the pages of the tree at root_id to live, recording errors in report."""
+    leaf_depths: set[int] = set()
+    stack = [(root_id, 0)]
+    while stack:
+        page_id, depth = stack.pop()
+        if not _claim(page_id, summaries, live, report, "tree"):
+            continue
+        kind = summaries.kind(page_id)
+        if kind == _INTERNAL:
+            report.errors.extend(summaries.notes.get(page_id, ()))
+            stack.extend((child, depth + 1) for child in summaries.children[page_id])
+        elif kind == _LEAF:
+            leaf_depths.add(depth)
+            for first_page, length in summaries.refs.get(page_id, ()):
+                _walk_chain(summaries, first_page, length, live, report)
+        else:
+            report.errors.append(_describe(page_id, summaries, "a tree node"))
+    if len(leaf_depths) > 1:
+        report.errors.append(f"leaves sit at different depths: {sorted(leaf_depths)}")
+
+
+def _out_of_range(first: bytes, last: bytes, lo: bytes | None, hi: bytes | None) -> bool:
+    return (lo is not None and first < lo) or (hi is not None and last >= hi)
+
+
+def _walk_chain(
+    summaries: _Summaries,
+    page_id: int,
+    length: int,
+    live: set[int],
+    report: VerifyReport,
+) -> None:
+    first_page = page_id
+    total = 0
+    while page_id:
+        if not _claim(page_id, summaries, live, report, "overflow chain"):
+            return
+        if summaries.kind(page_id) != _OVERFLOW:
+            report.errors.append(_describe(page_id, summaries, "an overflow page"))
+            return
+        page_id, count = summaries.links[page_id]
+        total += count
+    if total != length:
+        report.errors.append(
+            f"overflow chain at page {first_page} holds {total} bytes, expected {length}"
+        )
+
+
+def _walk_free_list(
+    mm: mmap.mmap,
+    page_size: int,
+    summaries: _Summaries,
+    head: int,
+    log_head: int,
+    log_entries: int,
+    live: set[int],
+    report: VerifyReport,
+) -> tuple[set[int], set[int]]:
+    """(free-list page ids, free page ids), checked against the live set.
+
+    The free set is the checkpoint on the container chain with the first
+    log_entries entries of the free log replayed on top.
+    """
+    metadata: set[int] = set()
+    free_ids: set[int] = set()
+    chain = (mm, page_size, summaries, metadata, live, report)
+    for free_id in _chain_ids(*chain, head, _FREE):
+        if free_id in free_ids:
+            report.errors.append(f"page {free_id} is on the free list twice")
+        free_ids.add(free_id)
+    log = _chain_ids(*chain, log_head, _LOG)
+    if len(log) < log_entries:
+        report.errors.append(f"free log holds {len(log)} entries, expected {log_entries}")
+    for entry in log[:log_entries]:
+        if entry & _FREE_LOG_ALLOCATED:
+            free_ids.discard(entry & ~_FREE_LOG_ALLOCATED)
+        else:
+            free_ids.add(entry)
+    for free_id in sorted(free_ids):
+        if free_id in live:
+            report.errors.append(f"page {free_id} is both live and free")
+        elif free_id in metadata:
+            report.errors.append(f"free-list page {free_id} is also on the free list")
+        elif not 0 < free_id < report.page_count:
+            report.errors.append(f"free list names page {free_id}, outside the file")
+    return metadata, free_ids
+
+
+def _chain_ids(
+    mm: mmap.mmap,
+    page_size: int,
+    summaries: _Summaries,
+    metadata: set[int],
+    live: set[int],
+    report: VerifyReport,
+    head: int,
+    kind: int,
+) -> list[int]:
+    """The ids a container or log chain holds, oldest page first.
+
+    Workers only report each page's (next, count); the ids themselves
+    are read here, for the pages on the chain.
+    """
+    chunks = []
+    page_id = head
+    while page_id:
+        if not _claim(page_id, summaries, metadata, report, "free list", live):
+            break
+        if summaries.kind(page_id) != kind:
+            report.errors.append(_describe(page_id, summaries, "a free-list page"))
+            break
+        next_page, count = summaries.links[page_id]
+        offset = page_id * page_size + _FL_HEADER.size
+        chunks.append(struct.unpack_from(f"<{count}I", mm, offset))
+        page_id = next_page
+    return [entry for chunk in reversed(chunks) for entry in chunk]
+
+
+def _claim(
+    page_id: int,
+    summaries: _Summaries,
+    seen: set[int],
+    report: VerifyReport,
+    what: str,
+    also_seen: set[int] | frozenset[int] = frozenset(),
+) -> bool:
+    """Add page_id to seen, unless it is out of range or already taken."""
+    if not 0 < page_id < len(summaries.kinds):
+        report.errors.append(f"{what} points at page {page_id}, outside the file")
+        return False
+    if page_id in seen or page_id in also_seen:
+        report.errors.append(f"page {page_id} is reachable twice ({what})")
+        return False
+    seen.add(page_id)
+    return True
+
+
+def _describe(page_id: int, summaries: _Summaries, expected: str) -> str:
+    kind = summaries.kind(page_id)
+    if kind == _BAD:
+        return summaries.problems[page_id]
+    if kind == _UNKNOWN:
+        marker = summaries.markers[page_id]
+        return f"page {page_id} should be {expected} but has marker {marker}"
+    return f"page {page_id} should be {expected} but is a {_KIND_NAMES[kind]} page"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--page-size", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    report = verify(args.path, args.page_size, args.workers)
+    print(
+        f"{report.page_count} pages: {report.live_pages} live, "
+        f"{report.free_pages} free, {len(report.leaked)} leaked"
+    )
+    if report.leaked:
+        print("leaked:", " ".join(map(str, report.leaked[:50])))
+    for error in report.errors:
+        print("error:", error)
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import os
+import struct
+import zlib
+from typing import Iterator
+
+_RECORD_HEADER = struct.Struct("<II")  # payload length, crc32 of payload
+_OP_HEADER = struct.Struct("<BI")  # op kind, key length
+_U32 = struct.Struct("<I")
+_PUT = 1
+_DELETE = 2
+
+
+def encode_ops(ops: list[tuple[bytes, bytes | None]]) -> bytes:
+    """One log record holding every (key, value-or-None) op of a commit."""
+    parts = [_U32.pack(len(ops))]
+    for key, value in ops:
+        if value is None:
+            parts.append(_OP_HEADER.pack(_DELETE, len(key)))
+            parts.append(key)
+        else:
+            parts.append(_OP_HEADER.pack(_PUT, len(key)))
+            parts.append(key)
+            parts.append(_U32.pack(len(value)))
+            parts.append(value)
+    payload = b"".join(parts)
+    return _RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_ops(payload: bytes) -> list[tuple[bytes, bytes | None]]:
+    (count,) = _U32.unpack_from(payload, 0)
+    offset = _U32.size
+    ops: list[tuple[bytes, bytes | None]] = []
+    for _ in range(count):
+        kind, key_len = _OP_HEADER.unpack_from(payload, offset)
+        offset += _OP_HEADER.size
+        key = payload[offset : offset + key_len]
+        offset += key_len
+        if kind == _DELETE:
+            ops.append((key, None))
+            continue
+        (value_len,) = _U32.unpack_from(payload, offset)
+        offset += _U32.size
+        ops.append((key, payload[offset : offset + value_len]))
+        offset += value_len
+    return ops
+
+
+class WriteAheadLog:
+    """Append-only redo log split into numbered segment files.
+
+    Segments are named ``<path>.<n>``. Commits are appended to the newest
+    segment; ``rotate`` starts a new one so that everything before it
+    can be deleted once the store has checkpointed it into tree pages.
+    Replay is idempotent (each record carries final values, not deltas),
+    so a crash between a checkpoint and the segment removal is harmless.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.bytes_written = 0
+        self._segments = self._existing_segments()
+        self._file = None
+        self._open_segment((self._segments[-1] + 1) if self._segments else 0)
+
+    def _existing_segments(self) -> list[int]:
+        directory = os.path.dirname(self.path) or "."
+        prefix = os.path.basename(self.path) + "."
+        found = []
+        for name in os.listdir(directory):
+            suffix = name[len(prefix) :]
+            if name.startswith(prefix) and suffix.isdigit():
+                found.append(int(suffix))
+        return sorted(found)
+
+    def _segment_path(self, seq: int) -> str:
+        return f"{self.path}.{seq}"
+
+    def _open_segment(self, seq: int) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self._segment_path(seq), "ab")
+        if not self._segments or self._segments[-1] != seq:
+            self._segments.append(seq)
+
+    def replay(self) -> Iterator[list[tuple[bytes, bytes | None]]]:
+        """Yield the ops of every intact record, oldest first.
+
+        A segment is read up to its first short or corrupt record: that
+        is a torn append from a crash, and it was never acknowledged.
+        """
+        for seq in self._segments:
+            with open(self._segment_path(seq), "rb") as f:
+                data = f.read()
+            offset = 0
+            while offset + _RECORD_HEADER.size <= len(data):
+                length, crc = _RECORD_HEADER.unpack_from(data, offset)
+                start = offset + _RECORD_HEADER.size
+                payload = data[start : start + length]
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                yield decode_ops(payload)
+                offset = start + length
+
+    def append(self, ops: list[tuple[bytes, bytes | None]], sync: bool = True) -> int:
+        """Append one commit record; with sync, fsync it before returning.
+
+        Returns the number of bytes written.
+        """
+        record = encode_ops(ops)
+        self._file.write(record)
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+        self.bytes_written += len(record)
+        return len(record)
+
+    def sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def rotate(self) -> list[int]:
+        """Start a new segment; return the ids of every older one."""
+        self.sync()
+        older = list(self._segments)
+        self._open_segment(self._segments[-1] + 1)
+        return older
+
+    def remove(self, segments: list[int]) -> None:
+        """Delete segments whose records are now in checkpointed pages."""
+        for seq in segments:
+            os.unlink(self._segment_path(seq))
+            self._segments.remove(seq)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None